@@ -0,0 +1,292 @@
+#!/usr/bin/env python
+"""
+Benchmarks of the conversion of ASCII radial files.
+
+Synthetic CODAR and WERA files (see xradial.synthetic) are written to a
+temporary directory and converted stage by stage: file read, header parse,
+table parse, reindex, Dataset build and NetCDF write (plain and with the
+encoding presets of xradial.netcdf), with both engines, then
+end to end through the single-file, batch and multi-file paths. Each stage is
+timed (best and median of `--repeat` runs) and its peak Python memory is
+taken with tracemalloc on one more run.
+
+Results are saved as JSON under benchmarks/results/ (ignored by git), named
+by the commit they were measured on, so that two commits can be compared:
+
+    python benchmarks/bench.py --size medium
+    python benchmarks/bench.py --compare benchmarks/results/<commit>.json
+"""
+
+import argparse
+import datetime
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import xradial.batch as batch # parallel conversion
+import xradial.dataframe as dataframe # dataframe operations
+import xradial.dataset as dataset # dataset operations
+import xradial.multifile as multifile # multi-file datasets
+import xradial.netcdf as netcdf # NetCDF export
+import xradial.reader as reader # single-pass file reading
+import xradial.synthetic as synthetic # synthetic radial files
+import xradial.utils as utils # helper functions
+import xradial.xradial as xradial # high-level API
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+TIME_VAR = 'time'
+CF_TIME_UNITS = 'seconds since 1970-01-01 00:00:00'
+
+# grid sizes of the synthetic files, and number of files of the batch and
+# multi-file paths
+SIZES = {
+    'small': {'codar': {'ranges': 35}, 'wera': {'lons': 60, 'lats': 60}, 'files': 8},
+    'medium': {'codar': {'ranges': 100}, 'wera': {'lons': 150, 'lats': 150}, 'files': 24},
+    'large': {'codar': {'ranges': 300}, 'wera': {'lons': 400, 'lats': 400}, 'files': 96},
+}
+
+def measure(func, repeat):
+    """Time a function and take its peak Python memory.
+
+    Args:
+        func (callable): function of no arguments
+        repeat (int): number of timed runs
+
+    Returns:
+        dict: best and median wall time (seconds), peak memory (bytes)"""
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    # tracemalloc slows allocations down, so it gets a run of its own
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {'best': min(times), 'median': statistics.median(times), 'peak_bytes': peak}
+
+def stage_benchmarks(path, workdir):
+    """Functions running each stage of the conversion of one file on its own,
+    fed by the output of the stages before it.
+
+    Args:
+        path (str): path to ASCII data
+        workdir (str): directory for the NetCDF output
+
+    Returns:
+        list of tuple: name, function"""
+
+    buf = reader.read_bytes(path)
+    header, table, _ = reader.split_sections(buf)
+    lines = header.decode('utf-8', errors='replace').splitlines()
+    metadata = utils.parse_metadata(lines, True)
+    dt = utils.create_time(metadata)
+    olat, olon = utils.get_olat_olon(metadata)
+
+    def parse_table():
+        return dataframe.create_dataframe(io.BytesIO(table), TIME_VAR, dt, metadata)
+
+    df = parse_table()
+    reindexed = dataframe.reindex_dataframe(df.copy(), metadata, TIME_VAR, olat, olon)
+    ds = xradial.create_xarray_dataset(path, TIME_VAR, CF_TIME_UNITS, True)
+    nc_path = os.path.join(workdir, 'stage.nc')
+
+    def grid_cells():
+        dims, template, coords = dataframe.get_grid(df, metadata, olat, olon)
+        axes = tuple(c[:1] for c in coords) if template is None else template.axes
+        return dataset.grid_cells(axes, coords)
+
+    return [
+        ('read', lambda: reader.read_bytes(path)),
+        ('header', lambda: utils.parse_metadata(lines, True)),
+        ('table', parse_table),
+        ('reindex/pandas', lambda: dataframe.reindex_dataframe(df.copy(), metadata, TIME_VAR, olat, olon)),
+        ('reindex/numpy', grid_cells),
+        ('dataset/pandas', lambda: xr.Dataset.from_dataframe(reindexed)),
+        ('dataset/numpy', lambda: dataset.create_dataset(df, metadata, TIME_VAR, olat, olon)),
+        ('netcdf', lambda: ds.to_netcdf(nc_path)),
+        ('netcdf/zlib', lambda: netcdf.write_netcdf(ds, nc_path, TIME_VAR, 'zlib')),
+        ('netcdf/packed', lambda: netcdf.write_netcdf(ds, nc_path, TIME_VAR, 'packed')),
+    ]
+
+def path_benchmarks(paths, workers):
+    """Functions converting files end to end through each path of the API.
+
+    Args:
+        paths (list of str): paths to ASCII data of one site
+        workers (int): number of processes of the batch path
+
+    Returns:
+        list of tuple: name, function"""
+
+    def convert_batch():
+        for result in batch.convert_files(paths, TIME_VAR, CF_TIME_UNITS, True, workers=workers):
+            if result.error is not None:
+                raise result.error
+
+    return [
+        ('single/numpy', lambda: xradial.create_xarray_dataset(paths[0], TIME_VAR, CF_TIME_UNITS, True)),
+        ('single/pandas', lambda: xradial.create_xarray_dataset(paths[0], TIME_VAR, CF_TIME_UNITS, True, engine='pandas')),
+        ('single/mmap', lambda: xradial.create_xarray_dataset(paths[0], TIME_VAR, CF_TIME_UNITS, True, mmap=True)),
+        ('batch', convert_batch),
+        ('multifile', lambda: multifile.open_mfradial(paths, TIME_VAR, CF_TIME_UNITS, True)),
+    ]
+
+def run(size='small', repeat=5, workers=2, only=None, log=print):
+    """Write the synthetic files of a size and run all benchmarks on them.
+
+    Args:
+        size (str): key of SIZES
+        repeat (int): number of timed runs of each benchmark
+        workers (int): number of processes of the batch path
+        only (str/None): run only the benchmarks whose name contains this
+        log (callable): called with a line of text per benchmark
+
+    Returns:
+        dict: name: result of measure"""
+
+    config = SIZES[size]
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for kind in ('codar', 'wera'):
+            paths = synthetic.write_series(
+                os.path.join(workdir, kind),
+                kind,
+                files=config['files'],
+                **config[kind]
+            )
+            rows = utils.get_metadata_from_file(paths[0], True)['TableRows']
+            log('{}: {} files of {} rows, {} bytes'.format(kind, len(paths), rows, os.path.getsize(paths[0])))
+
+            benchmarks = stage_benchmarks(paths[0], workdir) + path_benchmarks(paths, workers)
+            for name, func in benchmarks:
+                name = '{}/{}'.format(kind, name)
+                if only and only not in name:
+                    continue
+                results[name] = measure(func, repeat)
+                log(_format_result(name, results[name]))
+
+    return results
+
+def environment():
+    """Commit and versions the benchmarks run on."""
+
+    root = os.path.dirname(RESULTS_DIR)
+
+    def git(*args):
+        try:
+            return subprocess.run(
+                ('git',) + args, cwd=root, capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    return {
+        'commit': git('rev-parse', '--short', 'HEAD'),
+        'dirty': bool(git('status', '--porcelain', '--untracked-files=no')),
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'xarray': xr.__version__,
+    }
+
+def save(report, directory=RESULTS_DIR):
+    """Save a report as <commit>.json, with a '-dirty' suffix if the tree
+    had uncommitted changes.
+
+    Returns:
+        str: path of the file"""
+
+    env = report['environment']
+    name = '{}{}-{}.json'.format(env['commit'] or 'unknown', '-dirty' if env['dirty'] else '', report['size'])
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, name)
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    return path
+
+def compare(report, baseline, threshold=0.1):
+    """Compare the best times and peak memory of two reports.
+
+    Args:
+        report (dict): new report
+        baseline (dict): report to compare against
+        threshold (float): relative slowdown flagged as a regression
+
+    Returns:
+        list of str: one line per benchmark of both reports"""
+
+    lines = []
+    for name, new in report['results'].items():
+        old = baseline['results'].get(name)
+        if old is None:
+            continue
+        ratio = new['best'] / old['best']
+        flag = '  REGRESSION' if ratio > 1 + threshold else ''
+        lines.append('{:<28} {:>9.2f} ms -> {:>9.2f} ms  x{:.2f}  peak {:>8.1f} -> {:>8.1f} MiB{}'.format(
+            name,
+            old['best'] * 1e3,
+            new['best'] * 1e3,
+            ratio,
+            old['peak_bytes'] / 2**20,
+            new['peak_bytes'] / 2**20,
+            flag,
+        ))
+    return lines
+
+def _format_result(name, result):
+    return '{:<28} best {:>9.2f} ms  median {:>9.2f} ms  peak {:>8.1f} MiB'.format(
+        name, result['best'] * 1e3, result['median'] * 1e3, result['peak_bytes'] / 2**20,
+    )
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size', choices=sorted(SIZES), default='small')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--only', help='run only benchmarks whose name contains this')
+    parser.add_argument('--compare', metavar='JSON', help='report to compare against')
+    parser.add_argument('--no-save', action='store_true', help="don't save the report")
+    args = parser.parse_args(argv)
+
+    report = {
+        'environment': environment(),
+        'size': args.size,
+        'repeat': args.repeat,
+        'workers': args.workers,
+        'results': run(args.size, args.repeat, args.workers, args.only),
+    }
+
+    if not args.no_save:
+        print('saved {}'.format(save(report)))
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print('\n'.join(compare(report, baseline)))
+
+if __name__ == '__main__':
+    main()
@@ -11,4 +11,15 @@ setup(
     packages=find_packages(),
     description='Library for converting HF-Radar Radial ASCII data to NetCDF format',
     long_description=read('README.md'),
+    python_requires='>=3.9',
+    extras_require={
+        'zstd': ['zstandard'],
+        'sftp': ['paramiko'],
+        'zarr': ['zarr'],
+    },
+    entry_points={
+        'xarray.backends': [
+            'xradial = xradial.backend:RadialBackendEntrypoint',
+        ],
+    },
 )
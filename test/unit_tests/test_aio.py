@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import asyncio
+import concurrent.futures
+import io
+import os
+import subprocess
+import sys
+import threading
+import unittest
+import xradial
+import xradial.aio as aio
+import xradial.xradial as xrad
+
+class AsyncReader(object):
+    """File-like object whose read is a coroutine, counting the reads in
+    flight."""
+
+    in_flight = 0
+    max_in_flight = 0
+
+    def __init__(self, contents):
+        self.contents = contents
+
+    async def read(self):
+        AsyncReader.in_flight += 1
+        AsyncReader.max_in_flight = max(AsyncReader.max_in_flight, AsyncReader.in_flight)
+        await asyncio.sleep(0.01)
+        AsyncReader.in_flight -= 1
+        return self.contents
+
+class ThreadReader(io.BytesIO):
+    """File-like object whose plain read records the thread it ran in."""
+
+    def read(self, *args):
+        self.thread = threading.current_thread()
+        return super().read(*args)
+
+class TestAio(unittest.TestCase):
+
+    def setUp(self):
+
+        # set test paths up
+        test_root = os.path.dirname(os.path.dirname(__file__))
+        self.codar_test_fp = os.path.join(
+            test_root,
+            "data/codar_ascii/RDL_m_Rutgers_AMAG_2018_02_14_0000.hfrss10lluv"
+        )
+
+        self.wera_test_fp = os.path.join(
+            test_root,
+            "data/wera_ascii/RDL_SC_GTN_2018_02_14_0023.hfrweralluv1.0"
+        )
+
+        self.time_var = "time"
+        self.cf_time_units = "seconds since 1970-01-01"
+
+    def test_aopen(self):
+        """Every kind of source converts as create_xarray_dataset does."""
+
+        for fp in (self.codar_test_fp, self.wera_test_fp):
+            with open(fp, 'rb') as f:
+                contents = f.read()
+            correct_ds = xrad.create_xarray_dataset(fp, self.time_var, self.cf_time_units, True)
+
+            async def fetch():
+                await asyncio.sleep(0)
+                return contents
+
+            for source in (
+                lambda: fp,
+                lambda: contents,
+                lambda: io.BytesIO(contents),
+                lambda: AsyncReader(contents),
+                fetch,
+            ):
+                ds = asyncio.run(xradial.aopen(source(), self.time_var, self.cf_time_units, True))
+                self.assertTrue(ds.identical(correct_ds))
+
+        with concurrent.futures.ThreadPoolExecutor(2) as executor:
+            ds = asyncio.run(xradial.aopen(
+                self.codar_test_fp, self.time_var, self.cf_time_units, True, executor=executor,
+            ))
+        self.assertTrue(ds.identical(xrad.create_xarray_dataset(self.codar_test_fp, self.time_var, self.cf_time_units, True)))
+
+    def test_read_source(self):
+        """A plain read runs outside the event loop's thread, and importing
+        xradial doesn't import the asyncio API."""
+
+        with open(self.codar_test_fp, 'rb') as f:
+            contents = f.read()
+        source = ThreadReader(contents)
+        self.assertEqual(asyncio.run(aio.read_source(source)), contents)
+        self.assertIsNot(source.thread, threading.current_thread())
+
+        modules = subprocess.check_output([
+            sys.executable, '-c',
+            'import sys, xradial; print(" ".join(m for m in ("asyncio", "xarray", "xradial.aio") if m in sys.modules))',
+        ], cwd=os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+        self.assertEqual(modules.split(), [])
+
+    def test_aopen_many(self):
+        """Results come in input order, or as they finish, with failures
+        reported per source and at most `concurrency` sources in flight."""
+
+        with open(self.codar_test_fp, 'rb') as f:
+            contents = f.read()
+        correct_ds = xrad.create_xarray_dataset(self.codar_test_fp, self.time_var, self.cf_time_units, True)
+
+        async def sources():
+            for i in range(6):
+                yield AsyncReader(b'not a radial file' if i == 2 else contents)
+
+        async def collect(ordered):
+            return [r async for r in aio.aopen_many(
+                sources(), self.time_var, self.cf_time_units, True, concurrency=3, ordered=ordered,
+            )]
+
+        AsyncReader.max_in_flight = 0
+        results = asyncio.run(collect(True))
+        self.assertEqual([r.index for r in results], list(range(6)))
+        self.assertEqual(AsyncReader.max_in_flight, 3)
+
+        for r in results:
+            if r.index == 2:
+                self.assertIsNone(r.dataset)
+                self.assertIsInstance(r.error, Exception)
+            else:
+                self.assertIsNone(r.error)
+                self.assertTrue(r.dataset.identical(correct_ds))
+
+        results = asyncio.run(collect(False))
+        self.assertEqual(sorted(r.index for r in results), list(range(6)))
+
+        # plain iterables of paths work too
+        async def collect_paths():
+            return [r async for r in aio.aopen_many([self.codar_test_fp] * 2, self.time_var, self.cf_time_units, True)]
+
+        self.assertTrue(all(r.error is None for r in asyncio.run(collect_paths())))
+
+        with self.assertRaises(ValueError):
+            asyncio.run(aio.aopen_many([], self.time_var, self.cf_time_units, concurrency=0).__anext__())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import pickle
+import shutil
+import tempfile
+import numpy as np
+import xarray as xr
+import unittest
+from xarray.core import indexing
+import xradial.xradial as xradial
+from xradial.backend import RadialBackendEntrypoint, RadialStore
+
+class TestBackend(unittest.TestCase):
+
+    def setUp(self):
+
+        # set test paths up
+        test_root = os.path.dirname(os.path.dirname(__file__))
+        self.codar_test_fp = os.path.join(
+            test_root,
+            "data/codar_ascii/RDL_m_Rutgers_AMAG_2018_02_14_0000.hfrss10lluv"
+        )
+
+        self.wera_test_fp = os.path.join(
+            test_root,
+            "data/wera_ascii/RDL_SC_GTN_2018_02_14_0023.hfrweralluv1.0"
+        )
+
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_open_dataset(self):
+        """Opening through xarray gives lazy variables which load to the same
+        Dataset as create_xarray_dataset."""
+
+        for fp in (self.codar_test_fp, self.wera_test_fp):
+            ds = xr.open_dataset(
+                fp,
+                engine=RadialBackendEntrypoint,
+                cf_time_units="seconds since 1970-01-01 00:00:00"
+            )
+            self.assertIsInstance(ds['VELO'].variable._data, indexing.MemoryCachedArray)
+            self.assertNotIsInstance(ds['VELO'].variable._data.array, indexing.NumpyIndexingAdapter)
+
+            correct_ds = xradial.create_xarray_dataset(fp, "time", "seconds since 1970-01-01 00:00:00", True)
+
+            # basic, outer and vectorized indexing of unloaded variables
+            dim0, dim1 = correct_ds['VELO'].dims[1:]
+            for indexers in (
+                {dim0: 3},
+                {dim0: slice(2, 9, 3), dim1: -1},
+                {dim0: [1, 4], dim1: [0, 2, 5]},
+                {dim0: xr.DataArray([1, 4], dims='p'), dim1: xr.DataArray([2, 5], dims='p')},
+            ):
+                xr.testing.assert_identical(ds['VELO'].isel(indexers), correct_ds['VELO'].isel(indexers))
+
+            self.assertTrue(ds.load().identical(correct_ds))
+            self.assertEqual(ds['time'].encoding['units'], "seconds since 1970-01-01 00:00:00")
+
+        ds = xr.open_dataset(self.codar_test_fp, engine=RadialBackendEntrypoint, drop_variables=['VELU', 'ANTB'])
+        self.assertNotIn('VELU', ds)
+        self.assertNotIn('ANTB', ds)
+        self.assertIn('VELO', ds)
+        xr.testing.assert_identical(ds['VELO'], xr.open_dataset(self.codar_test_fp, engine=RadialBackendEntrypoint)['VELO'])
+
+        # dropped columns are never parsed
+        store = RadialStore(self.codar_test_fp, "time", True, {'VELU', 'VELV', 'ESPC'})
+        self.assertEqual(set(store.df.columns) & {'VELU', 'VELV', 'ESPC'}, set())
+        self.assertIn('VELO', store.df.columns)
+
+        self.assertTrue(RadialBackendEntrypoint().guess_can_open(self.codar_test_fp))
+        self.assertTrue(RadialBackendEntrypoint().guess_can_open(self.wera_test_fp))
+        for name in ("RDLm_AMAG_2018_02_14_0000.ruv", "RDL_m_AMAG.hfrss10lluv.gz", "RDL_m_AMAG.lluv"):
+            self.assertTrue(RadialBackendEntrypoint().guess_can_open(name))
+        for name in ("radials.nc", "lluv_notes.txt", "TOTL_MARA.tuv", "lluv/radials.csv"):
+            self.assertFalse(RadialBackendEntrypoint().guess_can_open(name))
+
+        # radial files under other names are recognised by their header
+        renamed = os.path.join(self.tmp_dir, "AMAG.txt")
+        shutil.copyfile(self.codar_test_fp, renamed)
+        self.assertTrue(RadialBackendEntrypoint().guess_can_open(renamed))
+        with open(renamed, 'rb') as f:
+            self.assertTrue(RadialBackendEntrypoint().guess_can_open(f))
+
+        # contents of a file, rather than a path
+        with open(self.codar_test_fp, 'rb') as f:
+            contents = f.read()
+        self.assertTrue(RadialBackendEntrypoint().guess_can_open(contents))
+        self.assertFalse(RadialBackendEntrypoint().guess_can_open(b'CDF\x01'))
+        ds = xr.open_dataset(memoryview(contents), engine=RadialBackendEntrypoint)
+        self.assertTrue(ds.load().identical(xr.open_dataset(self.codar_test_fp, engine=RadialBackendEntrypoint).load()))
+
+    def test_open_mfdataset(self):
+        """Files open in parallel through dask and stack along time."""
+
+        try:
+            import dask
+        except ImportError:
+            self.skipTest("dask is not installed")
+
+        ds = xr.open_mfdataset(
+            [self.codar_test_fp, self.codar_test_fp],
+            engine=RadialBackendEntrypoint,
+            parallel=True,
+            combine='nested',
+            concat_dim='time',
+        )
+        correct_ds = xradial.create_xarray_dataset(self.codar_test_fp, "time", "seconds since 1970-01-01 00:00:00", True)
+
+        self.assertEqual(ds['VELO'].shape, (2,) + correct_ds['VELO'].shape[1:])
+        self.assertTrue(ds['VELO'][1].load().identical(correct_ds['VELO'][0]))
+
+        # the stores are pickled to the workers of the process scheduler
+        store = pickle.loads(pickle.dumps(RadialStore(self.codar_test_fp, "time")))
+        self.assertTrue(np.array_equal(store.load('VELO'), correct_ds['VELO'].values, equal_nan=True))
+        with dask.config.set(scheduler='processes', num_workers=2):
+            self.assertTrue(ds['VELO'].load().isel(time=[1]).identical(correct_ds['VELO']))
+
+if __name__ == "__main__":
+    unittest.main()
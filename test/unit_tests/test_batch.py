@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import unittest
+import xradial.batch as batch
+import xradial.xradial as xradial
+
+class TestBatch(unittest.TestCase):
+
+    def setUp(self):
+
+        # set test paths up
+        test_root = os.path.dirname(os.path.dirname(__file__))
+        self.codar_test_fp = os.path.join(
+            test_root,
+            "data/codar_ascii/RDL_m_Rutgers_AMAG_2018_02_14_0000.hfrss10lluv"
+        )
+
+        self.wera_test_fp = os.path.join(
+            test_root,
+            "data/wera_ascii/RDL_SC_GTN_2018_02_14_0023.hfrweralluv1.0"
+        )
+
+        self.paths = [
+            self.codar_test_fp,
+            self.wera_test_fp,
+            os.path.join(test_root, "data/does_not_exist.hfrss10lluv"),
+            self.codar_test_fp,
+        ]
+
+    def test_convert_files(self):
+        """Results come back in input order, failures are reported per file
+        and match converting each file on its own."""
+
+        for workers in (1, 2):
+            results = list(batch.convert_files(
+                iter(self.paths),
+                "time",
+                "seconds since 1970-01-01 00:00:00",
+                True,
+                workers=workers,
+                chunksize=1,
+            ))
+
+            self.assertEqual([r.index for r in results], [0, 1, 2, 3])
+            self.assertEqual([r.path for r in results], self.paths)
+
+            self.assertIsNone(results[2].dataset)
+            self.assertIsInstance(results[2].error, FileNotFoundError)
+
+            for r in (results[0], results[1], results[3]):
+                self.assertIsNone(r.error)
+                correct_ds = xradial.create_xarray_dataset(r.path, "time", "seconds since 1970-01-01 00:00:00", True)
+                self.assertTrue(r.dataset.identical(correct_ds))
+
+    def test_convert_files_unordered(self):
+        """Every file is reported once when yielding results as they finish."""
+
+        results = list(batch.convert_files(
+            self.paths,
+            "time",
+            "seconds since 1970-01-01 00:00:00",
+            True,
+            workers=2,
+            chunksize=3,
+            ordered=False,
+        ))
+
+        self.assertEqual(sorted(r.index for r in results), [0, 1, 2, 3])
+        self.assertEqual(sum(r.error is not None for r in results), 1)
+
+    def test_convert_buffers(self):
+        """Contents which can't be pickled, such as memoryviews, convert in
+        worker processes too."""
+
+        with open(self.codar_test_fp, 'rb') as f:
+            contents = f.read()
+        correct_ds = xradial.create_xarray_dataset(self.codar_test_fp, "time", "seconds since 1970-01-01 00:00:00", True)
+
+        results = list(batch.convert_files(
+            [memoryview(contents), bytearray(contents)],
+            "time",
+            "seconds since 1970-01-01 00:00:00",
+            True,
+            workers=2,
+            chunksize=1,
+        ))
+
+        self.assertEqual([r.index for r in results], [0, 1])
+        for r in results:
+            self.assertIsNone(r.error)
+            self.assertTrue(r.dataset.identical(correct_ds))
+
+if __name__ == "__main__":
+    unittest.main()
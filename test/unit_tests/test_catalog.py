@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import datetime
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+import xradial.catalog as catalog
+import xradial.utils as utils
+
+class TestCatalog(unittest.TestCase):
+
+    def setUp(self):
+
+        # set test paths up
+        test_root = os.path.dirname(os.path.dirname(__file__))
+        codar_test_fp = os.path.join(
+            test_root,
+            "data/codar_ascii/RDL_m_Rutgers_AMAG_2018_02_14_0000.hfrss10lluv"
+        )
+
+        wera_test_fp = os.path.join(
+            test_root,
+            "data/wera_ascii/RDL_SC_GTN_2018_02_14_0023.hfrweralluv1.0"
+        )
+
+        # an archive with two CODAR files an hour apart and a WERA file
+        self.tmp_dir = tempfile.mkdtemp()
+        self.archive = os.path.join(self.tmp_dir, "archive")
+        os.makedirs(os.path.join(self.archive, "codar"))
+        os.makedirs(os.path.join(self.archive, "wera"))
+
+        self.codar_fps = [
+            os.path.join(self.archive, "codar", os.path.basename(codar_test_fp)),
+            os.path.join(self.archive, "codar", "RDL_m_Rutgers_AMAG_2018_02_14_0100.hfrss10lluv"),
+        ]
+        shutil.copy(codar_test_fp, self.codar_fps[0])
+        with open(codar_test_fp) as f, open(self.codar_fps[1], 'w') as out:
+            for line in f:
+                if line.startswith('%TimeStamp:'):
+                    line = '%TimeStamp: 2018 02 14  01 00 00\n'
+                out.write(line)
+
+        self.wera_fp = os.path.join(self.archive, "wera", os.path.basename(wera_test_fp))
+        shutil.copy(wera_test_fp, self.wera_fp)
+
+        self.db_path = os.path.join(self.tmp_dir, "catalog.sqlite")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_build_and_query(self):
+        """Files are indexed from their headers and found by site and time."""
+
+        self.assertEqual(catalog.build_catalog(self.archive, self.db_path), 3)
+
+        self.assertEqual(
+            catalog.query_catalog(self.db_path),
+            self.codar_fps[:1] + [self.wera_fp] + self.codar_fps[1:]
+        )
+        self.assertEqual(catalog.query_catalog(self.db_path, site='amag'), self.codar_fps)
+        self.assertEqual(catalog.query_catalog(self.db_path, site='GTN'), [self.wera_fp])
+        self.assertEqual(
+            catalog.query_catalog(self.db_path, site='AMAG', start=datetime.datetime(2018, 2, 14, 0, 30)),
+            self.codar_fps[1:]
+        )
+        self.assertEqual(
+            catalog.query_catalog(self.db_path, start='2018-02-14 00:00:00', end='2018-02-14 00:23:00'),
+            self.codar_fps[:1] + [self.wera_fp]
+        )
+
+        with catalog.connect(self.db_path) as conn:
+            row = conn.execute(
+                "SELECT site, olat, olon, angular_res, range_res_km, table_rows, uuid FROM radials WHERE path = ?",
+                (self.codar_fps[0],)
+            ).fetchone()
+        metadata = utils.get_metadata_from_file(self.codar_fps[0], numeric=True)
+        self.assertEqual(row[0], 'AMAG')
+        self.assertEqual(list(row[1:3]), utils.get_olat_olon(metadata))
+        self.assertEqual(row[3], utils.get_angular_resolution(metadata))
+        self.assertEqual(row[5], metadata['TableRows'])
+        self.assertEqual(row[6], metadata['UUID'])
+
+    def test_rescan(self):
+        """A rescan only reads new or changed files and drops removed ones."""
+
+        catalog.build_catalog(self.archive, self.db_path)
+
+        with mock.patch.object(catalog, 'index_file', wraps=catalog.index_file) as index_file:
+            self.assertEqual(catalog.build_catalog(self.archive, self.db_path), 0)
+            self.assertEqual(index_file.call_count, 0)
+
+            os.remove(self.codar_fps[1])
+            with open(self.wera_fp, 'a') as f:
+                f.write('%End:\n')
+            self.assertEqual(catalog.build_catalog(self.archive, self.db_path), 1)
+            self.assertEqual(index_file.call_args[0][0], self.wera_fp)
+
+        self.assertEqual(catalog.query_catalog(self.db_path), [self.codar_fps[0], self.wera_fp])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import bz2
+import gzip
+import io
+import lzma
+import os
+import shutil
+import tempfile
+import unittest
+import xradial.compression as compression
+import xradial.utils as utils
+import xradial.xradial as xradial
+
+class NonSeekable(io.RawIOBase):
+    """Binary stream which can only be read forwards, like a socket."""
+
+    def __init__(self, data):
+        self.data = io.BytesIO(data)
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        return self.data.readinto(b)
+
+class TestCompression(unittest.TestCase):
+
+    def setUp(self):
+
+        # set test paths up
+        test_root = os.path.dirname(os.path.dirname(__file__))
+        self.codar_test_fp = os.path.join(
+            test_root,
+            "data/codar_ascii/RDL_m_Rutgers_AMAG_2018_02_14_0000.hfrss10lluv"
+        )
+
+        self.tmp_dir = tempfile.mkdtemp()
+        with open(self.codar_test_fp, 'rb') as f:
+            self.raw = f.read()
+
+        self.compressors = {'gzip': gzip.compress, 'bz2': bz2.compress, 'xz': lzma.compress}
+        try:
+            import zstandard
+        except ImportError:
+            pass
+        else:
+            self.compressors['zstd'] = zstandard.ZstdCompressor().compress
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_open_binary(self):
+        """Compressed files and streams read back as the original bytes."""
+
+        self.assertIsNone(compression.detect_compression(self.raw[:6]))
+        with compression.open_binary(self.codar_test_fp) as f:
+            self.assertEqual(f.read(), self.raw)
+
+        for name, compress in self.compressors.items():
+            data = compress(self.raw)
+            self.assertEqual(compression.detect_compression(data[:6]), name)
+
+            with compression.open_binary(io.BytesIO(data)) as f:
+                self.assertEqual(f.read(), self.raw)
+            with compression.open_binary(NonSeekable(data)) as f:
+                self.assertEqual(f.read(), self.raw)
+
+    def test_compressed_files(self):
+        """Every entry point gives the same result for a compressed file as
+        for the uncompressed one, whatever it is named."""
+
+        correct_ds = xradial.create_xarray_dataset(self.codar_test_fp, "time", "seconds since 1970-01-01 00:00:00", True)
+        correct_metadata = utils.get_metadata_from_file(self.codar_test_fp, True)
+
+        for name, compress in self.compressors.items():
+            fp = os.path.join(self.tmp_dir, "RDL_m_Rutgers_AMAG_2018_02_14_0000.hfrss10lluv")
+            with open(fp, 'wb') as f:
+                f.write(compress(self.raw))
+
+            ds = xradial.create_xarray_dataset(fp, "time", "seconds since 1970-01-01 00:00:00", True)
+            self.assertTrue(ds.identical(correct_ds))
+
+            with open(fp, 'rb') as f:
+                ds = xradial.create_xarray_dataset(f, "time", "seconds since 1970-01-01 00:00:00", True)
+                self.assertFalse(f.closed)
+            self.assertTrue(ds.identical(correct_ds))
+
+            self.assertEqual(utils.get_metadata_from_file(fp, True).keys(), correct_metadata.keys())
+            self.assertEqual(
+                utils.get_metadata_from_file(fp, True)['TableRows'],
+                correct_metadata['TableRows']
+            )
+
+if __name__ == "__main__":
+    unittest.main()
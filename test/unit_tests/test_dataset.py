@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import numpy as np
+import xarray as xr
+import unittest
+import xradial.dataframe as dataframe
+import xradial.dataset as dataset
+import xradial.reader as reader
+import xradial.utils as utils
+import xradial.xradial as xradial
+
+class TestDataset(unittest.TestCase):
+
+    def setUp(self):
+
+        # set test paths up
+        test_root = os.path.dirname(os.path.dirname(__file__))
+        self.codar_test_fp = os.path.join(
+            test_root,
+            "data/codar_ascii/RDL_m_Rutgers_AMAG_2018_02_14_0000.hfrss10lluv"
+        )
+
+        self.wera_test_fp = os.path.join(
+            test_root,
+            "data/wera_ascii/RDL_SC_GTN_2018_02_14_0023.hfrweralluv1.0"
+        )
+
+    def _dataframe(self, fp):
+        metadata, table = reader.read_radial(fp, True)
+        dt = utils.create_time(metadata)
+        olat, olon = utils.get_olat_olon(metadata)
+        df = dataframe.create_dataframe(table, "time", dt, metadata)
+        return df, metadata, olat, olon
+
+    def test_create_dataset(self):
+        """Scattering into dense arrays must give the same Dataset as pandas
+        reindexing followed by Dataset.from_dataframe."""
+
+        for fp in (self.codar_test_fp, self.wera_test_fp):
+            df, metadata, olat, olon = self._dataframe(fp)
+
+            ds = dataset.create_dataset(df.copy(), metadata, "time", olat, olon)
+            correct_ds = xr.Dataset.from_dataframe(
+                dataframe.reindex_dataframe(df.copy(), metadata, "time", olat, olon)
+            )
+
+            xr.testing.assert_identical(ds, correct_ds)
+
+        # a single row is kept as is, on a 1x1 grid
+        df, metadata, olat, olon = self._dataframe(self.codar_test_fp)
+        ds = dataset.create_dataset(df.iloc[:1], metadata, "time", olat, olon)
+        self.assertEqual(dict(ds.dims), {"time": 1, "BEAR": 1, "RNGE": 1})
+        self.assertEqual(float(ds['VELO']), df['VELO'].iloc[0])
+
+    def test_variables(self):
+        """Only the requested variables and the grid columns are loaded, with
+        the same values as when loading everything, by either engine."""
+
+        for fp in (self.codar_test_fp, self.wera_test_fp):
+            correct_ds = xradial.create_xarray_dataset(fp, "time", "seconds since 1970-01-01 00:00:00", True)
+            for engine in ('numpy', 'pandas'):
+                ds = xradial.create_xarray_dataset(
+                    fp, "time", "seconds since 1970-01-01 00:00:00", True,
+                    engine=engine, variables=['VELO', 'HEAD', 'ESPC'],
+                )
+                self.assertEqual(
+                    set(ds.data_vars),
+                    {'VELO', 'HEAD', 'OLAT', 'OLON', 'ANTB'}
+                    | ({'ESPC'} & set(correct_ds.data_vars))
+                    | ({'LATD', 'LOND', 'BEAR', 'RNGE'} - set(ds.dims))
+                )
+                for name in ds.data_vars:
+                    xr.testing.assert_identical(ds[name], correct_ds[name])
+
+        # parsing a whole file projects too
+        metadata, table = reader.read_radial(self.codar_test_fp, True)
+        df = dataframe.create_initial_dataframe(self.codar_test_fp, metadata, "time", 0, ['VFLG'])
+        self.assertEqual(list(df.columns), ['LOND', 'LATD', 'VFLG', 'RNGE', 'BEAR', 'time'])
+
+    def test_ragged(self):
+        """A ragged Dataset holds one element per observation, with integer
+        grid positions, and densifies to the Dataset of the grid layout."""
+
+        for fp in (self.codar_test_fp, self.wera_test_fp):
+            for dtypes in (None, 'compact'):
+                correct_ds = xradial.create_xarray_dataset(fp, "time", "seconds since 1970-01-01", True, dtypes=dtypes)
+                ds = xradial.create_xarray_dataset(
+                    fp, "time", "seconds since 1970-01-01", True, dtypes=dtypes, layout='ragged',
+                )
+
+                self.assertEqual(ds.sizes[dataset.OBS_DIM], ds.attrs['TableRows'])
+                self.assertLess(ds.nbytes, correct_ds.nbytes)
+                for dim in correct_ds['VELU'].dims[1:]:
+                    self.assertEqual(ds[dim + '_index'].dtype, np.int32)
+                xr.testing.assert_identical(dataset.densify(ds, "time"), correct_ds)
+
+        # files on the same grid stack along time
+        ds = dataset.concat_ragged([ds, ds.assign_coords(time=ds['time'] + np.timedelta64(1, 'h'))], "time")
+        self.assertEqual(ds.sizes["time"], 2)
+        self.assertEqual(ds["time_index"].values.tolist(), [0] * (ds.sizes["obs"] // 2) + [1] * (ds.sizes["obs"] // 2))
+        dense = dataset.densify(ds, "time")
+        xr.testing.assert_identical(dense.isel(time=[0]), correct_ds)
+        np.testing.assert_array_equal(dense['VELU'].values[1], correct_ds['VELU'].values[0])
+
+        with self.assertRaises(ValueError):
+            dataset.concat_ragged([ds, ds.assign_coords(i=ds['i'] + 1)], "time")
+
+        with self.assertRaises(ValueError):
+            xradial.create_xarray_dataset(fp, "time", "seconds since 1970-01-01", True, layout='sparse')
+
+    def test_grid_cells(self):
+        """Rows off the grid are dropped and duplicate rows are refused."""
+
+        axes = (np.array([0., 5., 10.]), np.array([1., 2.]))
+
+        cells = dataset.grid_cells(axes, (np.array([5., 10., 7., 0.]), np.array([2., 1., 1., 3.])))
+        self.assertEqual(cells.tolist(), [3, 4, -1, -1])
+
+        out = dataset.scatter(cells, np.array([[1.], [2.], [3.], [4.]]), 6)
+        self.assertTrue(np.array_equal(out[0], [np.nan, np.nan, np.nan, 1., 2., np.nan], equal_nan=True))
+
+        with self.assertRaises(ValueError):
+            dataset.grid_cells(axes, (np.array([5., 5.]), np.array([2., 2.])))
+
+if __name__ == "__main__":
+    unittest.main()
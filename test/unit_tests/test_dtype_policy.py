@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import tempfile
+import numpy as np
+import unittest
+import xarray as xr
+import xradial.dtype_policy as dtype_policy
+import xradial.multifile as multifile
+import xradial.xradial as xradial
+
+class TestDtypePolicy(unittest.TestCase):
+
+    def setUp(self):
+
+        # set test paths up
+        test_root = os.path.dirname(os.path.dirname(__file__))
+        self.codar_test_fp = os.path.join(
+            test_root,
+            "data/codar_ascii/RDL_m_Rutgers_AMAG_2018_02_14_0000.hfrss10lluv"
+        )
+
+        self.wera_test_fp = os.path.join(
+            test_root,
+            "data/wera_ascii/RDL_SC_GTN_2018_02_14_0023.hfrweralluv1.0"
+        )
+
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_compact(self):
+        """Compact variables hold the float64 values, with integer fill values
+        where the float64 ones are NaN, whichever engine is used."""
+
+        for fp in (self.codar_test_fp, self.wera_test_fp):
+            correct_ds = xradial.create_xarray_dataset(fp, "time", "seconds since 1970-01-01 00:00:00", True)
+            ds = xradial.create_xarray_dataset(fp, "time", "seconds since 1970-01-01 00:00:00", True, dtypes='compact')
+            pandas_ds = xradial.create_xarray_dataset(
+                fp, "time", "seconds since 1970-01-01 00:00:00", True, engine='pandas', dtypes='compact'
+            )
+            self.assertTrue(ds.identical(pandas_ds))
+            self.assertLess(ds.nbytes, correct_ds.nbytes)
+
+            for name in correct_ds.data_vars:
+                if name in ('OLAT', 'OLON', 'ANTB'):
+                    continue
+                dtype = dtype_policy.COMPACT_DTYPES.get(name, np.float64)
+                self.assertEqual(ds[name].dtype, dtype)
+
+                expected = correct_ds[name].values
+                if np.dtype(dtype).kind == 'i':
+                    fill = ds[name].attrs['_FillValue']
+                    self.assertTrue(np.array_equal(ds[name].values == fill, np.isnan(expected)))
+                    expected = np.where(np.isnan(expected), fill, expected)
+                self.assertTrue(np.array_equal(ds[name].values, expected.astype(dtype), equal_nan=True))
+
+        # integer fill values become NaN again when read back
+        out = os.path.join(self.tmp_dir, "compact.nc")
+        correct_ds = xradial.create_xarray_dataset(self.codar_test_fp, "time", "seconds since 1970-01-01 00:00:00", True)
+        ds = xradial.create_xarray_dataset(self.codar_test_fp, "time", "seconds since 1970-01-01 00:00:00", True, dtypes='compact')
+        ds.to_netcdf(out)
+        with xr.open_dataset(out) as nc:
+            self.assertTrue(np.array_equal(nc['VFLG'].values, correct_ds['VFLG'].values, equal_nan=True))
+
+        with self.assertRaises(ValueError):
+            dtype_policy.resolve_dtypes('tiny')
+
+    def test_open_mfradial_compact(self):
+        """Stacked files follow the dtype policy, eagerly or lazily."""
+
+        paths = [self.codar_test_fp, self.codar_test_fp]
+        ds = multifile.open_mfradial(paths, "time", "seconds since 1970-01-01 00:00:00", True, dtypes={'VELO': 'float32', 'VFLG': 'int8'})
+        self.assertEqual(ds['VELO'].dtype, np.float32)
+        self.assertEqual(ds['VFLG'].dtype, np.int8)
+        self.assertEqual(ds['VFLG'].attrs['_FillValue'], -127)
+        self.assertEqual(ds['HEAD'].dtype, np.float64)
+
+        try:
+            import dask
+        except ImportError:
+            return
+        lazy_ds = multifile.open_mfradial(paths, "time", "seconds since 1970-01-01 00:00:00", True, chunks=1, dtypes={'VELO': 'float32', 'VFLG': 'int8'})
+        self.assertEqual(lazy_ds['VFLG'].dtype, np.int8)
+        self.assertTrue(lazy_ds.compute().identical(ds))
+
+if __name__ == "__main__":
+    unittest.main()
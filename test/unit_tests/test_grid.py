@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import datetime
+import numpy as np
+import pandas as pd
+import unittest
+import xradial.grid as grid
+
+class TestGrid(unittest.TestCase):
+
+    def setUp(self):
+        grid.clear_cache()
+
+    def test_range_bearing_template(self):
+        """Templates must match the grid built from the observed min/max
+        ranges and bearings, whatever part of the grid was observed."""
+
+        angular_res = 5.0
+        rres_km = 5.8249
+        rres_precision = 4
+        max_range = 443.1641923332595
+
+        for bmin, bmax, rmin, rmax in [(4., 359., 5.8249, 285.4201), (54., 204., 23.2996, 116.498), (19., 19., 11.6498, 11.6498)]:
+            all_ranges = np.unique(np.concatenate((
+                (np.arange(rmin, 0, -rres_km)[1:][::-1]),
+                (np.arange(rmin, rmax, rres_km)),
+                (np.arange(rmax, max_range+0.01, rres_km))
+            )).round(decimals=rres_precision))
+            all_bearings = np.unique(np.concatenate((
+                (np.arange(bmin, 0, -angular_res)[1:][::-1]),
+                (np.arange(bmin, bmax, angular_res)),
+                (np.arange(bmax, 360.1, angular_res))
+            )))
+
+            template = grid.range_bearing_template(bmin, angular_res, rmin, rres_km, rres_precision, max_range)
+            bearings, ranges = template.axes
+            self.assertTrue(np.array_equal(bearings, all_bearings))
+            self.assertTrue(np.array_equal(ranges, all_ranges))
+
+        # all three configurations share the same lattice, so one template
+        info = grid.get_template.cache_info()
+        self.assertEqual((info.misses, info.hits), (1, 2))
+
+        # cached arrays are shared and must not be modified
+        with self.assertRaises(ValueError):
+            template.axes[0][0] = 0.
+
+    def test_bearing_zero(self):
+        """Bearings start at the first positive bearing of the lattice, or at
+        0 if a bearing of 0 was observed, as the grid built from the observed
+        bearings does."""
+
+        angular_res = 5.0
+        for bmin in (0., 4., 5., 10., 355.):
+            all_bearings = np.unique(np.concatenate((
+                (np.arange(bmin, 0, -angular_res)[1:][::-1]),
+                (np.arange(bmin, 360.1, angular_res)),
+            )))
+
+            template = grid.range_bearing_template(bmin, angular_res, 5.8249, 5.8249, 4, 443.1641923332595)
+            bearings, _ = template.axes
+            self.assertTrue(np.array_equal(bearings, all_bearings))
+            self.assertEqual(bearings[0], 0. if bmin == 0 else angular_res if bmin % angular_res == 0 else 4.)
+
+    def test_product_index(self):
+        """The index built from cached codes must equal a fresh cartesian
+        product."""
+
+        template = grid.range_bearing_template(4., 5., 5.8249, 5.8249, 4, 60.)
+        dt = datetime.datetime(2018, 2, 14, 0, 0, 0)
+        names = ['time', 'BEAR', 'RNGE']
+
+        index = grid.product_index(template, dt, names)
+        correct_index = pd.MultiIndex.from_product([np.array([dt]), *template.axes], names=names)
+
+        self.assertTrue(index.equals(correct_index))
+        self.assertEqual(index.names, correct_index.names)
+
+if __name__ == "__main__":
+    unittest.main()
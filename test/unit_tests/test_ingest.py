@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import tempfile
+import unittest
+import xarray as xr
+import xradial.ingest as ingest
+import xradial.netcdf as netcdf
+import xradial.xradial as xradial
+
+class PidSink(object):
+    """Sink returning the id of the process it ran in."""
+
+    def __call__(self, path, ds):
+        return os.getpid()
+
+class TestIngest(unittest.TestCase):
+
+    def setUp(self):
+
+        # set test paths up
+        test_root = os.path.dirname(os.path.dirname(__file__))
+        self.codar_test_fp = os.path.join(
+            test_root,
+            "data/codar_ascii/RDL_m_Rutgers_AMAG_2018_02_14_0000.hfrss10lluv"
+        )
+
+        self.wera_test_fp = os.path.join(
+            test_root,
+            "data/wera_ascii/RDL_SC_GTN_2018_02_14_0023.hfrweralluv1.0"
+        )
+
+        self.tmp_dir = tempfile.mkdtemp()
+        self.feed = os.path.join(self.tmp_dir, "feed")
+        os.makedirs(self.feed)
+        self.state_path = os.path.join(self.tmp_dir, "state.sqlite")
+        self.sink = netcdf.NetCDFSink(os.path.join(self.tmp_dir, "out"))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def ingest(self):
+        return ingest.ingest_directory(
+            self.feed, self.state_path, self.sink, "time", "seconds since 1970-01-01 00:00:00", True
+        )
+
+    def test_ingest_directory(self):
+        """Only new or changed files are converted, and touched but identical
+        files are skipped."""
+
+        codar_fp = shutil.copy(self.codar_test_fp, self.feed)
+        results = self.ingest()
+        self.assertEqual([(r.path, r.error) for r in results], [(codar_fp, None)])
+
+        correct_ds = xradial.create_xarray_dataset(self.codar_test_fp, "time", "seconds since 1970-01-01 00:00:00", True)
+        with xr.open_dataset(results[0].output) as ds:
+            self.assertTrue(ds['VELO'].equals(correct_ds['VELO']))
+
+        self.assertEqual(self.ingest(), [])
+
+        wera_fp = shutil.copy(self.wera_test_fp, self.feed)
+        os.utime(codar_fp, (0, 0))
+        self.assertEqual([r.path for r in self.ingest()], [wera_fp])
+
+        with open(codar_fp, 'a') as f:
+            f.write('%End:\n')
+        self.assertEqual([r.path for r in self.ingest()], [codar_fp])
+
+    def test_ingest_failures(self):
+        """Files which fail to convert are reported and retried next run."""
+
+        bad_fp = os.path.join(self.feed, "RDL_bad.hfrss10lluv")
+        with open(bad_fp, 'w') as f:
+            f.write('%CTF: 1.00\n')
+
+        for _ in range(2):
+            results = self.ingest()
+            self.assertEqual(len(results), 1)
+            self.assertIsNone(results[0].output)
+            self.assertIsNotNone(results[0].error)
+
+    def test_ingest_workers(self):
+        """With worker processes, the sink runs in the workers and its
+        outputs are recorded in the state store."""
+
+        shutil.copy(self.codar_test_fp, self.feed)
+        shutil.copy(self.wera_test_fp, self.feed)
+        results = ingest.ingest_directory(
+            self.feed, self.state_path, PidSink(), "time", "seconds since 1970-01-01 00:00:00", True, workers=2
+        )
+        self.assertEqual(len(results), 2)
+        self.assertTrue(all(r.error is None and r.output != os.getpid() for r in results))
+
+        with ingest.connect(self.state_path) as conn:
+            outputs = [output for (output,) in conn.execute("SELECT output FROM ingested ORDER BY path")]
+        self.assertEqual(sorted(outputs), sorted(str(r.output) for r in results))
+
+if __name__ == "__main__":
+    unittest.main()
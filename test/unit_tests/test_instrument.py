@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import logging
+import os
+import pathlib
+import threading
+import tracemalloc
+import unittest
+import xradial.instrument as instrument
+import xradial.xradial as xradial
+
+class TestInstrument(unittest.TestCase):
+
+    def setUp(self):
+
+        # set test paths up
+        test_root = os.path.dirname(os.path.dirname(__file__))
+        self.codar_test_fp = os.path.join(
+            test_root,
+            "data/codar_ascii/RDL_m_Rutgers_AMAG_2018_02_14_0000.hfrss10lluv"
+        )
+
+    def convert(self, **kwargs):
+        return xradial.create_xarray_dataset(
+            self.codar_test_fp,
+            "time",
+            "seconds since 1970-01-01 00:00:00",
+            True,
+            **kwargs
+        )
+
+    def test_stages(self):
+        """Both engines report the same stages, with their counts."""
+
+        for engine in ('numpy', 'pandas'):
+            events = []
+            with instrument.listening(events.append):
+                ds = self.convert(engine=engine)
+
+            self.assertEqual(
+                [e.stage for e in events],
+                ['read', 'header', 'table', 'reindex', 'dataset', 'attributes'],
+            )
+            self.assertTrue(all(e.path == self.codar_test_fp for e in events))
+            self.assertTrue(all(e.seconds >= 0 for e in events))
+            self.assertTrue(all(e.peak_bytes is None for e in events))
+
+            by_stage = {e.stage: e for e in events}
+            self.assertEqual(by_stage['read'].bytes_read, os.path.getsize(self.codar_test_fp))
+            self.assertEqual(by_stage['table'].rows, ds.attrs['TableRows'])
+            self.assertEqual(by_stage['reindex'].cells, ds['BEAR'].size * ds['RNGE'].size)
+            self.assertEqual(by_stage['dataset'].cells, by_stage['reindex'].cells * 16)
+
+        # paths keep their directory, whatever their type
+        named = []
+        with instrument.listening(named.append):
+            xradial.create_xarray_dataset(pathlib.Path(self.codar_test_fp), "time", "seconds since 1970-01-01 00:00:00", True)
+            with open(self.codar_test_fp, 'rb') as f:
+                xradial.create_xarray_dataset(f, "time", "seconds since 1970-01-01 00:00:00", True)
+        self.assertEqual(len(named), 12)
+        self.assertTrue(all(e.path == self.codar_test_fp for e in named))
+
+        # detached on leaving the block
+        self.convert()
+        self.assertEqual(len(events), 6)
+
+    def test_memory(self):
+        """Peak memory is taken only when a listener asks for it."""
+
+        events = []
+        with instrument.listening(events.append, memory=True):
+            self.convert()
+        self.assertTrue(all(e.peak_bytes > 0 for e in events))
+        self.assertEqual(instrument._listeners, [])
+
+    def test_memory_threads(self):
+        """Stages of several threads taking memory at once don't stop
+        tracemalloc under each other."""
+
+        events = []
+        entered = threading.Barrier(2)
+        first_done = threading.Event()
+
+        def first():
+            with instrument.stage('first'):
+                entered.wait()
+            first_done.set()
+
+        def second():
+            with instrument.stage('second'):
+                entered.wait()
+                first_done.wait()
+                data = bytearray(1 << 20)
+                del data
+
+        with instrument.listening(events.append, memory=True):
+            threads = [threading.Thread(target=first), threading.Thread(target=second)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+        peaks = {e.stage: e.peak_bytes for e in events}
+        self.assertGreaterEqual(peaks['first'], 0)
+        self.assertGreater(peaks['second'], 1 << 19)
+        self.assertFalse(tracemalloc.is_tracing())
+        self.assertEqual(instrument._tracing_stages, 0)
+
+    def test_no_listener(self):
+        """Without a listener, stages are shared no-ops."""
+
+        self.assertIs(instrument.stage('table'), instrument.stage('dataset'))
+        with instrument.stage('table') as stage:
+            stage.rows = 10
+
+    def test_failing_listener(self):
+        """A listener which fails doesn't stop the conversion, nor the other
+        listeners."""
+
+        events = []
+
+        def fail(event):
+            raise RuntimeError("sink down")
+
+        with instrument.listening(fail), instrument.listening(events.append):
+            with self.assertLogs('xradial.instrument', logging.ERROR):
+                self.convert()
+        self.assertEqual(len(events), 6)
+
+    def test_adapters(self):
+        """The stock adapters send each stage to logging and a metrics sink."""
+
+        metrics = []
+        listener = instrument.MetricsListener(lambda *metric: metrics.append(metric), prefix='hfr')
+        with instrument.listening(listener):
+            with self.assertLogs('xradial.test', logging.DEBUG) as logs:
+                with instrument.listening(instrument.LoggingListener(logging.getLogger('xradial.test'), logging.DEBUG)):
+                    self.convert()
+
+        self.assertEqual(len(logs.records), 6)
+        self.assertIn('rows=672', logs.output[2])
+
+        names = [name for name, _, _ in metrics]
+        self.assertIn('hfr.read.bytes_read', names)
+        self.assertIn('hfr.table.rows', names)
+        self.assertIn('hfr.dataset.seconds', names)
+        self.assertNotIn('hfr.header.rows', names)
+        self.assertEqual(metrics[0][2], {'path': self.codar_test_fp})
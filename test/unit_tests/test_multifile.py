@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import io
+import os
+import shutil
+import tempfile
+import numpy as np
+import unittest
+from unittest import mock
+import xradial.multifile as multifile
+import xradial.xradial as xradial
+
+class TestMultifile(unittest.TestCase):
+
+    def setUp(self):
+
+        # set test paths up
+        test_root = os.path.dirname(os.path.dirname(__file__))
+        self.codar_test_fp = os.path.join(
+            test_root,
+            "data/codar_ascii/RDL_m_Rutgers_AMAG_2018_02_14_0000.hfrss10lluv"
+        )
+
+        self.wera_test_fp = os.path.join(
+            test_root,
+            "data/wera_ascii/RDL_SC_GTN_2018_02_14_0023.hfrweralluv1.0"
+        )
+
+        # a second CODAR file an hour later, covering only part of the grid
+        self.tmp_dir = tempfile.mkdtemp()
+        self.codar_later_fp = os.path.join(self.tmp_dir, "RDL_m_Rutgers_AMAG_2018_02_14_0100.hfrss10lluv")
+        with open(self.codar_test_fp) as f, open(self.codar_later_fp, 'w') as out:
+            for line in f:
+                if line.startswith('%TimeStamp:'):
+                    line = '%TimeStamp: 2018 02 14  01 00 00\n'
+                elif not line.startswith('%') and float(line.split()[14]) < 100:
+                    continue
+                out.write(line)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_open_mfradial_single(self):
+        """A single file gives the same Dataset as create_xarray_dataset."""
+
+        for fp in (self.codar_test_fp, self.wera_test_fp):
+            ds = multifile.open_mfradial([fp], "time", "seconds since 1970-01-01 00:00:00", True)
+            correct_ds = xradial.create_xarray_dataset(fp, "time", "seconds since 1970-01-01 00:00:00", True)
+            self.assertTrue(ds.identical(correct_ds))
+
+    def test_open_mfradial(self):
+        """Each time slice holds the data of its file on the union grid, and
+        differing header values are kept per time."""
+
+        paths = [self.codar_test_fp, self.codar_later_fp]
+        ds = multifile.open_mfradial(paths, "time", "seconds since 1970-01-01 00:00:00", True)
+
+        self.assertEqual(ds['VELO'].dims, ("time", "BEAR", "RNGE"))
+        self.assertEqual(ds.dims["time"], 2)
+        self.assertEqual(ds.attrs['Site'], 'AMAG ""')
+        self.assertNotIn('TimeStamp', ds.attrs)
+        self.assertEqual(
+            list(ds[multifile.HEADER_VAR_PREFIX + 'TimeStamp'].values),
+            ['2018 02 14  00 00 00', '2018 02 14  01 00 00']
+        )
+        self.assertEqual(ds['OLAT'].dims, ("time",))
+
+        for k, fp in enumerate(paths):
+            single = xradial.create_xarray_dataset(fp, "time", "seconds since 1970-01-01 00:00:00", True)
+            single = single.reindex(BEAR=ds['BEAR'], RNGE=ds['RNGE'])
+            for name in ('VELO', 'HEAD', 'LATD', 'LOND', 'VFLG'):
+                self.assertTrue(np.array_equal(ds[name][k], single[name][0], equal_nan=True))
+
+        self.assertTrue(np.isnan(ds['VELO'][1].sel(BEAR=slice(0, 99))).all())
+
+        with self.assertRaises(ValueError):
+            multifile.open_mfradial([self.codar_test_fp, self.wera_test_fp], "time", "seconds since 1970-01-01 00:00:00", True)
+
+    def test_open_mfradial_lazy(self):
+        """Lazily opened files compute to the eager Dataset, and computing a
+        time slice only parses the files in its chunk."""
+
+        try:
+            import dask
+        except ImportError:
+            self.skipTest("dask is not installed")
+
+        paths = [self.codar_test_fp, self.codar_later_fp, self.codar_later_fp]
+        with mock.patch.object(multifile, 'read_frame', wraps=multifile.read_frame) as read_frame:
+            ds = multifile.open_mfradial(paths, "time", "seconds since 1970-01-01 00:00:00", True, chunks={"time": 2})
+            self.assertEqual(read_frame.call_count, 1) # one file per site configuration
+
+            self.assertEqual(ds['VELO'].chunks[0], (2, 1))
+            ds['VELO'].isel(time=2).compute()
+            self.assertEqual(read_frame.call_count, 2)
+
+        correct_ds = multifile.open_mfradial(paths, "time", "seconds since 1970-01-01 00:00:00", True)
+        self.assertTrue(ds.compute().identical(correct_ds))
+
+        # lat/lon slots cover the whole extent, so all rows find a cell
+        ds = multifile.open_mfradial([self.wera_test_fp], "time", "seconds since 1970-01-01 00:00:00", True, chunks=1)
+        self.assertEqual(int(ds['VELO'].count()), ds.attrs['TableRows'])
+
+    def test_open_mfradial_in_memory(self):
+        """Streams and bytes stack as their files do, lazily too."""
+
+        paths = [self.codar_test_fp, self.codar_later_fp]
+        correct_ds = multifile.open_mfradial(paths, "time", "seconds since 1970-01-01 00:00:00", True)
+
+        def sources():
+            with open(paths[0], 'rb') as f:
+                yield io.BytesIO(f.read())
+            with open(paths[1], 'rb') as f:
+                yield f.read()
+
+        ds = multifile.open_mfradial(sources(), "time", "seconds since 1970-01-01 00:00:00", True)
+        self.assertTrue(ds.identical(correct_ds))
+
+        try:
+            import dask
+        except ImportError:
+            return
+        ds = multifile.open_mfradial(sources(), "time", "seconds since 1970-01-01 00:00:00", True, chunks=1)
+        self.assertTrue(ds.compute().identical(correct_ds))
+
+if __name__ == "__main__":
+    unittest.main()
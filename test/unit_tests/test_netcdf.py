@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import tempfile
+import numpy as np
+import xarray as xr
+import unittest
+import xradial.netcdf as netcdf
+import xradial.xradial as xrad
+
+class TestNetCDF(unittest.TestCase):
+
+    def setUp(self):
+
+        # set test paths up
+        test_root = os.path.dirname(os.path.dirname(__file__))
+        self.codar_test_fp = os.path.join(
+            test_root,
+            "data/codar_ascii/RDL_m_Rutgers_AMAG_2018_02_14_0000.hfrss10lluv"
+        )
+
+        self.wera_test_fp = os.path.join(
+            test_root,
+            "data/wera_ascii/RDL_SC_GTN_2018_02_14_0023.hfrweralluv1.0"
+        )
+
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_presets(self):
+        """Lossless presets read back identical values, 'packed' velocities
+        within half their scale factor; compressed files are smaller and
+        chunked by radial map."""
+
+        for fp in (self.codar_test_fp, self.wera_test_fp):
+            ds = xrad.create_xarray_dataset(fp, "time", "seconds since 1970-01-01", True)
+            sizes = {}
+            for preset in ('none', 'zlib', 'packed'):
+                path = netcdf.write_netcdf(ds, os.path.join(self.tmp, preset + '.nc'), "time", preset)
+                sizes[preset] = os.path.getsize(path)
+
+                with xr.open_dataset(path) as nc_ds:
+                    self.assertTrue(np.array_equal(nc_ds["time"].values, ds["time"].values))
+                    self.assertEqual(nc_ds["time"].encoding["dtype"], np.float64)
+                    for name, variable in ds.data_vars.items():
+                        if variable.dtype.kind != 'f':
+                            continue
+                        if preset == 'packed' and name in netcdf.PACKED_VARIABLES:
+                            np.testing.assert_allclose(nc_ds[name].values, variable.values, atol=0.005 + 1e-6)
+                        elif preset == 'packed':
+                            np.testing.assert_allclose(nc_ds[name].values, variable.values, rtol=1e-6)
+                        else:
+                            np.testing.assert_array_equal(nc_ds[name].values, variable.values)
+
+                    if preset != 'none':
+                        self.assertEqual(nc_ds["VELU"].encoding["chunksizes"], (1,) + ds["VELU"].shape[1:])
+                        self.assertTrue(nc_ds["VELU"].encoding["zlib"])
+
+            self.assertLess(sizes['zlib'], sizes['none'])
+            self.assertLess(sizes['packed'], sizes['zlib'])
+            self.assertFalse(os.path.exists(path + '.part'))
+
+        # velocities beyond int16 at the scale factor are not packed
+        ds["VELU"][:] = 400.0
+        encoding = netcdf.netcdf_encoding(ds, "time", 'packed')
+        self.assertEqual(encoding["VELU"]["dtype"], np.float32)
+        self.assertEqual(encoding["VELV"]["dtype"], np.int16)
+
+        with self.assertRaises(ValueError):
+            netcdf.netcdf_encoding(ds, "time", 'lzma')
+
+    def test_convert_to_netcdf(self):
+        """Files are converted and written in the workers, with their NetCDF
+        paths in the results and errors reported per file."""
+
+        paths = [self.codar_test_fp, os.path.join(self.tmp, 'missing.hfrss10lluv'), self.wera_test_fp]
+        for workers in (1, 2):
+            output_dir = os.path.join(self.tmp, 'out{}'.format(workers))
+            results = list(netcdf.convert_to_netcdf(
+                paths, output_dir, "time", "seconds since 1970-01-01", True, preset='packed', workers=workers,
+            ))
+
+            self.assertEqual([r.index for r in results], [0, 1, 2])
+            self.assertIsInstance(results[1].error, Exception)
+            for r in (results[0], results[2]):
+                self.assertIsNone(r.error)
+                self.assertIsNone(r.dataset)
+                self.assertEqual(r.output, os.path.join(output_dir, os.path.basename(r.path) + '.nc'))
+                with xr.open_dataset(r.output) as nc_ds:
+                    self.assertEqual(nc_ds["VELU"].encoding["dtype"], np.int16)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import io
+import os
+import pandas as pd
+import unittest
+import xradial.parser as parser
+import xradial.reader as reader
+
+class TestParser(unittest.TestCase):
+
+    def setUp(self):
+
+        # set test paths up
+        test_root = os.path.dirname(os.path.dirname(__file__))
+        self.codar_test_fp = os.path.join(
+            test_root,
+            "data/codar_ascii/RDL_m_Rutgers_AMAG_2018_02_14_0000.hfrss10lluv"
+        )
+
+        self.wera_test_fp = os.path.join(
+            test_root,
+            "data/wera_ascii/RDL_SC_GTN_2018_02_14_0023.hfrweralluv1.0"
+        )
+
+    def assertMatchesReadCsv(self, buf, names):
+        columns = parser.parse_fixed_width(buf, names)
+        self.assertIsNotNone(columns)
+
+        df = pd.DataFrame(columns)
+        correct_df = pd.read_csv(io.BytesIO(buf), header=None, sep=r'\s+', names=names)
+        self.assertTrue(df.equals(correct_df))
+        self.assertTrue((df.dtypes == correct_df.dtypes).all())
+
+    def test_parse_fixed_width(self):
+        """Fixed-width tables parse to the same values and types as with
+        pandas.read_csv."""
+
+        for fp in (self.codar_test_fp, self.wera_test_fp):
+            metadata, table = reader.read_radial(fp, True)
+            self.assertMatchesReadCsv(table.getvalue(), metadata['TableColumnTypes'].split())
+
+        buf = (
+            b"  -71.9856514   +4.50   12  -143.   -0.000\r\n"
+            b"    1.0000001  -10.25    0     7.    0.125\r\n"
+            b"   -0.9999999    0.00   -3   -15.  -12.500\r\n"
+        )
+        self.assertMatchesReadCsv(buf, ['A', 'B', 'C', 'D', 'E'])
+
+    def test_parse_fixed_width_fallback(self):
+        """Tables which are not in fixed-width columns are left to pandas."""
+
+        for buf, names in (
+            (b" 1.0 2.0\n 3.0  4.0\n", ['A', 'B']), # ragged rows
+            (b" 1.0  nan\n 3.0  4.0\n", ['A', 'B']), # missing value
+            (b" 1.0 2e3\n 3.0 4e3\n", ['A', 'B']), # exponent
+            (b" 1.00 2.0\n 3.0  4.0\n", ['A', 'B']), # decimal point moves
+            (b" 1.0 2-0\n 3.0 4.0\n", ['A', 'B']), # sign inside a number
+            (b" 1.0 2.0\n", ['A', 'B', 'C']), # too few columns
+            (b"", ['A', 'B']),
+        ):
+            self.assertIsNone(parser.parse_fixed_width(buf, names))
+
+if __name__ == "__main__":
+    unittest.main()
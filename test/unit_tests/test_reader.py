@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import gzip
+import io
+import mmap
+import os
+import tempfile
+import pandas as pd
+import numpy as np
+import unittest
+import xradial.reader as reader
+import xradial.utils as utils
+import xradial.xradial as xradial
+
+class TestReader(unittest.TestCase):
+
+    def setUp(self):
+
+        # set test paths up
+        test_root = os.path.dirname(os.path.dirname(__file__))
+        self.codar_test_fp = os.path.join(
+            test_root,
+            "data/codar_ascii/RDL_m_Rutgers_AMAG_2018_02_14_0000.hfrss10lluv"
+        )
+
+        self.wera_test_fp = os.path.join(
+            test_root,
+            "data/wera_ascii/RDL_SC_GTN_2018_02_14_0023.hfrweralluv1.0"
+        )
+
+    def test_split_sections(self):
+        """The header ends at the first table row and the table ends at the
+        first comment line following it."""
+
+        buf = b"%A: 1\n%TableStart:\n%% units\n 1 2\n 3 4\n%TableEnd:\n%End:\n"
+        header, table, footer = reader.split_sections(buf)
+
+        self.assertEqual(header, b"%A: 1\n%TableStart:\n%% units\n")
+        self.assertEqual(table, b" 1 2\n 3 4\n")
+        self.assertEqual(footer, b"%TableEnd:\n%End:\n")
+
+        # no table rows; everything is header, as with get_metadata_from_file
+        header, table, footer = reader.split_sections(b"%A: 1\n%B: 2\n")
+        self.assertEqual((header, table, footer), (b"%A: 1\n%B: 2\n", b'', b''))
+
+    def test_read_radial(self):
+        """Metadata and table rows read in one pass must match the two-pass
+        result of get_metadata_from_file and pandas.read_csv."""
+
+        for fp in (self.codar_test_fp, self.wera_test_fp):
+            for numeric in (False, True):
+                metadata, table = reader.read_radial(fp, numeric)
+                correct_metadata = utils.get_metadata_from_file(fp, numeric)
+
+                self.assertEqual(list(metadata), list(correct_metadata))
+                for k, v in correct_metadata.items():
+                    if isinstance(v, float) and np.isnan(v):
+                        self.assertTrue(np.isnan(metadata[k]))
+                    else:
+                        self.assertEqual(metadata[k], v)
+                        self.assertEqual(type(metadata[k]), type(v))
+
+            names = metadata['TableColumnTypes'].split()
+            df = pd.read_csv(table, header=None, sep=r'\s+', names=names)
+            correct_df = pd.read_csv(
+                fp,
+                header=None,
+                sep=r'\s+',
+                comment='%',
+                encoding='ascii',
+                names=names
+            )
+            self.assertTrue(df.equals(correct_df))
+            self.assertEqual(df.shape[0], metadata['TableRows'])
+
+    def test_map_file(self):
+        """Plain files are mapped; compressed files, empty files and
+        file-like objects are read instead."""
+
+        with open(self.codar_test_fp, 'rb') as f:
+            contents = f.read()
+
+        with reader.map_file(self.codar_test_fp) as buf:
+            self.assertIsInstance(buf, mmap.mmap)
+            self.assertEqual(buf[:], contents)
+        self.assertTrue(buf.closed)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            gz_path = os.path.join(tmp, 'radial.gz')
+            with gzip.open(gz_path, 'wb') as f:
+                f.write(contents)
+            empty_path = os.path.join(tmp, 'empty')
+            open(empty_path, 'wb').close()
+
+            for source, expected in (
+                (gz_path, contents),
+                (empty_path, b''),
+                (io.BytesIO(contents), contents),
+            ):
+                with reader.map_file(source) as buf:
+                    self.assertEqual(buf, expected)
+
+    def test_open_radial(self):
+        """A memory-mapped file gives the metadata and table rows of
+        read_radial, as views of the mapping, and the same Dataset."""
+
+        for fp in (self.codar_test_fp, self.wera_test_fp):
+            metadata, table = reader.read_radial(fp, True)
+
+            with reader.open_radial(fp, True, use_mmap=True) as (mapped_metadata, mapped_table):
+                self.assertEqual(repr(mapped_metadata), repr(metadata)) # NaN != NaN
+                self.assertIsInstance(mapped_table, memoryview)
+                self.assertEqual(mapped_table.tobytes(), table.getvalue())
+
+            # views are released on leaving the block
+            with self.assertRaises(ValueError):
+                mapped_table.tobytes()
+
+            with reader.open_radial(fp, True) as (buffered_metadata, buffered_table):
+                self.assertEqual(repr(buffered_metadata), repr(metadata))
+                self.assertEqual(buffered_table.getvalue(), table.getvalue())
+
+            ds = xradial.create_xarray_dataset(fp, "time", "seconds since 1970-01-01", True, mmap=True)
+            self.assertTrue(ds.identical(xradial.create_xarray_dataset(fp, "time", "seconds since 1970-01-01", True)))
+
+    def test_in_memory(self):
+        """Contents of a file as bytes, bytearray, memoryview or a binary
+        stream, compressed or not, convert as the file does."""
+
+        for fp in (self.codar_test_fp, self.wera_test_fp):
+            with open(fp, 'rb') as f:
+                contents = f.read()
+            correct_ds = xradial.create_xarray_dataset(fp, "time", "seconds since 1970-01-01", True)
+
+            for source in (
+                lambda: contents,
+                lambda: bytearray(contents),
+                lambda: memoryview(contents),
+                lambda: io.BytesIO(contents),
+                lambda: gzip.compress(contents),
+            ):
+                self.assertEqual(
+                    utils.get_metadata_from_file(source())['TimeStamp'],
+                    utils.get_metadata_from_file(fp)['TimeStamp'],
+                )
+                for use_mmap in (False, True):
+                    ds = xradial.create_xarray_dataset(source(), "time", "seconds since 1970-01-01", True, mmap=use_mmap)
+                    self.assertTrue(ds.identical(correct_ds))
+
+        # uncompressed contents are used without a copy
+        self.assertIs(reader.read_bytes(contents), contents)
+        stream = io.BytesIO(contents)
+        self.assertEqual(reader.reusable(stream), contents)
+        self.assertIs(reader.reusable(fp), fp)
+
+    def test_split_views(self):
+        """Memoryviews and mappings are split into views, not copies."""
+
+        buf = b"%A: 1\n%TableStart:\n 1 2\n 3 4\n%TableEnd:\n"
+        header, table, footer = reader.split_sections(memoryview(buf))
+        self.assertIsInstance(table, memoryview)
+        self.assertEqual(
+            (header.tobytes(), table.tobytes(), footer.tobytes()),
+            (b"%A: 1\n%TableStart:\n", b" 1 2\n 3 4\n", b"%TableEnd:\n"),
+        )
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import collections
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+import xradial.remote as remote
+import xradial.xradial as xrad
+
+Attributes = collections.namedtuple('Attributes', ['filename', 'st_mode', 'st_size', 'st_mtime'])
+
+class LocalSFTP(object):
+    """Stand-in for an SFTP client serving a local directory as the root of
+    the remote host."""
+
+    def __init__(self, root, server):
+        self.root = root
+        self.server = server
+        self.closed = False
+
+    def _local(self, path):
+        return os.path.join(self.root, path.lstrip('/'))
+
+    def listdir_attr(self, path):
+        self.server.requests += 1
+        if self.server.broken:
+            self.server.broken = False
+            raise EOFError("connection lost")
+        return [
+            Attributes(name, st.st_mode, st.st_size, st.st_mtime)
+            for name, st in (
+                (name, os.stat(os.path.join(self._local(path), name)))
+                for name in os.listdir(self._local(path))
+            )
+        ]
+
+    def open(self, path, mode='r'):
+        self.server.requests += 1
+        return open(self._local(path), mode)
+
+    def close(self):
+        self.closed = True
+
+class LocalServer(object):
+    """Connector opening LocalSFTP sessions, recording what was opened."""
+
+    def __init__(self, root):
+        self.root = root
+        self.sessions = []
+        self.hosts = []
+        self.requests = 0
+        self.broken = False
+        self._lock = threading.Lock()
+
+    def __call__(self, host, port, username):
+        with self._lock:
+            self.hosts.append((host, port, username))
+            self.sessions.append(LocalSFTP(self.root, self))
+            return self.sessions[-1]
+
+class TestRemote(unittest.TestCase):
+
+    def setUp(self):
+
+        # set test paths up
+        test_root = os.path.dirname(os.path.dirname(__file__))
+        self.codar_test_fp = os.path.join(
+            test_root,
+            "data/codar_ascii/RDL_m_Rutgers_AMAG_2018_02_14_0000.hfrss10lluv"
+        )
+
+        self.wera_test_fp = os.path.join(
+            test_root,
+            "data/wera_ascii/RDL_SC_GTN_2018_02_14_0023.hfrweralluv1.0"
+        )
+
+        # remote host with a directory per site
+        self.root = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.root, 'AMAG', 'sub'))
+        os.makedirs(os.path.join(self.root, 'GTN'))
+        for i in range(3):
+            shutil.copy(self.codar_test_fp, os.path.join(self.root, 'AMAG', 'RDL_{}.hfrss10lluv'.format(i)))
+        shutil.copy(self.wera_test_fp, os.path.join(self.root, 'GTN', os.path.basename(self.wera_test_fp)))
+        open(os.path.join(self.root, 'AMAG', 'notes.txt'), 'w').close()
+        self.server = LocalServer(self.root)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_pool(self):
+        """Sessions are reused, at most `size` are open, and broken sessions
+        are closed rather than reused."""
+
+        pools = remote.SFTPPools(self.server, size=2)
+        pool = pools.pool('sftp://radar@site.example:2222/AMAG')
+        self.assertIs(pools.pool('sftp://radar@site.example:2222/GTN'), pool)
+        self.assertIsNot(pools.pool('sftp://other.example/GTN'), pool)
+
+        self.assertEqual(pool.listdir('/AMAG'), ['/AMAG/RDL_{}.hfrss10lluv'.format(i) for i in range(3)])
+        for path in pool.listdir('/AMAG'):
+            pool.read(path)
+        self.assertEqual(pool.connections, 1)
+        self.assertEqual(self.server.hosts, [('site.example', 2222, 'radar')])
+
+        with pool.session() as first, pool.session() as second:
+            self.assertIsNot(first, second)
+        self.assertEqual(pool.connections, 2)
+
+        # a missing file leaves the session usable, a lost connection doesn't
+        with self.assertRaises(FileNotFoundError):
+            pool.read('/AMAG/missing.hfrss10lluv')
+        self.assertFalse(any(s.closed for s in self.server.sessions))
+
+        self.server.broken = True
+        with self.assertRaises(EOFError):
+            pool.listdir('/AMAG')
+        self.assertEqual(sum(s.closed for s in self.server.sessions), 1)
+
+        pools.close()
+        self.assertTrue(all(s.closed for s in self.server.sessions))
+
+        with self.assertRaises(ValueError):
+            pools.pool('/AMAG')
+
+    def test_fetch_and_convert(self):
+        """Remote files convert as the local files do, in listing order, with
+        failed fetches reported in place."""
+
+        correct = {
+            'AMAG': xrad.create_xarray_dataset(self.codar_test_fp, "time", "seconds since 1970-01-01", True),
+            'GTN': xrad.create_xarray_dataset(self.wera_test_fp, "time", "seconds since 1970-01-01", True),
+        }
+
+        locations = ['sftp://site.example/AMAG', 'sftp://site.example/missing', 'sftp://site.example/GTN']
+        for workers in (1, 2):
+            with remote.SFTPPools(self.server, size=2) as pools:
+                results = list(remote.fetch_and_convert(
+                    pools, locations, "time", "seconds since 1970-01-01", True, readahead=1, workers=workers,
+                ))
+
+            self.assertEqual([r.index for r in results], list(range(5)))
+            self.assertEqual([r.path for r in results], [
+                'sftp://site.example/AMAG/RDL_0.hfrss10lluv',
+                'sftp://site.example/AMAG/RDL_1.hfrss10lluv',
+                'sftp://site.example/AMAG/RDL_2.hfrss10lluv',
+                'sftp://site.example/missing',
+                'sftp://site.example/GTN/' + os.path.basename(self.wera_test_fp),
+            ])
+            self.assertIsInstance(results[3].error, FileNotFoundError)
+            for r in results[:3] + results[4:]:
+                self.assertIsNone(r.error)
+                self.assertTrue(r.dataset.identical(correct[r.path.split('/')[3]]))
+
+        # at most two sessions per run, closed with the pools
+        self.assertLessEqual(len(self.server.sessions), 4)
+        self.assertTrue(all(s.closed for s in self.server.sessions))
+
+if __name__ == "__main__":
+    unittest.main()
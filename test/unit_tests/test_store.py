@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import datetime
+import io
+import os
+import shutil
+import tempfile
+import numpy as np
+import xarray as xr
+import unittest
+from unittest import mock
+import xradial.store as store
+import xradial.synthetic as synthetic
+import xradial.xradial as xrad
+
+class TestStore(unittest.TestCase):
+
+    def setUp(self):
+
+        try:
+            import zarr
+        except ImportError:
+            self.skipTest("zarr is not installed")
+
+        # hourly radials of one synthetic site
+        self.datasets = [
+            xrad.create_xarray_dataset(
+                io.BytesIO(synthetic.codar_lluv(datetime.datetime(2020, 1, 1, hour), seed=hour)),
+                "time",
+                "seconds since 1970-01-01",
+                True
+            )
+            for hour in range(6)
+        ]
+        self.tmp = tempfile.mkdtemp()
+        self.store_path = os.path.join(self.tmp, 'site.zarr')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_append_zarr(self):
+        """Appended radials read back as their concatenation, with times
+        already in the store skipped, backfilled times included and chunks of
+        whole grids."""
+
+        self.assertEqual(store.append_zarr(self.datasets[:2], self.store_path, "time", times_per_chunk=4), 2)
+        self.assertEqual(store.append_zarr(self.datasets[1:4], self.store_path, "time"), 2)
+        self.assertEqual(store.append_zarr(self.datasets[5], self.store_path, "time"), 1)
+        self.assertEqual(store.append_zarr(self.datasets, self.store_path, "time"), 1) # backfill hour 4
+        self.assertEqual(store.append_zarr(self.datasets, self.store_path, "time"), 0)
+
+        # the backfilled hour comes last in the store, and first on open
+        self.assertFalse(xr.open_zarr(self.store_path).indexes["time"].is_monotonic_increasing)
+        ds = store.open_zarr(self.store_path, "time").load()
+        correct_ds = xr.concat(self.datasets, "time")
+        self.assertTrue(np.array_equal(ds["time"].values, correct_ds["time"].values))
+        for name, variable in correct_ds.data_vars.items():
+            np.testing.assert_allclose(ds[name].values, variable.values, rtol=1e-6)
+
+        encoding = xr.open_zarr(self.store_path)["VELU"].encoding
+        self.assertEqual(encoding["chunks"], (4,) + correct_ds["VELU"].shape[1:])
+        self.assertEqual(encoding["dtype"], np.float32)
+
+        # a time later than a backfill but already stored is not written again
+        shutil.rmtree(self.store_path)
+        self.assertEqual(store.append_zarr([self.datasets[h] for h in (0, 1, 3)], self.store_path, "time"), 3)
+        self.assertEqual(store.append_zarr(self.datasets[2], self.store_path, "time"), 1)
+        self.assertEqual(store.append_zarr(self.datasets[3], self.store_path, "time"), 0)
+        ds = store.open_zarr(self.store_path, "time")
+        self.assertTrue(np.array_equal(ds["time"].values, correct_ds["time"].values[:4]))
+        self.assertEqual(store.append_zarr(self.datasets[4], self.store_path, "time"), 1)
+
+    def test_failed_append(self):
+        """A failed write leaves the store as it was, and the times can be
+        appended again."""
+
+        store.append_zarr(self.datasets[:2], self.store_path, "time")
+
+        with mock.patch.object(xr.Dataset, 'to_zarr', side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                store.append_zarr(self.datasets[2:4], self.store_path, "time")
+
+        ds = xr.open_zarr(self.store_path)
+        self.assertEqual(ds.sizes["time"], 2)
+        self.assertEqual(ds["VELU"].shape[0], 2)
+
+        self.assertEqual(store.append_zarr(self.datasets[2:4], self.store_path, "time"), 2)
+        ds = store.open_zarr(self.store_path, "time").load()
+        self.assertTrue(np.array_equal(ds["time"].values, xr.concat(self.datasets[:4], "time")["time"].values))
+
+    def test_grid(self):
+        """Radials on part of the grid of the store are put on it; radials
+        outside of it are rejected."""
+
+        store.append_zarr(self.datasets[0], self.store_path, "time")
+
+        part = self.datasets[1].isel(RNGE=slice(0, 10))
+        self.assertEqual(store.append_zarr(part, self.store_path, "time"), 1)
+        ds = xr.open_zarr(self.store_path).isel(time=1).load()
+        self.assertEqual(ds.sizes["RNGE"], self.datasets[0].sizes["RNGE"])
+        self.assertTrue(ds["VELU"].isel(RNGE=slice(10, None)).isnull().all())
+
+        outside = self.datasets[2].assign_coords(RNGE=self.datasets[2]["RNGE"] + 0.5)
+        with self.assertRaises(ValueError):
+            store.append_zarr(outside, self.store_path, "time")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import datetime
+import fnmatch
+import io
+import os
+import tempfile
+import unittest
+import numpy as np
+import xradial.catalog as catalog
+import xradial.parser as parser
+import xradial.reader as reader
+import xradial.synthetic as synthetic
+import xradial.tables as tables
+import xradial.utils as utils
+import xradial.xradial as xradial
+
+class TestSynthetic(unittest.TestCase):
+
+    def setUp(self):
+
+        self.time = datetime.datetime(2018, 2, 14, 1)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_fixed_width(self):
+        """Tables are laid out for the fast parser, and hold the rows their
+        header says."""
+
+        for buf, layout in (
+            (synthetic.codar_lluv(self.time, ranges=20), synthetic.CODAR_COLUMNS),
+            (synthetic.wera_lluv(self.time, lons=30, lats=30), synthetic.WERA_COLUMNS),
+        ):
+            metadata, table = reader.read_radial(io.BytesIO(buf), True)
+            names = [code for code, _, _ in layout]
+            self.assertEqual(metadata['TableColumnTypes'].split(), names)
+
+            columns = parser.parse_fixed_width(table.getvalue(), names)
+            self.assertIsNotNone(columns)
+            self.assertEqual(columns['LOND'].size, metadata['TableRows'])
+
+    def test_convert(self):
+        """Files convert with both engines to the same Dataset, on the grid
+        of their kind of site."""
+
+        for kind, dims in (('codar', ('BEAR', 'RNGE')), ('wera', ('i', 'j'))):
+            path, = synthetic.write_series(os.path.join(self.tmp.name, kind), kind, files=1, start=self.time)
+            ds = xradial.create_xarray_dataset(path, "time", "seconds since 1970-01-01", True)
+            self.assertTrue(ds.identical(xradial.create_xarray_dataset(
+                path, "time", "seconds since 1970-01-01", True, engine='pandas',
+            )))
+
+            self.assertEqual(tuple(ds['VELO'].dims), ("time",) + dims)
+            self.assertEqual(int(np.isfinite(ds['VELO']).sum()), ds.attrs['TableRows'])
+            self.assertEqual(ds["time"].values[0], np.datetime64(self.time))
+
+    def test_diagnostic_tables(self):
+        """CODAR files hold dated diagnostic tables, ending before the time
+        stamp of the file."""
+
+        path, = synthetic.write_series(self.tmp.name, 'codar', files=1, start=self.time, diagnostic_rows=(3, 5))
+        index = tables.TableIndex(path)
+        self.assertEqual(index.table_types(), ['LLUV RDL9', 'rads rad1', 'rcvr rcv3'])
+        self.assertEqual(list(index.load('rads rad1').columns), synthetic.RADS_COLUMNS)
+        self.assertEqual(len(index.load('rcvr rcv3')), 5)
+
+        ds = tables.stack_tables([path], 'rads rad1')
+        self.assertEqual(ds["time"].size, 3)
+        self.assertLess(ds["time"].values[-1], np.datetime64(self.time))
+
+        no_tables = synthetic.codar_lluv(self.time, diagnostic_rows=None)
+        self.assertEqual([b.type for b in tables.scan_tables(no_tables)], ['LLUV RDL9'])
+
+    def test_write_series(self):
+        """Files are named and stamped as a site would, and the same
+        arguments give the same bytes."""
+
+        paths = synthetic.write_series(self.tmp.name, 'codar', files=3, start=self.time, ranges=10)
+        self.assertEqual(
+            [os.path.basename(p) for p in paths],
+            [
+                'RDL_m_SYNT_2018_02_14_0100.hfrss10lluv',
+                'RDL_m_SYNT_2018_02_14_0200.hfrss10lluv',
+                'RDL_m_SYNT_2018_02_14_0300.hfrss10lluv',
+            ],
+        )
+        self.assertTrue(all(
+            any(fnmatch.fnmatch(os.path.basename(p), pattern) for pattern in catalog.RADIAL_PATTERNS)
+            for p in paths
+        ))
+        self.assertEqual(
+            [utils.create_time(utils.get_metadata_from_file(p)) for p in paths],
+            [self.time + datetime.timedelta(hours=k) for k in range(3)],
+        )
+
+        with open(paths[1], 'rb') as f:
+            self.assertEqual(f.read(), synthetic.codar_lluv(self.time + datetime.timedelta(hours=1), ranges=10))
+        self.assertNotEqual(
+            synthetic.codar_lluv(self.time, ranges=10),
+            synthetic.codar_lluv(self.time, ranges=10, seed=1),
+        )
+
+        with self.assertRaises(ValueError):
+            synthetic.write_series(self.tmp.name, 'seasonde')
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import gzip
+import os
+import shutil
+import tempfile
+import numpy as np
+import unittest
+import xradial.tables as tables
+
+class TestTables(unittest.TestCase):
+
+    def setUp(self):
+
+        # set test paths up
+        test_root = os.path.dirname(os.path.dirname(__file__))
+        self.codar_test_fp = os.path.join(
+            test_root,
+            "data/codar_ascii/RDL_m_Rutgers_AMAG_2018_02_14_0000.hfrss10lluv"
+        )
+
+        self.wera_test_fp = os.path.join(
+            test_root,
+            "data/wera_ascii/RDL_SC_GTN_2018_02_14_0023.hfrweralluv1.0"
+        )
+
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_table_index(self):
+        """Every table is found, and loads with as many rows as its header
+        says, typed like the radial table."""
+
+        index = tables.TableIndex(self.codar_test_fp)
+        self.assertEqual(index.table_types(), ['LLUV RDL9', 'rads rad1', 'rcvr rcv3'])
+
+        for table_type, block in index.blocks.items():
+            df = index.load(table_type)
+            self.assertEqual(list(df.columns), block.columns)
+            self.assertEqual(len(df), block.rows)
+
+        rads = index.load('rads rad1')
+        self.assertEqual(rads['TIME'].dtype, np.int64)
+        self.assertEqual(list(rads['TIME']), [-5400, -3600, -1800, 0, 0, 1800, 3600])
+        self.assertEqual(rads['SSN1'][0], 19.)
+
+        index = tables.TableIndex(self.wera_test_fp)
+        self.assertEqual(index.table_types(), ['LLUV RDL1'])
+        self.assertEqual(len(index.load('LLUV RDL1')), 1598)
+
+        # offsets are into the uncompressed contents
+        fp = os.path.join(self.tmp_dir, "codar.hfrss10lluv.gz")
+        with open(self.codar_test_fp, 'rb') as f, gzip.open(fp, 'wb') as out:
+            out.write(f.read())
+        index = tables.TableIndex(fp)
+        self.assertTrue(index.load('rcvr rcv3').equals(tables.TableIndex(self.codar_test_fp).load('rcvr rcv3')))
+
+    def test_stack_tables(self):
+        """Diagnostic rows of many files are put in time order, once."""
+
+        # a file an hour later, whose diagnostics have moved on by one row
+        later_fp = os.path.join(self.tmp_dir, "RDL_m_Rutgers_AMAG_2018_02_14_0100.hfrss10lluv")
+        with open(self.codar_test_fp) as f, open(later_fp, 'w') as out:
+            for line in f:
+                if line.startswith('%TimeStamp:'):
+                    line = '%TimeStamp: 2018 02 14  01 00 00\n'
+                elif line.startswith('%     -5400'):
+                    line = line.replace('-5400', ' 5400').replace('2018 02 13  22 30 00', '2018 02 14  01 30 00')
+                out.write(line)
+
+        ds = tables.stack_tables([later_fp, self.codar_test_fp], 'rads rad1')
+        self.assertEqual(ds['TIME'].dims, ('time',))
+        self.assertEqual(list(ds['TIME'].values), [-5400, -3600, -1800, 0, 0, 1800, 3600, 5400])
+        self.assertTrue((np.diff(ds['time'].values) >= np.timedelta64(0)).all())
+
+        with self.assertRaises(ValueError):
+            tables.stack_tables([self.wera_test_fp], 'rads rad1')
+
+if __name__ == "__main__":
+    unittest.main()
@@ -49,6 +49,35 @@ class TestXRadials(unittest.TestCase):
         out = utils._rb2ll(lon0, lat0, r, b)
         self.assertTrue(np.allclose(np.array(out), np.array([45.10095433988366, 40.221998475529155])))
 
+    def test_rb2ll_vectorized(self):
+        """The vectorized solver must agree with geopy's geodesic to within
+        1e-9 degrees, and broadcast a single origin over many ranges and
+        bearings."""
+
+        try:
+            import geopy
+            from geopy.distance import geodesic
+        except ImportError:
+            self.skipTest("geopy is not installed")
+
+        rng = np.random.default_rng(0)
+        n = 500
+        lon0 = rng.uniform(-180, 180, n)
+        lat0 = rng.uniform(-80, 80, n)
+        r = rng.uniform(0, 500, n)
+        b = rng.uniform(0, 360, n)
+
+        lon, lat = utils.rb2ll(lon0, lat0, r, b)
+        for i in range(n):
+            d = geodesic(kilometers=r[i]).destination(geopy.Point(lat0[i], lon0[i]), b[i])
+            self.assertLess(abs((d.longitude - lon[i] + 180) % 360 - 180), 1e-9)
+            self.assertLess(abs(d.latitude - lat[i]), 1e-9)
+
+        lon, lat = utils.rb2ll(-72.1237, 40.9693333, [[10.], [20.]], [0., 90., 180.])
+        self.assertEqual(lon.shape, (2, 3))
+        self.assertEqual(lat.shape, (2, 3))
+        self.assertEqual(utils._rb2ll(-72.1237, 40.9693333, 20., 90.), (lon[1, 1], lat[1, 1]))
+
     def test_get_metadata(self):
         """Check that a dictionary of metadata information is returned, and the
         mappings are correct."""
@@ -142,6 +171,37 @@ class TestXRadials(unittest.TestCase):
             correct_codar_metadata['TransmitBandwidthKHz']
         )
 
+    def test_parse_metadata(self):
+        """Schema-typed metadata must match converting every header value
+        with pandas.to_numeric, and parsing stops at 'TableStart:'."""
+
+        for fp in (self.codar_test_fp, self.wera_test_fp):
+            with open(fp) as f:
+                header = [l[1:].strip() for l in f if l.startswith('%')]
+            header = header[:header.index('TableStart:') + 1]
+            correct_metadata = {}
+            for c in header:
+                if not c.startswith('%'):
+                    k, v = map(str.strip, c.split(':')[:2])
+                    correct_metadata[k] = pd.to_numeric(v, errors='ignore')
+
+            metadata = utils.get_metadata_from_file(fp, numeric=True)
+            self.assertEqual(list(metadata), list(correct_metadata))
+            for k, v in correct_metadata.items():
+                self.assertEqual(type(metadata[k]), type(v))
+                if not (isinstance(v, float) and np.isnan(v)):
+                    self.assertEqual(metadata[k], v)
+
+        # values which don't match their declared type fall back to the generic check
+        lines = ['%RangeStart: 2.5', '%TableRows: 1e3', '%CTF: 1', '%Foo: inf', '%Bar: nan', '%TableStart:', '%After: 1']
+        metadata = utils.parse_metadata(lines, numeric=True)
+        self.assertEqual(metadata['RangeStart'], 2.5)
+        self.assertEqual(metadata['TableRows'], 1000.)
+        self.assertEqual(type(metadata['CTF']), np.int64)
+        self.assertTrue(np.isinf(metadata['Foo']))
+        self.assertEqual(metadata['Bar'], 'nan')
+        self.assertNotIn('After', metadata)
+
     def test_calc_max_range(self):
         metadata = { # metadata from test CODAR file, using pd.to_numeric
             'CTF': 1.0, 
@@ -0,0 +1,7 @@
+def __getattr__(name):
+    # the asyncio API is imported on first use, so that importing xradial
+    # doesn't import asyncio, pandas and xarray
+    if name in ('aopen', 'aopen_many'):
+        import xradial.aio as aio
+        return getattr(aio, name)
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
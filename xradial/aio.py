@@ -0,0 +1,163 @@
+#!/usr/bin/python
+"""
+Module containing the asyncio API of xRADIAL.
+
+Sources are read without blocking the event loop, and the CPU-bound parsing
+and gridding of `create_xarray_dataset` run in an executor, so that while one
+file is being parsed the next ones are being fetched. A source is a path, the
+contents of a file (bytes, bytearray, memoryview), a binary file-like object
+whose `read` is a plain or a coroutine function (e.g. aiofiles, an aiohttp
+response's content), or an awaitable resolving to any of these (e.g. the
+coroutine fetching an object from remote storage).
+"""
+
+import asyncio
+import functools
+import inspect
+import xradial.batch as batch # results of many conversions
+import xradial.reader as reader # single-pass file reading
+import xradial.xradial # high-level conversion
+
+async def aopen(source, time_var_str, cf_time_units, numerical_metadata=False,
+    executor=None, **kwargs):
+    """Convert a radial file to an xarray Dataset without blocking the event
+    loop: the source is read asynchronously and parsed in an executor.
+
+    Args:
+        source: path, contents, binary file-like object or awaitable; see
+            the module docstring
+        time_var_str (str): name of time variable
+        cf_time_units (str): string describing the units of the time variable
+        numerical_metadata (bool): indicator to convert metadata to numeric types
+        executor (concurrent.futures.Executor/None): executor to parse in,
+            the default executor of the loop if None; a ProcessPoolExecutor
+            parses in parallel, at the cost of sending the contents to the
+            worker and the Dataset back
+        **kwargs: further keyword arguments of create_xarray_dataset
+
+    Returns:
+        xarray.Dataset"""
+
+    loop = asyncio.get_running_loop()
+    contents = await read_source(source)
+    return await loop.run_in_executor(executor, functools.partial(
+        xradial.xradial.create_xarray_dataset,
+        contents,
+        time_var_str,
+        cf_time_units,
+        numerical_metadata,
+        **kwargs
+    ))
+
+async def aopen_many(sources, time_var_str, cf_time_units, numerical_metadata=False,
+    concurrency=8, executor=None, ordered=True, **kwargs):
+    """Convert many radial files, with at most `concurrency` of them being
+    read or parsed at a time. A source which fails is reported in its result
+    and doesn't stop the others.
+
+    Args:
+        sources (iterable/async iterable): sources, see the module docstring;
+            consumed lazily
+        time_var_str (str): name of time variable
+        cf_time_units (str): string describing the units of the time variable
+        numerical_metadata (bool): indicator to convert metadata to numeric types
+        concurrency (int): number of sources in flight
+        executor (concurrent.futures.Executor/None): executor to parse in, see
+            aopen
+        ordered (bool): yield results in input order if True, else as soon as
+            they finish
+        **kwargs: further keyword arguments of create_xarray_dataset
+
+    Yields:
+        xradial.batch.BatchResult: with the source as its `path`"""
+
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1, got {}".format(concurrency))
+
+    args = (time_var_str, cf_time_units, numerical_metadata)
+    items = _aenumerate(sources)
+    exhausted = False
+    pending = set()
+    finished = {} # index: result, held back until its turn when ordered
+    next_index = 0
+    try:
+        while True:
+            while not exhausted and len(pending) < concurrency:
+                try:
+                    index, source = await items.__anext__()
+                except StopAsyncIteration:
+                    exhausted = True
+                    break
+                pending.add(asyncio.ensure_future(_open_one(index, source, args, executor, kwargs)))
+            if not pending:
+                break
+
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                result = task.result()
+                if ordered:
+                    finished[result.index] = result
+                else:
+                    yield result
+
+            while next_index in finished:
+                yield finished.pop(next_index)
+                next_index += 1
+    finally:
+        for task in pending:
+            task.cancel()
+
+async def read_source(source):
+    """Read a source without blocking the event loop. Paths and file-like
+    objects with a plain `read` are read in a thread; compressed contents are left to
+    be decompressed with the parsing.
+
+    Args:
+        source: path, contents, binary file-like object or awaitable; see
+            the module docstring
+
+    Returns:
+        bytes-like"""
+
+    if inspect.isawaitable(source):
+        source = await source
+
+    if reader.is_buffer(source):
+        return source
+
+    read = getattr(source, 'read', None)
+    if read is not None:
+        if inspect.iscoroutinefunction(read):
+            return await read()
+        data = await asyncio.to_thread(read)
+        if inspect.isawaitable(data): # e.g. a read wrapped in a plain function
+            return await data
+        return data
+
+    return await asyncio.to_thread(_read_file, source)
+
+async def _open_one(index, source, args, executor, kwargs):
+    """Convert one source into a BatchResult, catching its errors."""
+
+    try:
+        ds = await aopen(source, *args, executor=executor, **kwargs)
+    except Exception as e:
+        return batch.BatchResult(index, source, None, e)
+    return batch.BatchResult(index, source, ds, None)
+
+async def _aenumerate(sources):
+    """Enumerate an iterable or an async iterable."""
+
+    index = 0
+    if hasattr(sources, '__aiter__'):
+        async for source in sources:
+            yield index, source
+            index += 1
+    else:
+        for source in sources:
+            yield index, source
+            index += 1
+
+def _read_file(path):
+    with open(path, 'rb') as f:
+        return f.read()
@@ -0,0 +1,234 @@
+#!/usr/bin/python
+"""
+Module containing the xarray backend for ASCII radial files, so that they can
+be opened with `xr.open_dataset(path, engine="xradial")` and
+`xr.open_mfdataset`.
+
+The whole table is parsed when the file is opened, to fix the grid, except
+for the columns in `drop_variables`; a variable is only scattered into its
+dense array when it is first accessed.
+"""
+
+import os
+import re
+import threading
+import numpy as np
+import xarray as xr
+from xarray.backends import BackendArray, BackendEntrypoint
+import xradial.compression as compression # transparent decompression
+import xradial.dataframe as dataframe # dataframe operations
+import xradial.dataset as dataset # dataset operations
+import xradial.reader as reader # single-pass file reading
+import xradial.utils as utils # helper functions
+import xradial.xradial
+
+# file name extensions of ASCII radial files: CODAR/WERA '.hfrss10lluv',
+# '.hfrweralluv1.0', '.lluv' and CODAR '.ruv', optionally compressed
+RADIAL_EXTENSION_RE = re.compile(r'\.(ruv|[a-z0-9]*lluv[0-9.]*)(\.(gz|bz2|xz|zst))?$')
+
+# first line of the header of CODAR and WERA files
+CTF_MARKER = b'%CTF:'
+
+class RadialStore(object):
+    """Parsed ASCII radial file, holding its rows and their position on the
+    grid until variables are requested.
+
+    Args:
+        path (str/bytes-like/file-like): path to ASCII data, contents of a
+            file as bytes, bytearray or memoryview, or a binary file-like object
+        time_var_str (str): name of time variable
+        numerical_metadata (bool): indicator to convert metadata to numeric types
+        drop_variables (iterable of str): table columns not to parse"""
+
+    def __init__(self, path, time_var_str, numerical_metadata=True, drop_variables=()):
+
+        self.metadata, table = reader.read_radial(path, numerical_metadata)
+        self.time = utils.create_time(self.metadata)
+        self.olat, self.olon = utils.get_olat_olon(self.metadata)
+        self.antenna_bearing = utils.get_antenna_bearing(self.metadata)
+
+        # dropped columns are never parsed; the grid columns always are
+        variables = None
+        if drop_variables:
+            variables = [c for c in self.metadata['TableColumnTypes'].split() if c not in drop_variables]
+        self.df = dataframe.create_dataframe(table, time_var_str, self.time, self.metadata, variables=variables)
+
+        self.dims, template, coords = dataframe.get_grid(self.df, self.metadata, self.olat, self.olon)
+        if template is None: # single range/bearing, nothing to reindex
+            self.axes = tuple(c[:1] for c in coords)
+        else:
+            self.axes = template.axes
+        self.cells = dataset.grid_cells(self.axes, coords)
+
+        self.time_var_str = time_var_str
+        self.shape = (1, self.axes[0].size, self.axes[1].size)
+        self.lock = threading.Lock()
+
+    def variable_names(self):
+        """Names of the gridded variables of the file."""
+
+        return [c for c in self.df.columns if c != self.time_var_str and c not in self.dims]
+
+    def load(self, name):
+        """Scatter one variable into its dense array.
+
+        Args:
+            name (str): name of the variable
+
+        Returns:
+            numpy.ndarray"""
+
+        with self.lock:
+            values = self.df[[name]].values
+        return dataset.scatter(self.cells, values, self.shape[1] * self.shape[2])[0].reshape(self.shape)
+
+    def __getstate__(self):
+        # locks can't be pickled, e.g. to the workers of dask's process or
+        # distributed schedulers; each copy gets its own
+        state = self.__dict__.copy()
+        del state['lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+class RadialBackendArray(BackendArray):
+    """Lazily loaded gridded variable of a RadialStore."""
+
+    def __init__(self, store, name):
+        self.store = store
+        self.name = name
+        self.shape = store.shape
+        self.dtype = np.dtype(np.float64)
+
+    def __getitem__(self, key):
+        """Index the variable with an explicit indexer of xarray: integers,
+        slices and arrays, which index each axis on its own unless the
+        indexer is vectorized."""
+
+        array = self.store.load(self.name)
+        if type(key).__name__ == 'VectorizedIndexer':
+            return _vindex(array, key.tuple)
+
+        axis = 0
+        for k in key.tuple:
+            array = array[(slice(None),) * axis + (k,)]
+            if not isinstance(k, (int, np.integer)):
+                axis += 1
+        return array
+
+class RadialBackendEntrypoint(BackendEntrypoint):
+    """xarray backend for ASCII radial (CODAR, WERA) files."""
+
+    description = "Open ASCII radial (CODAR, WERA) files with xRADIAL"
+    url = "https://github.com/asascience/xRADIAL"
+    open_dataset_parameters = (
+        'filename_or_obj',
+        'drop_variables',
+        'time_var_str',
+        'cf_time_units',
+        'numerical_metadata',
+    )
+
+    def open_dataset(self, filename_or_obj, *, drop_variables=None,
+        time_var_str='time', cf_time_units=None, numerical_metadata=True):
+        """Open an ASCII radial file as a Dataset matching the one returned by
+        xradial.xradial.create_xarray_dataset, with lazily loaded gridded
+        variables.
+
+        Args:
+            filename_or_obj (str/bytes-like/file-like): path to ASCII data,
+                possibly compressed, contents of a file as bytes, bytearray
+                or memoryview, or a binary file-like object
+            drop_variables (str/iterable of str/None): variables not to load
+            time_var_str (str): name of time variable
+            cf_time_units (str/None): CF-compliant units to encode time with
+            numerical_metadata (bool): indicator to convert metadata to numeric types
+
+        Returns:
+            xarray.Dataset"""
+
+        if isinstance(drop_variables, str):
+            drop_variables = [drop_variables]
+        drop_variables = set(drop_variables or ())
+
+        if not (hasattr(filename_or_obj, 'read') or reader.is_buffer(filename_or_obj)):
+            filename_or_obj = os.fspath(filename_or_obj)
+        store = RadialStore(filename_or_obj, time_var_str, numerical_metadata, drop_variables)
+        dims = (time_var_str,) + store.dims
+
+        data_vars = {
+            name: xr.Variable(dims, RadialBackendArray(store, name))
+            for name in store.variable_names()
+            if name not in drop_variables
+        }
+        data_vars.update({
+            name: ([time_var_str], [value])
+            for name, value in (
+                ('OLAT', store.olat),
+                ('OLON', store.olon),
+                ('ANTB', store.antenna_bearing),
+            )
+            if name not in drop_variables
+        })
+
+        ds = xr.Dataset(
+            data_vars=data_vars,
+            coords={
+                time_var_str: np.array([store.time], dtype='datetime64[ns]'),
+                store.dims[0]: store.axes[0],
+                store.dims[1]: store.axes[1],
+            },
+            attrs=store.metadata,
+        )
+
+        if cf_time_units is not None:
+            ds[time_var_str].encoding.update({'dtype': 'float64', 'units': cf_time_units})
+        xradial.xradial.add_long_names(ds)
+
+        return ds
+
+    def guess_can_open(self, filename_or_obj):
+        """Whether a path has the extension of a radial file, or the path,
+        contents or file-like object starts with the CTF header."""
+
+        if reader.is_buffer(filename_or_obj): # contents, not a path
+            return bytes(filename_or_obj[:len(CTF_MARKER)]) == CTF_MARKER
+        try:
+            name = os.path.basename(os.fspath(filename_or_obj)).lower()
+        except TypeError:
+            name = None
+        if name is not None and RADIAL_EXTENSION_RE.search(name):
+            return True
+        return _read_prefix(filename_or_obj, len(CTF_MARKER)) == CTF_MARKER
+
+def _vindex(array, key):
+    """Vectorized indexing as xarray does it: the dimensions of the broadcast
+    index arrays come first, followed by those of the slices."""
+
+    positions = [i for i, k in enumerate(key) if not isinstance(k, slice)]
+    ndim = np.broadcast(*[key[i] for i in positions]).ndim
+    if positions == list(range(positions[0], positions[-1] + 1)):
+        # numpy keeps adjacent index arrays in place
+        source = range(positions[0], positions[0] + ndim)
+    else:
+        source = range(ndim)
+    return np.moveaxis(array[key], list(source), list(range(ndim)))
+
+def _read_prefix(source, size):
+    """First bytes of the contents of a path, decompressed, or of a seekable
+    file-like object, left at its position; None if they can't be read."""
+
+    try:
+        if isinstance(source, (str, os.PathLike)):
+            with compression.open_binary(source) as f:
+                return f.read(size)
+        if source.seekable():
+            pos = source.tell()
+            prefix = source.read(size)
+            source.seek(pos)
+            return prefix
+    except Exception: # not a readable file; guessing must not fail
+        pass
+    return None
@@ -0,0 +1,145 @@
+#!/usr/bin/python
+"""
+Module containing batch conversion of many ASCII radial files.
+
+Files are converted with `xradial.xradial.create_xarray_dataset` in a pool of
+worker processes, submitted in chunks to keep the inter-process overhead low.
+"""
+
+import collections
+import concurrent.futures
+import itertools
+import mmap
+import os
+import xradial.reader as reader # file contents
+import xradial.xradial # high-level conversion
+
+# outcome of converting one file; `index` is the position of the file in the
+# input, and exactly one of `dataset` and `error` is set, unless the file went
+# to a sink, whose return value is then in `output` in place of the dataset
+BatchResult = collections.namedtuple(
+    'BatchResult', ['index', 'path', 'dataset', 'error', 'output'], defaults=(None,)
+)
+
+def convert_files(paths, time_var_str, cf_time_units, numerical_metadata=False,
+    workers=None, chunksize=8, ordered=True, sink=None, **kwargs):
+    """Convert many ASCII radial files to xarray Datasets in parallel. A file
+    which fails to convert is reported in its result and doesn't stop the
+    rest of the batch.
+
+    Args:
+        paths (iterable): paths to ASCII data, or their contents or streams
+            as create_xarray_dataset takes, consumed lazily; with worker
+            processes, memoryviews and memory maps are copied into bytes and
+            streams are read, to be sent to the workers
+        time_var_str (str): name of time variable
+        cf_time_units (str): string describing the units of the time variable
+        numerical_metadata (bool): indicator to convert metadata to numeric types
+        workers (int/None): number of worker processes, defaults to the number
+            of CPUs; with 1 the files are converted in this process
+        chunksize (int): number of files sent to a worker in one task
+        ordered (bool): yield results in input order if True, else as soon as
+            they finish
+        sink (callable/None): called in the worker as sink(path, dataset) for
+            each converted file, e.g. to write it out, so that Datasets are
+            not sent back from the workers; must be picklable. An error of
+            the sink is reported as the error of the file
+        **kwargs: further keyword arguments of create_xarray_dataset; files
+            are memory-mapped (mmap=True) unless told otherwise, so that
+            workers don't grow their heap with the size of the files
+
+    Yields:
+        BatchResult"""
+
+    args = (time_var_str, cf_time_units, numerical_metadata)
+    kwargs.setdefault('mmap', True)
+    chunks = _chunks(enumerate(paths), chunksize)
+
+    if workers == 1:
+        for chunk in chunks:
+            yield from _convert_chunk(chunk, args, kwargs, sink)
+        return
+
+    workers = workers or os.cpu_count() or 1
+    chunks = (
+        [(index, _sendable(path)) for index, path in chunk] for chunk in chunks
+    )
+    max_pending = 2 * workers # keep workers busy without reading ahead the whole input
+
+    executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+    pending = {} # future: chunk
+    finished = {} # index: result, held back until its turn when ordered
+    next_index = 0
+    try:
+        while True:
+            for chunk in itertools.islice(chunks, max_pending - len(pending)):
+                pending[executor.submit(_convert_chunk, chunk, args, kwargs, sink)] = chunk
+            if not pending:
+                break
+
+            done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                results = _chunk_results(future, pending.pop(future))
+                if ordered:
+                    finished.update((r.index, r) for r in results)
+                else:
+                    yield from results
+
+            while next_index in finished:
+                yield finished.pop(next_index)
+                next_index += 1
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+def _chunks(iterable, size):
+    """Split an iterable into lists of at most `size` items, lazily."""
+
+    iterator = iter(iterable)
+    return iter(lambda: list(itertools.islice(iterator, size)), [])
+
+def _sendable(source):
+    """Source in a form which can be pickled to a worker process."""
+
+    source = reader.reusable(source)
+    if isinstance(source, (memoryview, mmap.mmap)):
+        return bytes(source)
+    return source
+
+def _convert_chunk(chunk, args, kwargs, sink=None):
+    """Convert a chunk of (index, path) pairs; runs in the worker process.
+
+    Args:
+        chunk (list of tuple): index and path of each file
+        args (tuple): positional arguments of create_xarray_dataset after the path
+        kwargs (dict): keyword arguments of create_xarray_dataset
+        sink (callable/None): called as sink(path, dataset) for each Dataset
+
+    Returns:
+        list of BatchResult"""
+
+    results = []
+    for index, path in chunk:
+        try:
+            ds = xradial.xradial.create_xarray_dataset(path, *args, **kwargs)
+            output = None if sink is None else sink(path, ds)
+        except Exception as e:
+            results.append(BatchResult(index, path, None, e))
+        else:
+            if sink is None:
+                results.append(BatchResult(index, path, ds, None))
+            else:
+                results.append(BatchResult(index, path, None, None, output))
+
+    return results
+
+def _chunk_results(future, chunk):
+    """Get the results of a finished chunk. If the chunk failed as a whole
+    (e.g. a result could not be sent back from the worker), every file in it
+    is reported as failed with that error."""
+
+    try:
+        return future.result()
+    except Exception as e:
+        return [BatchResult(index, path, None, e) for index, path in chunk]
@@ -0,0 +1,202 @@
+#!/usr/bin/python
+"""
+Module containing a persistent catalog of radial archives.
+
+Directories are scanned once, parsing only the header of each file, and the
+results are kept in a local SQLite index. Later scans only re-read files
+whose size or modification time changed, and queries by site and time never
+touch the files themselves.
+"""
+
+import contextlib
+import datetime
+import fnmatch
+import os
+import sqlite3
+import xradial.utils as utils # helper functions
+
+# file name patterns of ASCII radial files, compressed or not
+RADIAL_PATTERNS = ('*lluv*', '*.ruv', '*.ruv.*')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS radials (
+    path TEXT PRIMARY KEY,
+    site TEXT,
+    time TEXT,
+    olat REAL,
+    olon REAL,
+    angular_res REAL,
+    range_res_km REAL,
+    table_rows INTEGER,
+    uuid TEXT,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS radials_site_time ON radials (site COLLATE NOCASE, time);
+CREATE INDEX IF NOT EXISTS radials_time ON radials (time);
+"""
+
+_COLUMNS = ('path', 'site', 'time', 'olat', 'olon', 'angular_res', 'range_res_km', 'table_rows', 'uuid', 'size', 'mtime')
+
+@contextlib.contextmanager
+def connect(db_path):
+    """Open the catalog database, creating its tables if needed, and commit
+    on success.
+
+    Args:
+        db_path (str): path to the SQLite database
+
+    Yields:
+        sqlite3.Connection"""
+
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.executescript(_SCHEMA)
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+def build_catalog(directories, db_path, patterns=RADIAL_PATTERNS):
+    """Scan directories for radial files and index their headers. Files which
+    are already indexed with the same size and modification time are not
+    read again; indexed files which no longer exist are removed.
+
+    Args:
+        directories (str/iterable of str): directories to scan, recursively
+        db_path (str): path to the SQLite database
+        patterns (iterable of str): file name patterns of radial files
+
+    Returns:
+        int: number of files (re)indexed"""
+
+    if isinstance(directories, (str, os.PathLike)):
+        directories = [directories]
+    directories = [os.path.abspath(d) for d in directories]
+
+    with connect(db_path) as conn:
+        known = {
+            path: (size, mtime)
+            for path, size, mtime in conn.execute("SELECT path, size, mtime FROM radials")
+        }
+
+        seen = set()
+        rows = []
+        for path in find_radial_files(directories, patterns):
+            seen.add(path)
+            st = os.stat(path)
+            if known.get(path) == (st.st_size, st.st_mtime):
+                continue
+            rows.append(index_file(path, st))
+
+        conn.executemany(
+            "INSERT OR REPLACE INTO radials ({}) VALUES ({})".format(
+                ', '.join(_COLUMNS), ', '.join('?' * len(_COLUMNS))
+            ),
+            rows,
+        )
+
+        gone = [
+            (path,) for path in known
+            if path not in seen and any(_is_under(path, d) for d in directories)
+        ]
+        conn.executemany("DELETE FROM radials WHERE path = ?", gone)
+
+    return len(rows)
+
+def index_file(path, st=None):
+    """Parse the header of a radial file into a catalog row. A file whose
+    header can't be parsed is still indexed, with empty fields, so it isn't
+    read again until it changes.
+
+    Args:
+        path (str): path to ASCII data
+        st (os.stat_result/None): stat of the file, if already known
+
+    Returns:
+        tuple: values of the catalog columns"""
+
+    st = st or os.stat(path)
+    try:
+        metadata = utils.get_metadata_from_file(path, numeric=True)
+        time = utils.create_time(metadata).isoformat(sep=' ')
+        olat, olon = utils.get_olat_olon(metadata)
+        site = metadata['Site'].split()[0] if 'Site' in metadata else None
+        angular_res = utils.get_angular_resolution(metadata)
+        range_res_km = utils.get_range_res_start_end(metadata)[2]
+        table_rows = metadata.get('TableRows')
+        uuid = metadata.get('UUID')
+    except Exception:
+        return (path,) + (None,) * 8 + (st.st_size, st.st_mtime)
+
+    return (
+        path,
+        site,
+        time,
+        olat,
+        olon,
+        angular_res,
+        None if range_res_km is None else float(range_res_km),
+        None if table_rows is None else int(table_rows),
+        uuid,
+        st.st_size,
+        st.st_mtime,
+    )
+
+def query_catalog(db_path, site=None, start=None, end=None):
+    """Find the indexed files of a site and time range, in time order. Both
+    ends of the time range are inclusive.
+
+    Args:
+        db_path (str): path to the SQLite database
+        site (str/None): site code, e.g. 'AMAG' (case-insensitive)
+        start (datetime.datetime/str/None): earliest time
+        end (datetime.datetime/str/None): latest time
+
+    Returns:
+        list of str: paths, ready for the conversion functions"""
+
+    clauses, params = ["time IS NOT NULL"], []
+    if site is not None:
+        clauses.append("site = ? COLLATE NOCASE")
+        params.append(site)
+    if start is not None:
+        clauses.append("time >= ?")
+        params.append(_iso(start))
+    if end is not None:
+        clauses.append("time <= ?")
+        params.append(_iso(end))
+
+    with connect(db_path) as conn:
+        cursor = conn.execute(
+            "SELECT path FROM radials WHERE {} ORDER BY time, path".format(' AND '.join(clauses)),
+            params,
+        )
+        return [path for (path,) in cursor]
+
+def find_radial_files(directories, patterns=RADIAL_PATTERNS):
+    """Find the files under directories, recursively, whose names match any
+    of the patterns.
+
+    Args:
+        directories (iterable of str): directories to scan
+        patterns (iterable of str): file name patterns of radial files
+
+    Yields:
+        str: paths of the files, sorted by name within each directory"""
+
+    for directory in directories:
+        for root, _, files in os.walk(directory):
+            for name in sorted(files):
+                if any(fnmatch.fnmatch(name, p) for p in patterns):
+                    yield os.path.join(root, name)
+
+def _is_under(path, directory):
+    return os.path.commonpath([path, directory]) == directory
+
+def _iso(t):
+    """Catalog form of a time, 'YYYY-MM-DD HH:MM:SS'."""
+
+    if isinstance(t, str):
+        t = datetime.datetime.fromisoformat(t)
+    return t.isoformat(sep=' ')
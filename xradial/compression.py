@@ -0,0 +1,138 @@
+#!/usr/bin/python
+"""
+Module containing transparent decompression of radial files.
+
+Files compressed with gzip, bz2, xz or zstd are recognised by their magic
+bytes, not their names, and are decompressed as a stream while they are read,
+so no temporary copies are written. zstd needs the optional `zstandard`
+package.
+"""
+
+import bz2
+import contextlib
+import gzip
+import io
+import lzma
+import os
+
+# magic bytes at the start of each compressed format
+GZIP_MAGIC = b'\x1f\x8b'
+BZ2_MAGIC = b'BZh'
+XZ_MAGIC = b'\xfd7zXZ\x00'
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+_MAGIC_LENGTH = max(map(len, (GZIP_MAGIC, BZ2_MAGIC, XZ_MAGIC, ZSTD_MAGIC)))
+
+def detect_compression(prefix):
+    """Name the compression of a file from its first bytes.
+
+    Args:
+        prefix (bytes): first bytes of the file, at least 6 if it is that long
+
+    Returns:
+        str/None: 'gzip', 'bz2', 'xz', 'zstd', or None if uncompressed"""
+
+    for name, magic in (
+        ('gzip', GZIP_MAGIC),
+        ('bz2', BZ2_MAGIC),
+        ('xz', XZ_MAGIC),
+        ('zstd', ZSTD_MAGIC),
+    ):
+        if prefix.startswith(magic):
+            return name
+    return None
+
+@contextlib.contextmanager
+def open_binary(source):
+    """Open a radial file for reading as bytes, decompressing it on the fly if
+    it is compressed.
+
+    Args:
+        source (str/os.PathLike/bytes-like/file-like): path to a file, the
+            contents of a file as bytes, bytearray or memoryview, or a binary
+            file-like object open for reading; a file-like object is read from
+            its current position and is not closed
+
+    Yields:
+        binary file-like object of the uncompressed contents"""
+
+    with contextlib.ExitStack() as stack:
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            f = io.BytesIO(source)
+        elif isinstance(source, (str, os.PathLike)):
+            f = stack.enter_context(open(source, 'rb'))
+        else:
+            f = source
+
+        prefix, f = _peek(f, _MAGIC_LENGTH)
+        compression = detect_compression(prefix)
+
+        if compression is not None:
+            f = stack.enter_context(_decompressor(compression, f))
+        yield f
+
+def _decompressor(compression, f):
+    """Streaming reader of the decompressed contents of f."""
+
+    if compression == 'gzip':
+        return gzip.GzipFile(fileobj=f, mode='rb')
+    elif compression == 'bz2':
+        return bz2.BZ2File(f, mode='rb')
+    elif compression == 'xz':
+        return lzma.LZMAFile(f, mode='rb')
+
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("zstandard is required to read zstd-compressed radial files")
+    return zstandard.ZstdDecompressor().stream_reader(f, closefd=False)
+
+def _peek(f, size):
+    """Read the first bytes of a stream without consuming them. Seekable
+    streams are rewound; others are wrapped so the bytes are read again.
+
+    Returns:
+        tuple: the first bytes (bytes), the stream to read from"""
+
+    if hasattr(f, 'peek'):
+        prefix = f.peek(size)[:size]
+        if len(prefix) >= size:
+            return prefix, f
+
+    if _seekable(f):
+        pos = f.tell()
+        prefix = f.read(size)
+        f.seek(pos)
+        return prefix, f
+
+    prefix = f.read(size)
+    return prefix, io.BufferedReader(_PrefixedReader(prefix, f))
+
+def _seekable(f):
+    try:
+        return f.seekable()
+    except (AttributeError, ValueError):
+        return False
+
+class _PrefixedReader(io.RawIOBase):
+    """Raw stream serving bytes already read from a stream, then the rest of
+    the stream."""
+
+    def __init__(self, prefix, f):
+        self.prefix = prefix
+        self.f = f
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        if self.prefix:
+            n = min(len(b), len(self.prefix))
+            b[:n] = self.prefix[:n]
+            self.prefix = self.prefix[n:]
+            return n
+
+        data = self.f.read(len(b))
+        n = len(data)
+        b[:n] = data
+        return n
@@ -3,33 +3,54 @@
 Module containing DataFrame-specific operations.
 """
 
+import io
+import re
 import numpy as np
 import pandas as pd
+import xradial.dtype_policy as dtype_policy # compact dtypes
+import xradial.grid as grid # cached grid templates
+import xradial.parser as parser # fast numeric table parser
+import xradial.reader as reader # single-pass file reading
 import xradial.utils as utils # helper functions
 
-def create_dataframe(fp, tvar, dt, metadata):
-    """Given a file path, create a pandas DataFrame of the ASCII data.
+# columns the grid logic needs, kept whichever variables are requested
+GRID_COLUMNS = ('LOND', 'LATD', 'BEAR', 'RNGE')
+
+# a line holding data, outside of the table section
+_DATA_LINE_RE = re.compile(rb'^[ \t]*[^%\s]', re.MULTILINE)
+
+def create_dataframe(fp, tvar, dt, metadata, dtypes=None, variables=None):
+    """Given a file path or a buffer of table rows, create a pandas DataFrame
+    of the ASCII data.
 
     Args:
-        fp (file path object): file path to data
+        fp (file path object/buffer): file path to data, or a file-like
+            buffer as returned by xradial.reader.read_radial, or a
+            memoryview as yielded by xradial.reader.open_radial
         tvar (str): time variable
         dt (datetime.datetime): date 
         metadata (dict): dict of metadata
+        dtypes (None/str/dict): dtype policy of the columns, see
+            xradial.dtype_policy.resolve_dtypes
+        variables (iterable of str/None): columns to parse, all if None; the
+            GRID_COLUMNS are always parsed
 
     Returns:
         pandas.DataFrame"""
 
     # ASCII data as pandas DataFrame
-    df = create_initial_dataframe(fp, metadata, tvar, dt)
+    df = create_initial_dataframe(fp, metadata, tvar, dt, variables)
 
     # TODO raise custom error?
     # check that we have actual coordinates in the file
     if np.all(np.isnan(df['LATD'])) and np.all(np.isnan(df['LOND'])):
         raise TypeError("All LATD and LOND values are NaN, unable to reindex")
 
+    dtype_policy.cast_dataframe(df, dtype_policy.resolve_dtypes(dtypes))
+
     return df
 
-def reindex_dataframe(df, metadata, tvar, olat, olon):
+def reindex_dataframe(df, metadata, tvar, olat, olon, variables=None):
     """Re-index the DataFrame based on the prevailing coordinate system.
 
     Args:
@@ -37,15 +58,20 @@ def reindex_dataframe(df, metadata, tvar, olat, olon):
         metadata (dict): dict of metadata
         tvar (str): time variable
         dt (datetime.datetime): date in file
+        variables (iterable of str/None): columns to keep, all if None; the
+            GRID_COLUMNS are always kept
 
     Returns:
         pandas.DataFrame: re-indexed DataFrame"""
 
+    if variables is not None:
+        df = df[select_columns(df.columns, variables) + [tvar]]
+
     # calculate maximum range 
     max_range = utils.calc_max_range(metadata)
 
     # reindex the DataFrame by prevailing grid structure
-    if (df['LOND'].unique().size * df['LATD'].unique().size) < (df['BEAR'].unique().size * df['RNGE'].unique().size): # reindex by lat/lon
+    if is_lat_lon_grid(df): # reindex by lat/lon
         df = reindex_df_by_lat_lon(
             df,
             olat,
@@ -56,9 +82,7 @@ def reindex_dataframe(df, metadata, tvar, olat, olon):
 
     else: # by range and bearing
         # calculate angular resolution, range resolution, range cells 
-        a_res = utils.get_angular_resolution(metadata)
-        rnge_s, rnge_e, rres_km, rres_m = utils.get_range_res_start_end(metadata)
-        rres_precision = utils.get_range_resolution_precision(rres_km, rres_m)
+        a_res, rres_precision, rres_km = get_range_bearing_resolution(metadata)
 
         df = reindex_df_by_range_bearing(
             df, 
@@ -71,28 +95,123 @@ def reindex_dataframe(df, metadata, tvar, olat, olon):
 
     return df
 
-def create_initial_dataframe(path, metadata, time_var_str, time):
-    """Use pandas to read in a file and create a DataFrame object.
+def is_lat_lon_grid(df):
+    """Decide whether the prevailing grid structure of the DataFrame is
+    lat/lon (True) or range/bearing (False), whichever has fewer cells.
+
+    Args:
+        df (pandas.DataFrame): DataFrame of ASCII data
+
+    Returns:
+        bool"""
+
+    return (df['LOND'].unique().size * df['LATD'].unique().size) < (df['BEAR'].unique().size * df['RNGE'].unique().size)
+
+def get_range_bearing_resolution(metadata):
+    """Get the angular resolution, range resolution precision and range
+    resolution in kilometers needed to build a range/bearing grid.
+
+    Args:
+        metadata (dict): dict of metadata
+
+    Returns:
+        tuple: angular resolution (float/None), range resolution precision (int),
+            range resolution (float, kilometers)"""
+
+    a_res = utils.get_angular_resolution(metadata)
+    rnge_s, rnge_e, rres_km, rres_m = utils.get_range_res_start_end(metadata)
+    rres_precision = utils.get_range_resolution_precision(rres_km, rres_m)
+
+    return a_res, rres_precision, rres_km
+
+def get_grid(df, metadata, olat, olon):
+    """Work out the prevailing grid of the DataFrame, and the position of each
+    of its rows on that grid, without reindexing it.
+
+    Args:
+        df (pandas.DataFrame): DataFrame of ASCII data
+        metadata (dict): dict of metadata
+        olat (float/None): origin latitude
+        olon (float/None): origin longitude
+
+    Returns:
+        tuple: names of the two grid dimensions (tuple of str), grid template
+            (xradial.grid.GridTemplate/None) and the grid coordinates of each
+            row (tuple of numpy.ndarray); the template is None if the DataFrame
+            holds a single range/bearing"""
+
+    max_range = utils.calc_max_range(metadata)
+
+    if is_lat_lon_grid(df):
+        i, j, template = lat_lon_slots(df, olat, olon, max_range)
+        return ('i', 'j'), template, (i, j)
+
+    a_res, rres_precision, rres_km = get_range_bearing_resolution(metadata)
+    template = range_bearing_template(df, a_res, rres_precision, rres_km, max_range)
+    return ('BEAR', 'RNGE'), template, (df['BEAR'].values, df['RNGE'].values)
+
+def select_columns(names, variables):
+    """Pick the columns to load for the requested variables, in file order.
+
+    Args:
+        names (iterable of str): names of the columns of the file
+        variables (iterable of str/None): requested variables, all if None;
+            names the file doesn't have are ignored
+
+    Returns:
+        list of str: the requested columns and the GRID_COLUMNS"""
+
+    if variables is None:
+        return list(names)
+    if isinstance(variables, str):
+        variables = [variables]
+
+    keep = set(variables).union(GRID_COLUMNS)
+    return [n for n in names if n in keep]
+
+def create_initial_dataframe(path, metadata, time_var_str, time, variables=None):
+    """Read in a file and create a DataFrame object. Tables laid out in
+    fixed-width columns are parsed with xradial.parser, others with pandas.
     Set the column "TIME_VAR_STR" as `time`, a passed datetime object.
 
     Args:
-        path (str): path to file
+        path (str/buffer): path to file, possibly compressed, contents of a
+            file as bytes, bytearray or memoryview (e.g. as yielded by
+            xradial.reader.open_radial), or a file-like buffer of table rows
         metadata (dict): dict of metadata
         time_var_str (str): name of time variable
         time (datetime.datetime): time in file
+        variables (iterable of str/None): columns to parse, all if None; the
+            GRID_COLUMNS are always parsed
 
     Returns:
         pandas.DataFrame: DataFrame of ASCII data"""
 
-    # create dataframe as it is created in the main function
-    df = pd.read_csv(
-        path,
-        header=None, 
-        sep=r'\s+', 
-        comment='%', 
-        encoding='ascii', 
-        names=metadata['TableColumnTypes'].split()
-    )
+    # decompress on the fly; compression is detected from the content, not
+    # the name
+    buf = reader.read_bytes(path)
+    names = metadata['TableColumnTypes'].split()
+    usecols = select_columns(names, variables)
+
+    # parse fixed-width tables straight into arrays, or else as it is done
+    # in the main function
+    header, table, footer = reader.split_sections(buf)
+    columns = None
+    if not (_DATA_LINE_RE.search(header) or _DATA_LINE_RE.search(footer)):
+        columns = parser.parse_fixed_width(table, names, usecols)
+
+    if columns is not None:
+        df = pd.DataFrame(columns, copy=False)
+    else:
+        df = pd.read_csv(
+            io.BytesIO(buf),
+            header=None, 
+            sep=r'\s+', 
+            comment='%', 
+            encoding='ascii', 
+            names=names,
+            usecols=usecols,
+        )
 
     # create a column for the time data
     df[time_var_str] = time
@@ -112,6 +231,29 @@ def reindex_df_by_lat_lon(df, olat, olon, max_range, time_var_str):
 
     # TODO look into modifying in-place for performance
 
+    calculated_lon_slot, calculated_lat_slot, template = lat_lon_slots(df, olat, olon, max_range)
+
+    # add new columns to existing dataframe
+    df['j'] = calculated_lat_slot 
+    df['i'] = calculated_lon_slot
+
+    df = df.set_index([time_var_str, 'i', 'j'])
+
+    # create new index using the time, lon, lat
+    df = df.reindex(grid.product_index(template, df.index[0][0], df.index.names))
+
+    return df
+
+def lat_lon_lattice(df):
+    """Find the lat/lon lattice the rows of the DataFrame sit on: the minimum
+    latitude and longitude, and the minimum spacing between them.
+
+    Args:
+        df (pandas.DataFrame): DataFrame of ASCII data
+
+    Returns:
+        tuple of float: min lat, min lon, lat spacing, lon spacing"""
+
     # get unique lats/lngs
     unique_lats = np.unique(df['LATD']).round(7)
     unique_lons = np.unique(df['LOND']).round(7)
@@ -120,31 +262,48 @@ def reindex_df_by_lat_lon(df, olat, olon, max_range, time_var_str):
     min_lat_diff = np.min(np.diff(unique_lats))
     min_lon_diff = np.min(np.diff(unique_lons))
 
-    calculated_lat_slot = [int(i) for i in list(np.floor((df['LATD']-np.min(unique_lats))/min_lat_diff))]
-    calculated_lon_slot = [int(i) for i in list(np.floor((df['LOND']-np.min(unique_lons))/min_lon_diff))]
-    
-    # add new columns to existing dataframe
-    df['j'] = calculated_lat_slot 
-    df['i'] = calculated_lon_slot
-
-    df = df.set_index([time_var_str, 'i', 'j'])
+    return np.min(unique_lats), np.min(unique_lons), min_lat_diff, min_lon_diff
 
-    # calcuate max lat/lng extents based on bearing & range to calcuate theoretical number of lat/lon slots
-    _, min_lat = utils._rb2ll(olon,olat,max_range,180)
-    _, max_lat = utils._rb2ll(olon,olat,max_range,0)
-    min_lon, _ = utils._rb2ll(olon,olat,max_range,270)
-    max_lon, _ = utils._rb2ll(olon,olat,max_range,90)
+def lat_lon_slots(df, olat, olon, max_range, lattice=None):
+    """Calculate the lon (i) and lat (j) slot of each row of the DataFrame,
+    and the template of all theoretical slots.
 
-    theoretical_max_lat_slot = np.int(np.ceil((max_lat-np.min(unique_lats))/min_lat_diff))
-    theoretical_max_lon_slot = np.int(np.ceil((max_lon-np.min(unique_lons))/min_lon_diff))
-
-    lat_slots = np.arange(theoretical_max_lat_slot)
-    lon_slots = np.arange(theoretical_max_lon_slot)
+    Args:
+        df (pandas.DataFrame): DataFrame of ASCII data
+        olat (float/None): origin latidude
+        olon (float/None): origin longitude
+        max_range (int): maximum range of data
+        lattice (tuple/None): lattice to place the slots on, as returned by
+            lat_lon_lattice; defaults to the lattice of the DataFrame itself
 
-    # create new index using the time, lon, lat
-    df = df.reindex(pd.MultiIndex.from_product([np.array([df.index[0][0]]), lon_slots, lat_slots], names=df.index.names))
+    Returns:
+        tuple: lon slots (numpy.ndarray), lat slots (numpy.ndarray),
+            template (xradial.grid.GridTemplate)"""
+
+    if lattice is None:
+        lattice = lat_lon_lattice(df)
+    lat0, lon0, min_lat_diff, min_lon_diff = lattice
+
+    if np.isnan(df['LATD'].values).any() or np.isnan(df['LOND'].values).any():
+        raise ValueError("LATD and LOND must not contain NaN values to reindex by lat/lon")
+
+    calculated_lat_slot = np.floor((df['LATD'].values-lat0)/min_lat_diff).astype(np.int64)
+    calculated_lon_slot = np.floor((df['LOND'].values-lon0)/min_lon_diff).astype(np.int64)
+
+    # theoretical lat/lon slots are calculated from the max lat/lng extents
+    # reached by the maximum range; the template is cached per site and
+    # minimum lat/lon
+    template = grid.lat_lon_template(
+        olon,
+        olat,
+        max_range,
+        lat0,
+        lon0,
+        min_lat_diff,
+        min_lon_diff,
+    )
 
-    return df
+    return calculated_lon_slot, calculated_lat_slot, template
 
 def reindex_df_by_range_bearing(df, angular_res,
     rres_precision, rres_km, max_range, time_var_str):
@@ -162,45 +321,63 @@ def reindex_df_by_range_bearing(df, angular_res,
         pandas.DataFrame: re-indexed DataFrame"""
 
     # TODO look into modifying in-place for performance
-    # TODO should raise more explicit errors
 
-    unique_bearing_diffs = np.diff(np.unique(df['BEAR']))
+    template = range_bearing_template(df, angular_res, rres_precision, rres_km, max_range)
 
     df = df.set_index([time_var_str, 'BEAR', 'RNGE'])
 
     # if the DataFrame has only 1 row, there will be no bearing diffs; in
     # this case, simply set the multi index and return the dataframe    
-    if unique_bearing_diffs.shape[0] < 1:
+    if template is None:
         return df
+
+    # create new index using time, bearings, ranges
+    df = df.reindex(grid.product_index(template, df.index[0][0], df.index.names))
+
+    return df
+
+def range_bearing_template(df, angular_res, rres_precision, rres_km, max_range):
+    """Get the template of the range/bearing grid the rows of the DataFrame
+    sit on.
+
+    Args:
+        df pandas.DataFrame: DataFrame of ASCII data
+        angular_res (float/None): angular resolution
+        rres_precision (int): range resolution precision
+        rres_km (float): range resolution (kilometers)
+        max_range (float): maximum range of data
+
+    Returns:
+        xradial.grid.GridTemplate/None: None if the DataFrame holds a single
+            range/bearing"""
+
+    # TODO should raise more explicit errors
+
+    unique_bearing_diffs = np.diff(np.unique(df['BEAR']))
+
+    # if the DataFrame has only 1 row, there will be no bearing diffs
+    if unique_bearing_diffs.shape[0] < 1:
+        return None
     
     # deal with missing angular resolution metadata
     if not angular_res:
         angular_res = unique_bearing_diffs.min() # just pick the first one
     
     # ranges
-    assert all((np.unique(np.diff(df.index.get_level_values('RNGE')).round(decimals=rres_precision)) // rres_km) % 1. == 0)
-    _rmin = df.index.get_level_values('RNGE').unique().min() # min/max ranges we see
-    _rmax = df.index.get_level_values('RNGE').unique().max()
-
-    all_ranges = np.unique(np.concatenate((
-        (np.arange(_rmin, 0,    -rres_km)[1:][::-1]),
-        (np.arange(_rmin, _rmax, rres_km)), # dont include last element (fixed issue here)
-        (np.arange(_rmax, max_range+0.01, rres_km))
-    )).round(decimals=rres_precision))
+    assert all((np.unique(np.diff(df['RNGE'].values).round(decimals=rres_precision)) // rres_km) % 1. == 0)
+    _rmin = df['RNGE'].min() # min ranges we see
 
     # bearings
     assert all(unique_bearing_diffs % angular_res == 0)
-    _bmin = df.index.get_level_values('BEAR').unique().min() # min/max bearings we see
-    _bmax = df.index.get_level_values('BEAR').unique().max()
-    
-
-    all_bearings = np.unique(np.concatenate((
-        (np.arange(_bmin, 0, -angular_res)[1:][::-1]),
-        (np.arange(_bmin, _bmax, angular_res)),
-        (np.arange(_bmax, 360.1, angular_res))
-    )))
-
-    # create new index using time, bearings, ranges
-    df = df.reindex(pd.MultiIndex.from_product([np.array([df.index[0][0]]), all_bearings, all_ranges], names=df.index.names))
-
-    return df
+    _bmin = df['BEAR'].min() # min bearings we see
+
+    # all bearings from 0-360 and all ranges out to the maximum range, on the
+    # lattice of the observations; the template is cached per site
+    return grid.range_bearing_template(
+        _bmin,
+        angular_res,
+        _rmin,
+        rres_km,
+        rres_precision,
+        max_range,
+    )
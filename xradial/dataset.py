@@ -0,0 +1,274 @@
+#!/usr/bin/python
+"""
+Module containing Dataset-specific operations.
+
+Rows of the ASCII data are scattered straight into dense NumPy arrays on the
+prevailing grid, skipping the pandas reindex and `Dataset.from_dataframe`.
+They can also be kept as they are, one element per observation along an
+`obs` dimension, with the integer position of each on the grid (a CF indexed
+ragged array), and put on the dense grid later with `densify`.
+"""
+
+import numpy as np
+import xarray as xr
+import xradial.dataframe as dataframe # dataframe operations
+import xradial.dtype_policy as dtype_policy # compact dtypes
+import xradial.instrument as instrument # stage timing hooks
+
+# dimension of the observations of a ragged Dataset
+OBS_DIM = 'obs'
+
+# name of the coordinate of the position of each observation along a grid
+# dimension, or along time
+INDEX_NAME = '{}_index'
+
+def create_dataset(df, metadata, time_var_str, olat, olon, dtypes=None):
+    """Create a Dataset of the ASCII data on the prevailing grid. Equivalent to
+    `xr.Dataset.from_dataframe(dataframe.reindex_dataframe(...))`, but each
+    variable is allocated once and filled with a single assignment.
+
+    Args:
+        df (pandas.DataFrame): DataFrame of ASCII data
+        metadata (dict): dict of metadata
+        time_var_str (str): name of time variable
+        olat (float/None): origin latitude
+        olon (float/None): origin longitude
+        dtypes (None/str/dict): dtype policy of the variables, see
+            xradial.dtype_policy.resolve_dtypes
+
+    Returns:
+        xarray.Dataset"""
+
+    dtypes = dtype_policy.resolve_dtypes(dtypes)
+
+    with instrument.stage('reindex') as stage:
+        dims, axes, cells = _grid(df, metadata, olat, olon)
+        size = axes[0].size * axes[1].size
+        stage.cells = size
+
+    with instrument.stage('dataset') as stage:
+        names = [c for c in df.columns if c != time_var_str and c not in dims]
+        data = scatter(
+            cells,
+            df[names].values,
+            size,
+            [dtypes.get(name) for name in names],
+        )
+        shape = (1, axes[0].size, axes[1].size)
+        stage.cells = size * len(names)
+
+        return xr.Dataset(
+            data_vars={
+                name: ((time_var_str,) + dims, data[k].reshape(shape))
+                for k, name in enumerate(names)
+            },
+            coords={
+                time_var_str: df[time_var_str].values[:1],
+                dims[0]: axes[0],
+                dims[1]: axes[1],
+            },
+        )
+
+def create_ragged_dataset(df, metadata, time_var_str, olat, olon, dtypes=None):
+    """Create a Dataset of the ASCII data as an indexed ragged array: each
+    variable holds the observations on the prevailing grid along the `obs`
+    dimension, in grid order, and integer coordinates hold the position of
+    each observation along each grid dimension and along time. The grid axes
+    are kept as coordinates, so memory grows with the observations and not
+    with the grid, and `densify` gives the Dataset of create_dataset back.
+
+    Args:
+        df (pandas.DataFrame): DataFrame of ASCII data
+        metadata (dict): dict of metadata
+        time_var_str (str): name of time variable
+        olat (float/None): origin latitude
+        olon (float/None): origin longitude
+        dtypes (None/str/dict): dtype policy of the variables, see
+            xradial.dtype_policy.resolve_dtypes
+
+    Returns:
+        xarray.Dataset"""
+
+    dtypes = dtype_policy.resolve_dtypes(dtypes)
+
+    with instrument.stage('reindex') as stage:
+        dims, axes, cells = _grid(df, metadata, olat, olon)
+        order = np.argsort(cells, kind='stable')
+        order = order[cells[order] >= 0]
+        cells = cells[order]
+        stage.cells = cells.size
+
+    with instrument.stage('dataset') as stage:
+        names = [c for c in df.columns if c != time_var_str and c not in dims]
+        index = np.divmod(cells, axes[1].size)
+        stage.cells = cells.size * len(names)
+
+        coords = {
+            time_var_str: df[time_var_str].values[:1],
+            dims[0]: axes[0],
+            dims[1]: axes[1],
+            INDEX_NAME.format(time_var_str): (
+                OBS_DIM, np.zeros(cells.size, dtype=np.int32), {'instance_dimension': time_var_str},
+            ),
+        }
+        for dim, positions in zip(dims, index):
+            coords[INDEX_NAME.format(dim)] = (OBS_DIM, positions.astype(np.int32), {'grid_dimension': dim})
+
+        return xr.Dataset(
+            data_vars={
+                name: (OBS_DIM, _obs_values(df[name].values[order], dtypes.get(name)))
+                for name in names
+            },
+            coords=coords,
+        )
+
+def concat_ragged(datasets, time_var_str):
+    """Concatenate ragged Datasets on the same grid along time, and their
+    observations along `obs`.
+
+    Args:
+        datasets (iterable of xarray.Dataset): ragged Datasets, as from
+            create_ragged_dataset
+        time_var_str (str): name of time variable
+
+    Returns:
+        xarray.Dataset: ragged Dataset, with the attributes of the first
+
+    Raises:
+        ValueError: if the Datasets are not on the same grid"""
+
+    datasets = list(datasets)
+    index = INDEX_NAME.format(time_var_str)
+    first = datasets[0]
+    dims = [d for d in first.dims if d not in (time_var_str, OBS_DIM)]
+
+    offset = 0
+    obs, times = [], []
+    for ds in datasets:
+        for dim in dims:
+            if not ds[dim].equals(first[dim]):
+                raise ValueError("Datasets are on different {} grids".format(dim))
+        ds = ds.assign_coords({index: ds[index].copy(data=ds[index].values + offset)})
+        offset += ds.sizes[time_var_str]
+        obs.append(ds.drop_dims(time_var_str))
+        times.append(ds.drop_dims(OBS_DIM).drop_vars(dims))
+
+    options = dict(data_vars='minimal', coords='minimal', compat='override', combine_attrs='override')
+    return xr.merge(
+        [xr.concat(obs, OBS_DIM, **options), xr.concat(times, time_var_str, **options)],
+        combine_attrs='override',
+    )
+
+def densify(ds, time_var_str):
+    """Put a ragged Dataset, as from create_ragged_dataset, on its dense
+    grid, with empty cells filled with NaN or the fill value of their dtype.
+    Each variable is allocated once and filled with a single assignment.
+
+    Args:
+        ds (xarray.Dataset): ragged Dataset
+        time_var_str (str): name of time variable
+
+    Returns:
+        xarray.Dataset: Dataset with dimensions time and the grid dimensions"""
+
+    dims = tuple(
+        ds[name].attrs['grid_dimension'] for name in ds.coords
+        if 'grid_dimension' in ds[name].attrs
+    )
+    shape = (ds.sizes[time_var_str],) + tuple(ds.sizes[dim] for dim in dims)
+
+    cells = ds[INDEX_NAME.format(time_var_str)].values.astype(np.int64)
+    for dim, size in zip(dims, shape[1:]):
+        cells = cells * size + ds[INDEX_NAME.format(dim)].values
+
+    index_names = [INDEX_NAME.format(dim) for dim in (time_var_str,) + dims]
+    data_vars = {}
+    for name, variable in ds.variables.items():
+        if OBS_DIM not in variable.dims or name in index_names:
+            continue
+        a = np.full(np.prod(shape), dtype_policy.fill_value(variable.dtype), dtype=variable.dtype)
+        a[cells] = variable.values
+        data_vars[name] = xr.Variable((time_var_str,) + dims, a.reshape(shape), variable.attrs, variable.encoding)
+
+    dense = ds.drop_dims(OBS_DIM)
+    dense.update(data_vars)
+    # data variables in the order of the ragged Dataset
+    return dense[[name for name in ds.data_vars if name in dense.data_vars]].assign_attrs(ds.attrs)
+
+def grid_cells(axes, coords):
+    """Find the flat index of the grid cell each row falls in. Rows must match
+    a grid coordinate exactly, as with pandas reindexing; rows which don't are
+    marked with -1.
+
+    Args:
+        axes (tuple of numpy.ndarray): sorted coordinates of the two grid axes
+        coords (tuple of numpy.ndarray): grid coordinates of each row
+
+    Returns:
+        numpy.ndarray: flat cell index of each row (int64)"""
+
+    slots = []
+    valid = np.ones(coords[0].size, dtype=bool)
+    for axis, values in zip(axes, coords):
+        slot = np.searchsorted(axis, values)
+        np.clip(slot, 0, axis.size - 1, out=slot)
+        valid &= axis[slot] == values
+        slots.append(slot)
+
+    cells = slots[0] * axes[1].size + slots[1]
+    cells[~valid] = -1
+
+    # pandas refuses to reindex duplicate labels, so refuse here too
+    on_grid = cells[valid]
+    if np.unique(on_grid).size != on_grid.size:
+        raise ValueError("cannot reindex on an axis with duplicate labels")
+
+    return cells
+
+def scatter(cells, values, size, dtypes=None):
+    """Scatter the rows of a 2-D array of values into dense grids, one per
+    column, filled with NaN or the fill value of their dtype.
+
+    Args:
+        cells (numpy.ndarray): flat cell index of each row, -1 if off the grid
+        values (numpy.ndarray): 2-D array of shape (rows, variables)
+        size (int): number of cells in the grid
+        dtypes (list/None): dtype of each column, None for float64
+
+    Returns:
+        list of numpy.ndarray: flat grid of each column, of length size"""
+
+    valid = cells >= 0
+    on_grid = cells[valid]
+    values = values[valid]
+
+    out = []
+    for k in range(values.shape[1]):
+        dtype = np.dtype(np.float64) if dtypes is None or dtypes[k] is None else dtypes[k]
+        a = np.full(size, dtype_policy.fill_value(dtype), dtype=dtype)
+        a[on_grid] = dtype_policy.cast(values[:, k], dtype)
+        out.append(a)
+
+    return out
+
+def _grid(df, metadata, olat, olon):
+    """Prevailing grid of a DataFrame and the flat cell index of each row.
+
+    Returns:
+        tuple: names of the two grid dimensions (tuple of str), sorted
+            coordinates of the two grid axes (tuple of numpy.ndarray) and the
+            cell of each row, as from grid_cells"""
+
+    dims, template, coords = dataframe.get_grid(df, metadata, olat, olon)
+
+    if template is None: # single range/bearing, nothing to reindex
+        axes = tuple(c[:1] for c in coords)
+    else:
+        axes = template.axes
+
+    return dims, axes, grid_cells(axes, coords)
+
+def _obs_values(values, dtype):
+    """Values of observations in a dtype, float64 if None."""
+
+    return values.astype(np.float64) if dtype is None else dtype_policy.cast(values, dtype)
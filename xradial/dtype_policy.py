@@ -0,0 +1,157 @@
+#!/usr/bin/python
+"""
+Module containing the dtype policies of radial variables.
+
+By default every variable is float64. The 'compact' policy stores integer
+codes as small ints, with a CF `_FillValue` marking empty grid cells instead
+of NaN, and measurements as float32; coordinates keep float64 so that the
+grid is unchanged. Times are written as float64 seconds since 1970 unless
+their Dataset says otherwise.
+"""
+
+import numpy as np
+
+# built-in map of column codes to compact dtypes
+COMPACT_DTYPES = {
+    # integer codes and counts
+    'VFLG': np.int16,
+    'ERSC': np.int16,
+    'ERTC': np.int16,
+    'SPRC': np.int16,
+    # measurements
+    'VELU': np.float32,
+    'VELV': np.float32,
+    'VELO': np.float32,
+    'HEAD': np.float32,
+    'ESPC': np.float32,
+    'ETMP': np.float32,
+    'MAXV': np.float32,
+    'MINV': np.float32,
+    'EVAR': np.float32,
+    'EACC': np.float32,
+    'XDST': np.float32,
+    'YDST': np.float32,
+}
+
+# units of the time coordinate of a Dataset which has none in its encoding;
+# xarray would otherwise pick them from the first times written, e.g. whole
+# days, in which later times can't be represented
+DEFAULT_TIME_UNITS = 'seconds since 1970-01-01 00:00:00'
+
+# netCDF default fill values of integer types
+_INT_FILL_VALUES = {
+    np.dtype(np.int8): -127,
+    np.dtype(np.int16): -32767,
+    np.dtype(np.int32): -2147483647,
+    np.dtype(np.int64): -9223372036854775806,
+}
+
+def resolve_dtypes(dtypes):
+    """Turn a dtype policy into a map of column codes to numpy dtypes.
+
+    Args:
+        dtypes (None/str/dict): None keeps float64 everywhere, 'compact' uses
+            COMPACT_DTYPES, and a dict maps column codes to dtypes
+
+    Returns:
+        dict: column code: numpy.dtype"""
+
+    if dtypes is None:
+        return {}
+    if isinstance(dtypes, str):
+        if dtypes != 'compact':
+            raise ValueError("Unknown dtype policy {}, expected 'compact' or a dict".format(dtypes))
+        dtypes = COMPACT_DTYPES
+
+    return {k: np.dtype(v) for k, v in dtypes.items()}
+
+def time_encoding(variable):
+    """Encoding of a time coordinate when writing it out. An encoding given
+    to xarray replaces the one of the variable, so its units, dtype and
+    calendar are carried over, with DEFAULT_TIME_UNITS and float64 where it
+    has none.
+
+    Args:
+        variable (xarray.Variable): time coordinate
+
+    Returns:
+        dict"""
+
+    encoding = {
+        'units': variable.encoding.get('units', DEFAULT_TIME_UNITS),
+        'dtype': variable.encoding.get('dtype', np.dtype(np.float64)),
+    }
+    if 'calendar' in variable.encoding:
+        encoding['calendar'] = variable.encoding['calendar']
+    return encoding
+
+def fill_value(dtype):
+    """Value marking an empty grid cell: NaN for floats, the netCDF default
+    fill value for integers.
+
+    Args:
+        dtype (numpy.dtype)
+
+    Returns:
+        scalar of the dtype"""
+
+    dtype = np.dtype(dtype)
+    if dtype.kind == 'f':
+        return dtype.type(np.nan)
+    if dtype in _INT_FILL_VALUES:
+        return dtype.type(_INT_FILL_VALUES[dtype])
+    raise ValueError("Unsupported dtype {}".format(dtype))
+
+def cast(values, dtype):
+    """Cast an array to a dtype, replacing NaN with the fill value of integer
+    dtypes.
+
+    Args:
+        values (numpy.ndarray)
+        dtype (numpy.dtype)
+
+    Returns:
+        numpy.ndarray"""
+
+    dtype = np.dtype(dtype)
+    if dtype.kind == 'i' and values.dtype.kind == 'f':
+        missing = np.isnan(values)
+        if missing.any():
+            values = np.where(missing, fill_value(dtype), values)
+
+    return values.astype(dtype, copy=False)
+
+def cast_dataframe(df, dtypes):
+    """Cast the columns of a DataFrame named in a dtype map, in place.
+
+    Args:
+        df (pandas.DataFrame)
+        dtypes (dict): column code: numpy.dtype, as from resolve_dtypes"""
+
+    for name, dtype in dtypes.items():
+        if name in df and df[name].dtype != dtype:
+            df[name] = cast(df[name].values, dtype)
+
+def apply_dtypes(ds, dtypes):
+    """Cast the variables of a Dataset named in a dtype map, in place, and
+    set the `_FillValue` attribute of integer variables.
+
+    Args:
+        ds (xarray.Dataset)
+        dtypes (dict): column code: numpy.dtype, as from resolve_dtypes"""
+
+    for name, dtype in dtypes.items():
+        if name not in ds.data_vars:
+            continue
+        if ds[name].dtype != dtype:
+            ds[name] = ds[name].copy(data=cast(ds[name].values, dtype))
+        set_fill_value(ds[name])
+
+def set_fill_value(variable):
+    """Set the `_FillValue` attribute of an integer variable, in place.
+
+    Args:
+        variable (xarray.DataArray/xarray.Variable)"""
+
+    if variable.dtype.kind == 'i':
+        variable.attrs['_FillValue'] = fill_value(variable.dtype)
@@ -0,0 +1,196 @@
+#!/usr/bin/python
+"""
+Module containing cached grid templates used to reindex radial data.
+
+A site produces the same range/bearing grid for every file it writes, so
+each range/bearing grid is built once per site configuration and kept in a
+bounded LRU cache. Lat/lon slot grids are numbered from the minimum lat/lon
+of each file, so their templates are only shared by files with the same
+minimum lat/lon; the lat/lon extent of each site is cached either way.
+"""
+
+import collections
+import functools
+import numpy as np
+import pandas as pd
+import xradial.utils as utils # helper functions
+
+# maximum number of grid templates (and lat/lon extents) kept in memory
+GRID_CACHE_SIZE = 256
+
+# site configuration a grid template is built from. `anchor` pins the grid
+# lattice to the observations: the first bearing and range of the lattice for
+# range/bearing grids (above 0, or 0 if it was observed), or the minimum lat/lon and their spacing for lat/lon
+# grids; `origin` is only needed, and only set, for lat/lon grids
+GridKey = collections.namedtuple(
+    'GridKey',
+    ['mode', 'origin', 'angular_res', 'range_res', 'max_range', 'anchor']
+)
+
+# `axes` holds the two (read-only) coordinate arrays of the grid, `codes` the
+# integer codes of their cartesian product, as used by pandas.MultiIndex
+GridTemplate = collections.namedtuple('GridTemplate', ['key', 'axes', 'codes'])
+
+def _first_lattice_value(start, step):
+    """Smallest positive value of the lattice `start + k*step`, calculated the
+    same way as the final element of `np.arange(start, 0, -step)`.
+
+    Args:
+        start (float): any point on the lattice
+        step (float): lattice spacing
+
+    Returns:
+        float"""
+
+    return start - (np.ceil(start / step) - 1) * step
+
+def range_bearing_template(bmin, angular_res, rmin, rres_km, rres_precision, max_range):
+    """Get the template of a range/bearing grid, covering bearings from 0 to
+    360 degrees and ranges from 0 to the maximum range.
+
+    Args:
+        bmin (float): minimum bearing seen in the data
+        angular_res (float): angular resolution
+        rmin (float): minimum range seen in the data
+        rres_km (float): range resolution (kilometers)
+        rres_precision (int): range resolution precision
+        max_range (float): maximum range of data
+
+    Returns:
+        GridTemplate"""
+
+    key = GridKey(
+        'range_bearing',
+        None,
+        float(angular_res),
+        (float(rres_km), rres_precision),
+        float(max_range),
+        (
+            float(0. if bmin == 0 else _first_lattice_value(bmin, angular_res)),
+            float(np.round(_first_lattice_value(rmin, rres_km), rres_precision)),
+        ),
+    )
+    return get_template(key)
+
+def lat_lon_template(olon, olat, max_range, lat0, lon0, lat_res, lon_res):
+    """Get the template of a lat/lon slot grid, covering the extent reached
+    by the maximum range around the origin.
+
+    Args:
+        olon (float): origin longitude
+        olat (float): origin latitude
+        max_range (float): maximum range of data
+        lat0 (float): minimum latitude seen in the data (slot 0)
+        lon0 (float): minimum longitude seen in the data (slot 0)
+        lat_res (float): latitude spacing of the slots
+        lon_res (float): longitude spacing of the slots
+
+    Returns:
+        GridTemplate"""
+
+    key = GridKey(
+        'lat_lon',
+        (float(olat), float(olon)),
+        None,
+        None,
+        float(max_range),
+        (float(lat0), float(lon0), float(lat_res), float(lon_res)),
+    )
+    return get_template(key)
+
+@functools.lru_cache(maxsize=GRID_CACHE_SIZE)
+def get_template(key):
+    """Build the grid template for a site configuration, or fetch it from
+    the cache if it has been built before.
+
+    Args:
+        key (GridKey): site configuration
+
+    Returns:
+        GridTemplate"""
+
+    if key.mode == 'range_bearing':
+        axes = _range_bearing_axes(key)
+    elif key.mode == 'lat_lon':
+        axes = _lat_lon_axes(key)
+    else:
+        raise ValueError("Unknown grid mode {}".format(key.mode))
+
+    for a in axes:
+        a.flags.writeable = False # templates are shared, don't let them change
+
+    codes = tuple(
+        c.ravel() for c in np.meshgrid(
+            np.arange(axes[0].size),
+            np.arange(axes[1].size),
+            indexing='ij'
+        )
+    )
+    for c in codes:
+        c.flags.writeable = False
+
+    return GridTemplate(key, axes, codes)
+
+def _range_bearing_axes(key):
+    """Bearings and ranges of a range/bearing grid."""
+
+    angular_res = key.angular_res
+    rres_km, rres_precision = key.range_res
+    bearing0, range0 = key.anchor
+
+    bearings = np.arange(bearing0, 360.1, angular_res)
+    ranges = np.unique(np.arange(range0, key.max_range + 0.01, rres_km).round(decimals=rres_precision))
+
+    return bearings, ranges
+
+def _lat_lon_axes(key):
+    """Longitude and latitude slots of a lat/lon grid."""
+
+    lat0, lon0, lat_res, lon_res = key.anchor
+    _, max_lat, _, max_lon = lat_lon_extent(*key.origin, key.max_range)
+
+    lon_slots = np.arange(int(np.ceil((max_lon - lon0) / lon_res)))
+    lat_slots = np.arange(int(np.ceil((max_lat - lat0) / lat_res)))
+
+    return lon_slots, lat_slots
+
+@functools.lru_cache(maxsize=GRID_CACHE_SIZE)
+def lat_lon_extent(olat, olon, max_range):
+    """Calculate the lat/lon extent reached by the maximum range around the
+    origin.
+
+    Args:
+        olat (float): origin latitude
+        olon (float): origin longitude
+        max_range (float): maximum range of data
+
+    Returns:
+        tuple of float: min lat, max lat, min lon, max lon"""
+
+    lons, lats = utils.rb2ll(olon, olat, max_range, [180, 0, 270, 90])
+    return float(lats[0]), float(lats[1]), float(lons[2]), float(lons[3])
+
+def product_index(template, time, names):
+    """Create the MultiIndex of a single time and the grid of a template,
+    reusing the template's cached codes instead of a fresh cartesian product.
+
+    Args:
+        template (GridTemplate): grid template
+        time (datetime-like): time of the data
+        names (list of str): names of the time and the two grid levels
+
+    Returns:
+        pandas.MultiIndex"""
+
+    return pd.MultiIndex(
+        levels=[[time], *template.axes],
+        codes=[np.zeros(template.codes[0].size, dtype=np.int8), *template.codes],
+        names=names,
+        verify_integrity=False,
+    )
+
+def clear_cache():
+    """Empty the grid template and extent caches."""
+
+    get_template.cache_clear()
+    lat_lon_extent.cache_clear()
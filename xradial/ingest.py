@@ -0,0 +1,149 @@
+#!/usr/bin/python
+"""
+Module containing incremental ingestion of a directory of radial files.
+
+Each run converts only the files which are new or changed since the last run
+and hands their Datasets to a sink. Which files have been ingested, with their
+size, modification time and content hash, is checkpointed in a local SQLite
+state store after each file, so an interrupted run picks up where it stopped.
+"""
+
+import collections
+import contextlib
+import hashlib
+import os
+import sqlite3
+import xradial.batch as batch # batch conversion
+import xradial.catalog as catalog # archive scanning
+import xradial.netcdf as netcdf # NetCDF sink
+
+# outcome of ingesting one file; `output` is what the sink returned, and
+# exactly one of `output` and `error` is set
+IngestResult = collections.namedtuple('IngestResult', ['path', 'output', 'error'])
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ingested (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    sha256 TEXT NOT NULL,
+    output TEXT
+);
+"""
+
+# the NetCDF sink lives with the NetCDF export; kept here too, where
+# ingestion first offered it
+NetCDFSink = netcdf.NetCDFSink
+
+@contextlib.contextmanager
+def connect(state_path):
+    """Open the ingestion state store, creating its table if needed, and
+    commit on success.
+
+    Args:
+        state_path (str): path to the SQLite database
+
+    Yields:
+        sqlite3.Connection"""
+
+    conn = sqlite3.connect(state_path)
+    try:
+        conn.executescript(_SCHEMA)
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+def ingest_directory(directories, state_path, sink, time_var_str, cf_time_units,
+    numerical_metadata=False, patterns=catalog.RADIAL_PATTERNS, workers=1, **kwargs):
+    """Convert the radial files under directories which are new or changed
+    since the last run, and pass their Datasets to a sink.
+
+    A file is changed if its size or modification time differ from the state
+    store and its content hash differs too, so touched but identical files
+    are not converted again. A file is recorded as ingested only once the
+    sink has returned; files which fail are reported and retried next run.
+
+    Args:
+        directories (str/iterable of str): directories to scan, recursively
+        state_path (str): path to the SQLite state store
+        sink (callable): called as sink(path, dataset) for each converted
+            file, in the worker process which converted it, e.g. an
+            xradial.netcdf.NetCDFSink; its return value is recorded as the
+            output. Must be picklable unless workers is 1
+        time_var_str (str): name of time variable
+        cf_time_units (str): string describing the units of the time variable
+        numerical_metadata (bool): indicator to convert metadata to numeric types
+        patterns (iterable of str): file name patterns of radial files
+        workers (int/None): number of conversion processes, see
+            xradial.batch.convert_files
+        **kwargs: further keyword arguments of create_xarray_dataset
+
+    Returns:
+        list of IngestResult: one per new or changed file, in scan order"""
+
+    if isinstance(directories, (str, os.PathLike)):
+        directories = [directories]
+    directories = [os.path.abspath(d) for d in directories]
+
+    results = []
+    with connect(state_path) as conn:
+        known = {
+            path: (size, mtime, sha256)
+            for path, size, mtime, sha256 in conn.execute("SELECT path, size, mtime, sha256 FROM ingested")
+        }
+
+        todo = {} # path: (size, mtime, sha256)
+        for path in catalog.find_radial_files(directories, patterns):
+            st = os.stat(path)
+            state = known.get(path)
+            if state is not None and state[:2] == (st.st_size, st.st_mtime):
+                continue
+
+            digest = file_hash(path)
+            if state is not None and state[2] == digest:
+                # touched but unchanged
+                conn.execute(
+                    "UPDATE ingested SET size = ?, mtime = ? WHERE path = ?",
+                    (st.st_size, st.st_mtime, path)
+                )
+                continue
+            todo[path] = (st.st_size, st.st_mtime, digest)
+        conn.commit()
+
+        # the sink runs in the worker processes, so Datasets are never sent
+        # back; the state store is only written here
+        converted = batch.convert_files(
+            list(todo), time_var_str, cf_time_units, numerical_metadata,
+            workers=workers, sink=sink, **kwargs
+        )
+        for r in converted:
+            if r.error is not None:
+                results.append(IngestResult(r.path, None, r.error))
+                continue
+
+            conn.execute(
+                "INSERT OR REPLACE INTO ingested (path, size, mtime, sha256, output) VALUES (?, ?, ?, ?, ?)",
+                (r.path,) + todo[r.path] + (None if r.output is None else str(r.output),)
+            )
+            conn.commit() # checkpoint each file
+            results.append(IngestResult(r.path, r.output, None))
+
+    return results
+
+def file_hash(path, blocksize=1 << 20):
+    """SHA-256 of the content of a file.
+
+    Args:
+        path (str): path to the file
+        blocksize (int): number of bytes read at a time
+
+    Returns:
+        str: hex digest"""
+
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(blocksize), b''):
+            h.update(block)
+
+    return h.hexdigest()
@@ -0,0 +1,256 @@
+#!/usr/bin/python
+"""
+Module containing the instrumentation hooks of the conversion pipeline.
+
+Each stage of `create_xarray_dataset` (read, header, table, reindex, dataset,
+attributes) runs in a `stage` block. When a listener is attached, every block reports a
+StageEvent to it with its wall time and what it handled: bytes read, rows
+parsed, grid cells allocated and, if asked for, its peak Python memory. With
+no listener attached a block costs one check of an empty list.
+
+Listeners are plain callables taking a StageEvent. They are process-wide, so
+they see conversions in all threads but not those of the worker processes
+of xradial.batch. tracemalloc is process-wide too: it runs while any stage
+takes memory, and when stages of several threads overlap, each reports the
+peak of the whole process since the first of them started.
+"""
+
+import collections
+import contextlib
+import contextvars
+import logging
+import os
+import threading
+import time
+import tracemalloc
+
+# what one stage of the conversion of one file did; `bytes_read`, `rows`,
+# `cells` and `peak_bytes` are None where they don't apply. `bytes_read` is
+# the size of the contents once decompressed, which is larger than the file
+# for compressed files
+StageEvent = collections.namedtuple(
+    'StageEvent',
+    ['stage', 'path', 'seconds', 'bytes_read', 'rows', 'cells', 'peak_bytes'],
+)
+
+_log = logging.getLogger(__name__)
+
+# attached listeners, as (callable, memory) pairs
+_listeners = []
+
+# stages taking memory which are running, in any thread, and whether
+# tracemalloc was started for them (rather than by someone else)
+_tracing_lock = threading.Lock()
+_tracing_stages = 0
+_started_tracing = False
+
+# file being converted, as reported in the events
+_current_path = contextvars.ContextVar('xradial_instrument_path', default=None)
+
+def add_listener(listener, memory=False):
+    """Attach a listener to the stages of all conversions.
+
+    Args:
+        listener (callable): called with a StageEvent at the end of each stage
+        memory (bool): also take the peak Python memory of each stage with
+            tracemalloc, which slows allocations down while it is on"""
+
+    _listeners.append((listener, memory))
+
+def remove_listener(listener):
+    """Detach a listener attached with add_listener."""
+
+    _listeners[:] = [(f, m) for f, m in _listeners if f is not listener]
+
+@contextlib.contextmanager
+def listening(listener, memory=False):
+    """Attach a listener for the duration of a with block.
+
+    Args:
+        listener (callable): called with a StageEvent at the end of each stage
+        memory (bool): also take the peak Python memory of each stage"""
+
+    add_listener(listener, memory)
+    try:
+        yield listener
+    finally:
+        remove_listener(listener)
+
+@contextlib.contextmanager
+def converting(path):
+    """Name the file the stages inside a with block belong to.
+
+    Args:
+        path (str/os.PathLike/file-like): path to the file, or a file-like
+            object, named by its `name` if it has one"""
+
+    if isinstance(path, os.PathLike):
+        path = os.fsdecode(path)
+    elif not isinstance(path, str):
+        path = getattr(path, 'name', None)
+    token = _current_path.set(path)
+    try:
+        yield
+    finally:
+        _current_path.reset(token)
+
+def stage(name):
+    """Context manager timing one stage of a conversion. The object it
+    yields takes the counts of the stage as attributes, `bytes_read`, `rows`
+    and `cells`, which are ignored when no listener is attached.
+
+    Args:
+        name (str): name of the stage
+
+    Returns:
+        context manager"""
+
+    if not _listeners:
+        return _NULL_STAGE
+    return _Stage(name)
+
+class _NullStage(object):
+    """Stage of a conversion nobody listens to."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+_NULL_STAGE = _NullStage()
+
+class _Stage(object):
+    """Stage of a conversion, reported to the listeners when it ends."""
+
+    def __init__(self, name):
+        self.name = name
+        self.bytes_read = None
+        self.rows = None
+        self.cells = None
+
+    def __enter__(self):
+        self._memory = any(m for _, m in _listeners)
+        if self._memory:
+            self._base = _start_tracing()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self._start
+        peak = None
+        if self._memory:
+            peak = _stop_tracing() - self._base
+
+        # a stage which failed did not finish, so it is not reported
+        if exc_type is None:
+            _emit(StageEvent(
+                self.name,
+                _current_path.get(),
+                seconds,
+                self.bytes_read,
+                self.rows,
+                self.cells,
+                peak,
+            ))
+        return False
+
+def _start_tracing():
+    """Count a stage taking memory in, starting tracemalloc for the first
+    one; the peak is only reset when no other stage is running, so as not to
+    lower theirs.
+
+    Returns:
+        int: traced memory when the stage starts"""
+
+    global _tracing_stages, _started_tracing
+
+    with _tracing_lock:
+        if not _tracing_stages:
+            _started_tracing = not tracemalloc.is_tracing()
+            if _started_tracing:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+        _tracing_stages += 1
+        return tracemalloc.get_traced_memory()[0]
+
+def _stop_tracing():
+    """Count a stage taking memory out, stopping tracemalloc after the last
+    one if it was started for them.
+
+    Returns:
+        int: peak traced memory"""
+
+    global _tracing_stages
+
+    with _tracing_lock:
+        peak = tracemalloc.get_traced_memory()[1]
+        _tracing_stages -= 1
+        if not _tracing_stages and _started_tracing:
+            tracemalloc.stop()
+        return peak
+
+def _emit(event):
+    """Hand an event to all listeners; a listener which fails is logged and
+    does not stop the conversion."""
+
+    for listener, _ in list(_listeners):
+        try:
+            listener(event)
+        except Exception:
+            _log.exception("Instrumentation listener %r failed", listener)
+
+class LoggingListener(object):
+    """Listener writing one log record per stage.
+
+    Args:
+        logger (logging.Logger/None): logger to write to, that of this
+            module if None
+        level (int): level of the records"""
+
+    def __init__(self, logger=None, level=logging.INFO):
+        self.logger = logger or _log
+        self.level = level
+
+    def __call__(self, event):
+        if not self.logger.isEnabledFor(self.level):
+            return
+        counts = ''.join(
+            ' {}={}'.format(field, getattr(event, field))
+            for field in ('bytes_read', 'rows', 'cells', 'peak_bytes')
+            if getattr(event, field) is not None
+        )
+        self.logger.log(
+            self.level,
+            "xradial %s %.3f ms%s path=%s",
+            event.stage,
+            event.seconds * 1e3,
+            counts,
+            event.path,
+        )
+
+class MetricsListener(object):
+    """Listener sending each measure of a stage to a metrics sink, as
+    '<prefix>.<stage>.<measure>', e.g. 'xradial.table.seconds'.
+
+    Args:
+        emit (callable): called as emit(name, value, tags), with tags a dict
+            holding the path of the file, e.g. a wrapper of a statsd or
+            Prometheus client
+        prefix (str): prefix of the metric names"""
+
+    def __init__(self, emit, prefix='xradial'):
+        self.emit = emit
+        self.prefix = prefix
+
+    def __call__(self, event):
+        tags = {'path': event.path}
+        for field in ('seconds', 'bytes_read', 'rows', 'cells', 'peak_bytes'):
+            value = getattr(event, field)
+            if value is not None:
+                self.emit('{}.{}.{}'.format(self.prefix, event.stage, field), value, tags)
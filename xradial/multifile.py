@@ -0,0 +1,381 @@
+#!/usr/bin/python
+"""
+Module containing the multi-file Dataset builder.
+
+Many ASCII radial files are stacked along time into a single Dataset: the
+union grid is worked out once, each variable is allocated once for the whole
+set of files, and each file is scattered into its time slice.
+"""
+
+import collections
+import numpy as np
+import xarray as xr
+import xradial.dataframe as dataframe # dataframe operations
+import xradial.dataset as dataset # dataset operations
+import xradial.dtype_policy as dtype_policy # compact dtypes
+import xradial.grid as grid # cached grid templates
+import xradial.reader as reader # single-pass file reading
+import xradial.utils as utils # helper functions
+import xradial.xradial
+
+# prefix of the variables holding header values which differ between files
+HEADER_VAR_PREFIX = 'header_'
+
+# a parsed file, before it is put on the grid
+RadialFrame = collections.namedtuple(
+    'RadialFrame',
+    ['path', 'metadata', 'time', 'olat', 'olon', 'antb', 'df']
+)
+
+def open_mfradial(paths, time_var_str, cf_time_units, numerical_metadata=False,
+    chunks=None, dtypes=None, variables=None):
+    """Open many ASCII radial files as a single Dataset stacked along time,
+    in the order the files are given.
+
+    All files are put on the union of their grids. Origin and antenna bearing
+    are kept per time in OLAT, OLON and ANTB; header values shared by all
+    files become attributes, and those which differ become variables along
+    time named with HEADER_VAR_PREFIX.
+
+    With `chunks`, variables are dask arrays and only the headers are read up
+    front, plus one file per distinct site configuration to fix the grid;
+    each chunk of files along time is parsed when (and only if) it is
+    computed. Lat/lon slots are then anchored at the south-west extent of the
+    maximum range, so that they cover any file from the site.
+
+    Args:
+        paths (iterable of str/bytes-like/file-like): paths to ASCII data,
+            contents of files as bytes, bytearray or memoryview, or binary
+            file-like objects, which are read into memory up front
+        time_var_str (str): name of time variable
+        cf_time_units (str): string describing the units of the time variable
+        numerical_metadata (bool): indicator to convert metadata to numeric types
+        chunks (int/dict/None): number of files per dask chunk along time, as
+            an int or a dict like {time_var_str: int}; None loads eagerly
+        dtypes (None/str/dict): dtype policy of the variables, see
+            xradial.dtype_policy.resolve_dtypes
+        variables (iterable of str/None): variables to load, all if None; see
+            xradial.dataframe.select_columns
+
+    Returns:
+        xarray.Dataset"""
+
+    # streams can't be read twice, as the header scan and the table do
+    paths = [reader.reusable(p) for p in paths]
+    if not paths:
+        raise ValueError("No files to open")
+    dtypes = dtype_policy.resolve_dtypes(dtypes)
+
+    if chunks is None:
+        frames = [read_frame(p, time_var_str, numerical_metadata, variables) for p in paths]
+        metadatas = [f.metadata for f in frames]
+
+        dims, axes, coords, _ = union_grid(frames)
+        names = _union_columns(
+            (f.df.columns for f in frames),
+            time_var_str,
+            dims,
+        )
+        data = _fill(frames, coords, axes, names, dtypes)
+        del frames
+    else:
+        if isinstance(chunks, dict):
+            chunks = chunks[time_var_str]
+
+        # header scan; stops at 'TableStart:' with numeric metadata
+        metadatas = [utils.get_metadata_from_file(p, numerical_metadata) for p in paths]
+
+        dims, axes, lattice = header_grid(paths, metadatas, time_var_str, numerical_metadata)
+        names = _union_columns(
+            (dataframe.select_columns(m['TableColumnTypes'].split(), variables) for m in metadatas),
+            time_var_str,
+            dims,
+        )
+        data = _lazy_data(paths, time_var_str, numerical_metadata, dims, axes, lattice, names, chunks, dtypes, variables)
+
+    ds = xr.Dataset(
+        data_vars={name: ((time_var_str,) + dims, data.pop(name)) for name in names},
+        coords={
+            time_var_str: np.array([utils.create_time(m) for m in metadatas], dtype='datetime64[ns]'),
+            dims[0]: axes[0],
+            dims[1]: axes[1],
+        },
+    )
+
+    origins = [utils.get_olat_olon(m) for m in metadatas]
+    ds.update({
+        'OLAT': ([time_var_str], [o[0] for o in origins]),
+        'OLON': ([time_var_str], [o[1] for o in origins]),
+        'ANTB': ([time_var_str], [utils.get_antenna_bearing(m) for m in metadatas]),
+    })
+
+    attrs, varying = split_metadata(metadatas)
+    ds.update({
+        HEADER_VAR_PREFIX + k: ([time_var_str], v) for k, v in varying.items()
+    })
+    ds.attrs = attrs
+    dtype_policy.apply_dtypes(ds, dtypes)
+
+    ds[time_var_str].encoding.update({'dtype': 'float64', 'units': cf_time_units})
+    xradial.xradial.add_long_names(ds)
+
+    return ds
+
+def read_frame(path, time_var_str, numerical_metadata=False, variables=None):
+    """Read an ASCII radial file into a RadialFrame.
+
+    Args:
+        path (str/bytes-like/file-like): path to ASCII data, contents of a
+            file, or a binary file-like object
+        time_var_str (str): name of time variable
+        numerical_metadata (bool): indicator to convert metadata to numeric types
+        variables (iterable of str/None): columns to parse, all if None
+
+    Returns:
+        RadialFrame"""
+
+    metadata, table = reader.read_radial(path, numerical_metadata)
+    dt = utils.create_time(metadata)
+    olat, olon = utils.get_olat_olon(metadata)
+    antb = utils.get_antenna_bearing(metadata)
+    df = dataframe.create_dataframe(table, time_var_str, dt, metadata, variables=variables)
+
+    return RadialFrame(path, metadata, dt, olat, olon, antb, df)
+
+def union_grid(frames, extend=False):
+    """Work out the grid covering all frames, and the grid coordinates of the
+    rows of each frame on it. All frames must share the same kind of grid.
+
+    Range/bearing grids are merged as the union of their bearings and ranges.
+    Lat/lon slots are placed on a lattice common to all frames, anchored at
+    their minimum latitude and longitude, or with `extend` at the minimum
+    latitude and longitude reached by their maximum range.
+
+    Args:
+        frames (list of RadialFrame): parsed files
+        extend (bool): extend lat/lon lattices to the full extent of the
+            maximum range
+
+    Returns:
+        tuple: names of the two grid dimensions (tuple of str), coordinates of
+            the two grid axes (tuple of numpy.ndarray), the grid coordinates
+            of the rows of each frame (list of tuple), and the lat/lon lattice
+            (tuple/None)"""
+
+    lat_lon = [dataframe.is_lat_lon_grid(f.df) for f in frames]
+    if any(lat_lon) and not all(lat_lon):
+        raise ValueError("Files mix lat/lon and range/bearing grids")
+
+    if all(lat_lon):
+        lattices = np.array([
+            _extended_lattice(f) if extend else dataframe.lat_lon_lattice(f.df)
+            for f in frames
+        ])
+        lattice = tuple(lattices.min(axis=0))
+
+        axes = (np.arange(0), np.arange(0))
+        coords = []
+        for f in frames:
+            max_range = utils.calc_max_range(f.metadata)
+            i, j, template = dataframe.lat_lon_slots(f.df, f.olat, f.olon, max_range, lattice)
+            axes = tuple(a if a.size >= t.size else t for a, t in zip(axes, template.axes))
+            coords.append((i, j))
+
+        return ('i', 'j'), axes, coords, lattice
+
+    bearings, ranges = [], []
+    coords = []
+    for f in frames:
+        dims, template, c = dataframe.get_grid(f.df, f.metadata, f.olat, f.olon)
+        axes = template.axes if template is not None else tuple(np.unique(v) for v in c)
+        bearings.append(axes[0])
+        ranges.append(axes[1])
+        coords.append(c)
+
+    axes = tuple(np.unique(np.concatenate(_distinct(a))) for a in (bearings, ranges))
+
+    return ('BEAR', 'RNGE'), axes, coords, None
+
+def header_grid(paths, metadatas, time_var_str, numerical_metadata=False):
+    """Work out the grid covering all files from their headers, reading only
+    the first file of each distinct site configuration.
+
+    Args:
+        paths (list of str): paths to ASCII data
+        metadatas (list of dict): metadata of each file
+        time_var_str (str): name of time variable
+        numerical_metadata (bool): indicator to convert metadata to numeric types
+
+    Returns:
+        tuple: names of the two grid dimensions (tuple of str), coordinates of
+            the two grid axes (tuple of numpy.ndarray), and the lat/lon lattice
+            (tuple/None)"""
+
+    representatives = {}
+    for path, metadata in zip(paths, metadatas):
+        representatives.setdefault(site_config(metadata), path)
+
+    frames = [read_frame(p, time_var_str, numerical_metadata) for p in representatives.values()]
+    dims, axes, _, lattice = union_grid(frames, extend=True)
+
+    return dims, axes, lattice
+
+def site_config(metadata):
+    """The header values which fix the grid of a site.
+
+    Args:
+        metadata (dict): dict of metadata
+
+    Returns:
+        tuple"""
+
+    return tuple(metadata.get(k) for k in (
+        'Site',
+        'Origin',
+        'AntennaBearing',
+        'AngularResolution',
+        'RangeResolutionKMeters',
+        'RangeResolutionMeters',
+        'RangeEnd',
+        'TransmitCenterFreqMHz',
+    ))
+
+def split_metadata(metadatas):
+    """Split the metadata of many files into the entries shared by all of them
+    and the entries which differ, as lists with one value per file.
+
+    Args:
+        metadatas (list of dict): metadata of each file
+
+    Returns:
+        tuple: shared metadata (dict), differing metadata (dict of list)"""
+
+    keys = list(dict.fromkeys(k for m in metadatas for k in m))
+
+    shared, varying = {}, {}
+    for k in keys:
+        values = [m.get(k) for m in metadatas]
+        if all(_same(v, values[0]) for v in values[1:]):
+            shared[k] = values[0]
+        else:
+            varying[k] = values
+
+    return shared, varying
+
+def _union_columns(columns, time_var_str, dims):
+    """Names of the variables found in any file, in order of appearance."""
+
+    columns = dict.fromkeys(c for cols in columns for c in cols)
+    return [c for c in columns if c != time_var_str and c not in dims]
+
+def _extended_lattice(frame):
+    """Lat/lon lattice of a frame, moved back by whole steps to the minimum
+    latitude and longitude reached by its maximum range."""
+
+    lat0, lon0, lat_res, lon_res = dataframe.lat_lon_lattice(frame.df)
+    min_lat, _, min_lon, _ = grid.lat_lon_extent(frame.olat, frame.olon, utils.calc_max_range(frame.metadata))
+
+    return (
+        lat0 - max(np.floor((lat0 - min_lat) / lat_res), 0) * lat_res,
+        lon0 - max(np.floor((lon0 - min_lon) / lon_res), 0) * lon_res,
+        lat_res,
+        lon_res,
+    )
+
+def _fill(frames, coords, axes, names, dtypes=None):
+    """Allocate each variable once for all frames and scatter the rows of each
+    frame into its time slice.
+
+    Args:
+        frames (list of RadialFrame): parsed files
+        coords (list of tuple): grid coordinates of the rows of each frame
+        axes (tuple of numpy.ndarray): coordinates of the two grid axes
+        names (list of str): names of the variables
+        dtypes (dict/None): dtype of the variables, float64 if not given
+
+    Returns:
+        dict: name: numpy.ndarray of shape (frames, *axes)"""
+
+    shape = (len(frames), axes[0].size, axes[1].size)
+    dtypes = {name: _dtype(name, dtypes) for name in names}
+    data = {
+        name: np.full(shape, dtype_policy.fill_value(dtype), dtype=dtype)
+        for name, dtype in dtypes.items()
+    }
+
+    for k, (frame, c) in enumerate(zip(frames, coords)):
+        cells = dataset.grid_cells(axes, c)
+        on_grid = cells >= 0
+        for name in names:
+            if name in frame.df:
+                data[name][k].reshape(-1)[cells[on_grid]] = dtype_policy.cast(
+                    frame.df[name].values[on_grid], dtypes[name]
+                )
+
+    return data
+
+def _load_chunk(paths, time_var_str, numerical_metadata, dims, axes, lattice, names, dtypes=None,
+    variables=None):
+    """Parse a chunk of files and put them on a fixed grid; runs when a dask
+    chunk is computed.
+
+    Returns:
+        dict: name: numpy.ndarray of shape (paths, *axes)"""
+
+    frames = [read_frame(p, time_var_str, numerical_metadata, variables) for p in paths]
+
+    coords = []
+    for f in frames:
+        if lattice is None:
+            coords.append((f.df[dims[0]].values, f.df[dims[1]].values))
+        else:
+            max_range = utils.calc_max_range(f.metadata)
+            coords.append(dataframe.lat_lon_slots(f.df, f.olat, f.olon, max_range, lattice)[:2])
+
+    return _fill(frames, coords, axes, names, dtypes)
+
+def _lazy_data(paths, time_var_str, numerical_metadata, dims, axes, lattice, names, chunks,
+    dtypes=None, variables=None):
+    """Build dask arrays of each variable, chunked along time, which parse
+    their files when computed.
+
+    Returns:
+        dict: name: dask.array.Array of shape (paths, *axes)"""
+
+    try:
+        import dask
+        import dask.array as da
+    except ImportError:
+        raise ImportError("dask is required to open radial files lazily")
+
+    blocks = {name: [] for name in names}
+    for start in range(0, len(paths), chunks):
+        chunk = paths[start:start + chunks]
+        loaded = dask.delayed(_load_chunk, pure=True)(
+            chunk, time_var_str, numerical_metadata, dims, axes, lattice, names, dtypes, variables
+        )
+        for name in names:
+            blocks[name].append(da.from_delayed(
+                loaded[name],
+                shape=(len(chunk), axes[0].size, axes[1].size),
+                dtype=_dtype(name, dtypes),
+            ))
+
+    return {name: da.concatenate(b, axis=0) for name, b in blocks.items()}
+
+def _dtype(name, dtypes):
+    """dtype of a variable under a dtype map, float64 if it isn't in it."""
+
+    return np.dtype((dtypes or {}).get(name, np.float64))
+
+def _distinct(arrays):
+    """Drop arrays which are the very same object, as cached templates are."""
+
+    return list({id(a): a for a in arrays}.values())
+
+def _same(a, b):
+    """Equality which treats NaN as equal to NaN."""
+
+    if isinstance(a, float) and isinstance(b, float) and np.isnan(a) and np.isnan(b):
+        return True
+    return type(a) == type(b) and a == b
@@ -0,0 +1,188 @@
+#!/usr/bin/python
+"""
+Module containing NetCDF export of radial Datasets with tuned encodings.
+
+Encodings come from presets: 'none' writes the variables as they are and
+contiguous, 'zlib' compresses them losslessly with zlib and byte shuffling,
+and 'packed' also stores velocities as int16 packed with a scale factor,
+integer codes as int16 and other measurements as float32 (see
+xradial.dtype_policy). Compressed variables on the grid are chunked by whole
+radial maps, one time by the whole grid, so that a map is read or written as
+one chunk.
+"""
+
+import os
+import numpy as np
+import xradial.batch as batch # batch conversion
+import xradial.dtype_policy as dtype_policy # dtypes of radial variables
+
+PRESETS = {
+    'none': {},
+    'zlib': {'zlib': True, 'complevel': 4, 'shuffle': True},
+    'packed': {'zlib': True, 'complevel': 4, 'shuffle': True, 'pack': True},
+}
+
+# scale factors of velocities packed as int16 (cm/s); a velocity beyond the
+# range of int16 at this scale keeps float32 instead
+PACKED_VARIABLES = {
+    'VELU': 0.01,
+    'VELV': 0.01,
+    'VELO': 0.01,
+    'MAXV': 0.01,
+    'MINV': 0.01,
+}
+
+_PACKED_FILL_VALUE = dtype_policy.fill_value(np.int16)
+
+def netcdf_encoding(ds, time_var_str, preset='zlib', complevel=None):
+    """Encoding of the variables of a radial Dataset in a NetCDF file.
+
+    Args:
+        ds (xarray.Dataset): Dataset of radials
+        time_var_str (str): name of time variable
+        preset (str): key of PRESETS
+        complevel (int/None): zlib level from 1 to 9, the level of the
+            preset if None
+
+    Returns:
+        dict: variable name: encoding"""
+
+    if preset not in PRESETS:
+        raise ValueError("Unknown preset {}, expected one of {}".format(preset, ', '.join(sorted(PRESETS))))
+    options = dict(PRESETS[preset])
+    pack = options.pop('pack', False)
+    if complevel is not None and options:
+        options['complevel'] = complevel
+    dtypes = dtype_policy.resolve_dtypes('compact' if pack else None)
+
+    encoding = {}
+    for name, variable in ds.variables.items():
+        enc = dict(options) if variable.ndim else {}
+        if options and variable.ndim > 1 and variable.dims[0] == time_var_str:
+            enc['chunksizes'] = (1,) + variable.shape[1:]
+
+        if name == time_var_str:
+            enc.update(dtype_policy.time_encoding(variable))
+        elif name in ds.data_vars:
+            if pack and name in PACKED_VARIABLES and _packable(variable, PACKED_VARIABLES[name]):
+                enc.update(
+                    dtype=np.dtype(np.int16),
+                    scale_factor=PACKED_VARIABLES[name],
+                    add_offset=0.0,
+                    _FillValue=_PACKED_FILL_VALUE,
+                )
+            elif name in dtypes:
+                enc['dtype'] = dtypes[name]
+                if dtypes[name].kind == 'i' and '_FillValue' not in variable.attrs:
+                    enc['_FillValue'] = dtype_policy.fill_value(dtypes[name])
+            elif pack and name in PACKED_VARIABLES:
+                enc['dtype'] = np.dtype(np.float32)
+        encoding[name] = enc
+
+    return encoding
+
+def write_netcdf(ds, path, time_var_str, preset='zlib', complevel=None, **kwargs):
+    """Write a radial Dataset to a NetCDF file with the encoding of a preset.
+    The file is written under a temporary name and renamed when complete.
+
+    Args:
+        ds (xarray.Dataset): Dataset of radials
+        path (str): path of the NetCDF file
+        time_var_str (str): name of time variable
+        preset (str): key of PRESETS
+        complevel (int/None): zlib level, see netcdf_encoding
+        **kwargs: further keyword arguments of xarray.Dataset.to_netcdf
+
+    Returns:
+        str: path of the NetCDF file"""
+
+    kwargs.setdefault('engine', 'netcdf4')
+    encoding = netcdf_encoding(ds, time_var_str, preset, complevel)
+
+    tmp = path + '.part' # never leave a half-written file under the final name
+    ds.to_netcdf(tmp, encoding=encoding, **kwargs)
+    os.replace(tmp, path)
+
+    return path
+
+class NetCDFSink(object):
+    """Sink writing each Dataset to its own NetCDF file in a directory, named
+    after the radial file, optionally with the encoding of a preset.
+    Picklable, so it can run in the worker processes of xradial.batch.
+
+    Args:
+        output_dir (str): directory of the NetCDF files, created if needed
+        preset (str/None): key of PRESETS, or None to write the
+            Datasets with their own encoding
+        time_var_str (str): name of time variable, used with a preset
+        complevel (int/None): zlib level, see netcdf_encoding
+        **kwargs: further keyword arguments of xarray.Dataset.to_netcdf"""
+
+    def __init__(self, output_dir, preset=None, time_var_str='time', complevel=None, **kwargs):
+        self.output_dir = output_dir
+        self.preset = preset
+        self.time_var_str = time_var_str
+        self.complevel = complevel
+        self.kwargs = kwargs
+
+    def __call__(self, path, ds):
+        """Write the Dataset of a radial file.
+
+        Args:
+            path (str): path to ASCII data the Dataset was converted from
+            ds (xarray.Dataset): Dataset of the file
+
+        Returns:
+            str: path of the NetCDF file"""
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        out = os.path.join(self.output_dir, os.path.basename(path) + '.nc')
+
+        if self.preset is not None:
+            return write_netcdf(ds, out, self.time_var_str, self.preset, self.complevel, **self.kwargs)
+
+        tmp = out + '.part' # never leave a half-written file under the final name
+        ds.to_netcdf(tmp, **self.kwargs)
+        os.replace(tmp, out)
+
+        return out
+
+def convert_to_netcdf(paths, output_dir, time_var_str, cf_time_units, numerical_metadata=False,
+    preset='zlib', complevel=None, workers=None, **kwargs):
+    """Convert many ASCII radial files to NetCDF files in parallel. Each
+    worker process converts and writes its files, so Datasets are never sent
+    between processes.
+
+    Args:
+        paths (iterable of str): paths to ASCII data, consumed lazily
+        output_dir (str): directory of the NetCDF files, created if needed
+        time_var_str (str): name of time variable
+        cf_time_units (str): string describing the units of the time variable
+        numerical_metadata (bool): indicator to convert metadata to numeric types
+        preset (str): key of PRESETS
+        complevel (int/None): zlib level, see netcdf_encoding
+        workers (int/None): number of worker processes, see
+            xradial.batch.convert_files
+        **kwargs: further keyword arguments of convert_files
+
+    Yields:
+        xradial.batch.BatchResult: with the path of the NetCDF file as its
+            `output`"""
+
+    sink = NetCDFSink(output_dir, preset, time_var_str, complevel)
+    return batch.convert_files(
+        paths,
+        time_var_str,
+        cf_time_units,
+        numerical_metadata,
+        workers=workers,
+        sink=sink,
+        **kwargs
+    )
+
+def _packable(variable, scale_factor):
+    """Whether the values of a variable fit int16 at a scale factor."""
+
+    limit = (np.iinfo(np.int16).max - 1) * scale_factor
+    with np.errstate(invalid='ignore'):
+        return not (np.abs(variable.values) > limit).any()
@@ -0,0 +1,157 @@
+#!/usr/bin/python
+"""
+Module containing the fast numeric parser of radial tables.
+
+CODAR and WERA write their tables with fixed-width, right-aligned columns,
+each with a fixed number of decimals. A table laid out like that is parsed
+straight from its bytes with a few whole-array operations: the digits of each
+field are combined into an integer mantissa with one matrix product, and
+divided by the power of ten of its decimals. As both are exact in float64,
+every value is correctly rounded, as with pandas.read_csv. Tables which are
+not laid out like that are left to pandas.read_csv.
+"""
+
+import numpy as np
+
+_SPACE, _PLUS, _MINUS, _DOT, _ZERO, _NEWLINE = (ord(c) for c in ' +-.0\n')
+
+# mantissas of up to 15 digits are exact in float64
+_MAX_DIGITS = 15
+
+def parse_fixed_width(buf, names, usecols=None):
+    """Parse a fixed-width numeric table into columns, typed as
+    pandas.read_csv would: int64 if a column has no decimal point, float64
+    otherwise.
+
+    Args:
+        buf (bytes-like): table rows, each ending in a newline; bytes, or a
+            memoryview, e.g. of a memory-mapped file, which is not copied
+            beyond the characters of the table
+        names (list of str): names of the columns
+        usecols (iterable of str/None): names of the columns to convert, all
+            if None; the layout of the others is still checked
+
+    Returns:
+        dict/None: name: numpy.ndarray, or None if the table is not laid out
+            in fixed-width columns"""
+
+    data = np.frombuffer(buf, dtype=np.uint8)
+    if not data.size or data[-1] != _NEWLINE:
+        data = np.append(data, np.uint8(_NEWLINE))
+    width = _first_newline(data) + 1
+    if width < 2 or data.size % width:
+        return None
+
+    lines = data.reshape(-1, width)
+    if (lines[:, -1] != _NEWLINE).any():
+        return None
+    if (lines[:, -2] == ord('\r')).all(): # CRLF
+        lines = lines[:, :-1]
+    chars = np.ascontiguousarray(lines[:, :-1])
+    rows, ncols = chars.shape
+
+    digit_value = chars - _ZERO # wraps around below '0'
+    digit = digit_value < 10
+    space = chars == _SPACE
+    dot = chars == _DOT
+    minus = chars == _MINUS
+    sign = minus | (chars == _PLUS)
+    if not (digit | space | dot | sign).all():
+        return None
+
+    # fields are runs of columns with a character on any row; each holds one
+    # token per row, ending at the field's last column
+    used = ~space.all(axis=0)
+    edges = np.flatnonzero(np.diff(np.concatenate(([False], used, [False])).astype(np.int8)))
+    starts, ends = edges[::2], edges[1::2]
+    if starts.size != len(names) or space[:, ends - 1].any():
+        return None
+
+    # a space may only follow a character at the end of a field, including
+    # from the end of one row to the start of the next
+    flat = space.reshape(-1).view(np.uint8)
+    gaps = np.empty(rows * ncols, dtype=bool)
+    gaps[:-1] = flat[1:] > flat[:-1]
+    gaps[-1] = False
+    gap_cols = gaps.reshape(rows, ncols).any(axis=0)
+    gap_cols[ends - 1] = False
+    if gap_cols.any():
+        return None
+
+    col_field = np.full(ncols, -1)
+    for k, (s, e) in enumerate(zip(starts, ends)):
+        col_field[s:e] = k
+
+    # a sign must start its token and be followed by a digit or a dot
+    flat_sign = sign.reshape(-1)
+    misplaced = np.zeros(rows * ncols, dtype=bool)
+    misplaced[1:] = flat_sign[1:] & ~space.reshape(-1)[:-1]
+    misplaced = misplaced.reshape(rows, ncols)
+    misplaced[:, 0] = False
+    if misplaced.any() or (flat_sign[:-1] & ~(digit | dot).reshape(-1)[1:]).any():
+        return None
+
+    # each field has at most one column holding decimal points, on all rows,
+    # followed by digits on all rows up to the end of the field; a field
+    # without one is an integer column
+    cols = np.arange(ncols)
+    any_dot = dot.any(axis=0)
+    dot_cols = np.add.reduceat(any_dot, starts)
+    dot_col = np.add.reduceat(np.where(any_dot, cols, 0), starts)
+    is_int = dot_cols == 0
+    if (dot_cols > 1).any() or not dot.all(axis=0)[dot_col[~is_int]].all():
+        return None
+
+    all_digit = digit.all(axis=0)
+    all_digit_count = np.concatenate(([0], np.cumsum(all_digit)))
+    decimals = np.where(is_int, 0, ends - dot_col - 1)
+    if not all_digit[ends[is_int] - 1].all():
+        return None
+    after_dot = np.where(is_int, 0, all_digit_count[ends] - all_digit_count[dot_col + 1])
+    if (after_dot != decimals).any():
+        return None
+    no_decimals = ~is_int & (decimals == 0) # e.g. '-143.'
+    if (dot_col[no_decimals] == starts[no_decimals]).any() or not all_digit[dot_col[no_decimals] - 1].all():
+        return None
+
+    # weight of each column in the integer mantissa of its field: a power of
+    # ten by the number of digit columns after it in the field
+    any_digit = digit.any(axis=0)
+    digit_count = np.concatenate(([0], np.cumsum(any_digit)))
+    if (digit_count[ends] - digit_count[starts] > _MAX_DIGITS).any():
+        return None
+    weights = np.zeros(ncols)
+    for s, e in zip(starts, ends):
+        weights[s:e] = 10.0 ** (digit_count[e] - digit_count[s + 1:e + 1])
+    weights[~any_digit] = 0.
+
+    usecols = None if usecols is None else set(usecols)
+    selected = [k for k, name in enumerate(names) if usecols is None or name in usecols]
+
+    # integer mantissas are exact, so summing them in any order is too
+    digit_value *= digit
+    mantissa = np.zeros((starts.size, rows))
+    for k in selected:
+        s, e = starts[k], ends[k]
+        mantissa[k] = digit_value[:, s:e].astype(np.float64) @ weights[s:e]
+
+    negative = np.flatnonzero(minus)
+    mantissa[col_field[negative % ncols], negative // ncols] *= -1
+
+    columns = {}
+    for k in selected:
+        if is_int[k]:
+            columns[names[k]] = mantissa[k].astype(np.int64)
+        else:
+            columns[names[k]] = mantissa[k] / 10.0 ** decimals[k]
+
+    return columns
+
+def _first_newline(data):
+    """Index of the first newline of a byte array holding at least one,
+    looking at the first line only unless it is very long."""
+
+    head = np.flatnonzero(data[:4096] == _NEWLINE)
+    if head.size:
+        return head[0]
+    return np.flatnonzero(data == _NEWLINE)[0]
@@ -0,0 +1,210 @@
+#!/usr/bin/python
+"""
+Module containing single-pass readers for ASCII radial files.
+
+The header, table and footer of a file are split out of one buffer so that
+each file is opened and read exactly once, decompressing it on the way if
+needed. Plain files can instead be memory-mapped, in which case the sections
+are views of the mapping and the table is parsed straight from it.
+"""
+
+import contextlib
+import io
+import mmap
+import os
+import re
+import xradial.compression as compression # transparent decompression
+import xradial.instrument as instrument # stage timing hooks
+import xradial.utils as utils # helper functions
+
+# the table starts on the first line which is not a '%' comment, and ends on
+# the next line which is; a blank line also ends the header, as it does for
+# utils.get_metadata_from_file
+_TABLE_START_RE = re.compile(rb'^[^%]', re.MULTILINE)
+_TABLE_END_RE = re.compile(rb'\n%')
+
+def is_buffer(obj):
+    """Whether an object holds the contents of a file in memory, rather than
+    naming or streaming a file.
+
+    Args:
+        obj: path, file-like object or buffer
+
+    Returns:
+        bool"""
+
+    return isinstance(obj, (bytes, bytearray, memoryview, mmap.mmap))
+
+def reusable(source):
+    """Make a source of radial data readable more than once: file-like
+    objects are read into bytes, paths and buffers are kept as they are.
+
+    Args:
+        source (str/bytes-like/file-like): path, contents or stream of a file
+
+    Returns:
+        str/bytes-like"""
+
+    if hasattr(source, 'read') and not is_buffer(source):
+        return read_bytes(source)
+    return source
+
+def read_bytes(path):
+    """Read the full, uncompressed contents of a file with a single open.
+
+    Args:
+        path (str/bytes-like/file-like): path to file, contents of a file as
+            bytes, bytearray or memoryview, or a binary file-like object;
+            gzip, bz2, xz and zstd compression is detected and undone
+
+    Returns:
+        bytes-like: bytes, or the buffer itself if it was not compressed"""
+
+    # contents already in memory are used as they are
+    if is_buffer(path) and compression.detect_compression(bytes(path[:8])) is None:
+        return path
+
+    with compression.open_binary(path) as f:
+        return f.read()
+
+def split_sections(buf):
+    """Split the contents of an ASCII radial file into its header, table and
+    footer sections.
+
+    Args:
+        buf (bytes/memoryview/mmap.mmap): contents of the file
+
+    Returns:
+        tuple of bytes/memoryview: header, table, footer; views of the
+            buffer if it is a memoryview or a mapping"""
+
+    # a mapped file is split into views of the mapping, not copies
+    if isinstance(buf, mmap.mmap):
+        buf = memoryview(buf)
+
+    start = _TABLE_START_RE.search(buf)
+    if start is None: # file has no table rows at all
+        return buf, buf[:0], buf[:0]
+    table_start = start.start()
+
+    # a plain search is much faster than a multiline regex over the rows;
+    # memoryviews have no find
+    if isinstance(buf, memoryview):
+        end = _TABLE_END_RE.search(buf, table_start)
+        end = end.start() if end is not None else -1
+    else:
+        end = buf.find(b'\n%', table_start)
+    table_end = end + 1 if end >= 0 else len(buf)
+
+    return buf[:table_start], buf[table_start:table_end], buf[table_end:]
+
+def read_radial(path, numeric=False):
+    """Read an ASCII radial file once, returning its metadata and a buffer
+    holding only the table rows, ready to be handed to the numeric parser.
+
+    Args:
+        path (str/bytes-like/file-like): path to file, contents of a file as
+            bytes, bytearray or memoryview, or a binary file-like object;
+            gzip, bz2, xz and zstd compression is detected and undone
+        numeric (bool): convert metadata fields to numeric data types if possible
+
+    Returns:
+        tuple: metadata (dict), table (io.BytesIO)"""
+
+    with instrument.stage('read') as stage:
+        buf = read_bytes(path)
+        stage.bytes_read = len(buf)
+
+    with instrument.stage('header'):
+        header, table, _ = split_sections(buf)
+        lines = bytes(header).decode('utf-8', errors='replace').splitlines()
+        metadata = utils.parse_metadata(lines, numeric)
+
+    return metadata, io.BytesIO(table)
+
+@contextlib.contextmanager
+def map_file(path):
+    """Memory-map a file for reading. Compressed files, and file-like
+    objects, can't be mapped and are read into memory instead.
+
+    Args:
+        path (str/bytes-like/file-like): path to file, contents of a file, or
+            a binary file-like object
+
+    Yields:
+        mmap.mmap/bytes-like: full, uncompressed contents of the file; a
+            mapping is closed on leaving the with block"""
+
+    if not isinstance(path, (str, os.PathLike)):
+        yield read_bytes(path)
+        return
+
+    with open(path, 'rb') as f:
+        prefix = f.read(6)
+        if not prefix or compression.detect_compression(prefix) is not None:
+            f.seek(0)
+            with compression.open_binary(f) as g:
+                yield g.read()
+            return
+
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    try:
+        yield mapping
+    finally:
+        _close(mapping)
+
+@contextlib.contextmanager
+def open_radial(path, numeric=False, use_mmap=False):
+    """Read an ASCII radial file, as read_radial does, for the duration of a
+    with block. With use_mmap, a plain file is memory-mapped and the table is
+    a view of the mapping, valid only inside the block; this saves copying
+    the table out of the file, and keeps the memory taken by large files out
+    of the heap.
+
+    Args:
+        path (str/bytes-like/file-like): path to file, contents of a file, or
+            a binary file-like object
+        numeric (bool): convert metadata fields to numeric data types if possible
+        use_mmap (bool): memory-map the file
+
+    Yields:
+        tuple: metadata (dict), table (io.BytesIO/memoryview)"""
+
+    if not use_mmap:
+        yield read_radial(path, numeric)
+        return
+
+    with contextlib.ExitStack() as stack:
+        with instrument.stage('read') as stage:
+            buf = stack.enter_context(map_file(path))
+            stage.bytes_read = len(buf)
+
+        with instrument.stage('header'):
+            header, table, footer = split_sections(buf)
+            lines = bytes(header).decode('utf-8', errors='replace').splitlines()
+            metadata = utils.parse_metadata(lines, numeric)
+
+        try:
+            yield metadata, table
+        finally:
+            for view in (header, table, footer):
+                _release(view)
+
+def _release(view):
+    """Release a view of a mapping, unless it is still exported."""
+
+    if isinstance(view, memoryview):
+        try:
+            view.release()
+        except BufferError:
+            pass
+
+def _close(mapping):
+    """Close a mapping, unless views of it are still alive, e.g. held by the
+    traceback of an error; it is then closed once they are collected."""
+
+    try:
+        mapping.close()
+    except BufferError:
+        pass
@@ -0,0 +1,346 @@
+#!/usr/bin/python
+"""
+Module containing fetching and converting radial files from remote sites
+over SFTP.
+
+Sessions are pooled per host and reused across files, listing a directory
+overlaps with reading the files of the one before it, and file contents are
+read into memory and handed to the parser without touching the local disk.
+Remote directories are given as URLs, sftp://[user@]host[:port]/directory.
+
+Sessions are opened by a connector, a callable of (host, port, username)
+returning an SFTP client: an object with `listdir_attr(path)`,
+`open(path, mode)` and `close()`, as paramiko.SFTPClient has. The default
+connector needs the optional `paramiko` package.
+"""
+
+import collections
+import concurrent.futures
+import contextlib
+import fnmatch
+import itertools
+import posixpath
+import queue
+import stat
+import threading
+import urllib.parse
+import xradial.batch as batch # batch conversion
+import xradial.catalog as catalog # radial file name patterns
+
+# contents of one remote file; exactly one of `contents` and `error` is set
+RemoteFile = collections.namedtuple('RemoteFile', ['url', 'contents', 'error'])
+
+# errors about one file, which leave the session usable
+_FILE_ERRORS = (FileNotFoundError, PermissionError)
+
+def paramiko_connector(**connect_kwargs):
+    """Connector opening SFTP sessions with paramiko, trusting the system's
+    known hosts.
+
+    Args:
+        **connect_kwargs: further keyword arguments of
+            paramiko.SSHClient.connect, e.g. key_filename or timeout
+
+    Returns:
+        callable: connector of (host, port, username)"""
+
+    def connect(host, port, username):
+        try:
+            import paramiko
+        except ImportError:
+            raise ImportError("paramiko is required to fetch radial files over SFTP")
+
+        ssh = paramiko.SSHClient()
+        ssh.load_system_host_keys()
+        ssh.connect(host, port=port or 22, username=username, **connect_kwargs)
+        try:
+            return _SSHSession(ssh, ssh.open_sftp())
+        except BaseException:
+            ssh.close()
+            raise
+
+    return connect
+
+class SFTPPool(object):
+    """Pool of at most `size` SFTP sessions to one host, opened when first
+    needed and reused afterwards. A session which fails on anything other
+    than a missing or forbidden file is closed rather than reused.
+
+    Args:
+        connect (callable): function of no arguments opening a session
+        size (int): maximum number of sessions open at a time"""
+
+    def __init__(self, connect, size=4):
+        self.connect = connect
+        self.size = size
+        self.connections = 0 # number of sessions opened so far
+        self._idle = queue.LifoQueue() # most recently used first, to let others time out
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def session(self):
+        """Borrow a session, waiting for one if all are in use.
+
+        Yields:
+            SFTP client"""
+
+        with self._slots:
+            try:
+                sftp = self._idle.get_nowait()
+            except queue.Empty:
+                sftp = self.connect()
+                with self._lock:
+                    self.connections += 1
+
+            try:
+                yield sftp
+            except _FILE_ERRORS:
+                self._idle.put(sftp)
+                raise
+            except BaseException:
+                _close(sftp)
+                raise
+            else:
+                self._idle.put(sftp)
+
+    def listdir(self, directory, patterns=catalog.RADIAL_PATTERNS):
+        """List the radial files of a remote directory, not recursively.
+
+        Args:
+            directory (str): remote directory
+            patterns (iterable of str): file name patterns of radial files
+
+        Returns:
+            list of str: remote paths, sorted"""
+
+        with self.session() as sftp:
+            entries = sftp.listdir_attr(directory)
+
+        return sorted(
+            posixpath.join(directory, e.filename)
+            for e in entries
+            if not stat.S_ISDIR(e.st_mode or 0)
+            and any(fnmatch.fnmatch(e.filename, p) for p in patterns)
+        )
+
+    def read(self, path):
+        """Read a remote file into memory. With paramiko, the read requests
+        are pipelined instead of waiting for each block in turn.
+
+        Args:
+            path (str): remote path
+
+        Returns:
+            bytes"""
+
+        with self.session() as sftp:
+            with sftp.open(path, 'rb') as f:
+                if hasattr(f, 'prefetch'):
+                    f.prefetch()
+                return f.read()
+
+    def close(self):
+        """Close the idle sessions."""
+
+        while True:
+            try:
+                _close(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class SFTPPools(object):
+    """Session pools of many hosts, one per host, port and user, created when
+    first needed.
+
+    Args:
+        connector (callable/None): connector of (host, port, username),
+            paramiko_connector() if None
+        size (int): maximum number of sessions open at a time to each host"""
+
+    def __init__(self, connector=None, size=4):
+        self.connector = connector or paramiko_connector()
+        self.size = size
+        self._pools = {}
+        self._lock = threading.Lock()
+
+    def pool(self, url):
+        """Pool of the host of a URL.
+
+        Args:
+            url (str): sftp://[user@]host[:port]/...
+
+        Returns:
+            SFTPPool"""
+
+        parts = _split_url(url)
+        key = (parts.hostname, parts.port, parts.username)
+        with self._lock:
+            if key not in self._pools:
+                self._pools[key] = SFTPPool(lambda: self.connector(*key), self.size)
+            return self._pools[key]
+
+    def close(self):
+        """Close the idle sessions of every pool."""
+
+        with self._lock:
+            for pool in self._pools.values():
+                pool.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def fetch_radials(pools, locations, patterns=catalog.RADIAL_PATTERNS, readahead=None):
+    """Read the radial files of remote directories into memory, directory by
+    directory and in name order within each. The files are read concurrently,
+    with at most `readahead` read ahead of the consumer, and the next
+    directory is listed while the files of the current one are read. A file
+    or directory which can't be read is reported in its result.
+
+    Args:
+        pools (SFTPPools): session pools
+        locations (str/iterable of str): URLs of remote directories
+        patterns (iterable of str): file name patterns of radial files
+        readahead (int/None): number of files read ahead, twice the number of
+            threads if None
+
+    Yields:
+        RemoteFile"""
+
+    if isinstance(locations, str):
+        locations = [locations]
+    locations = [(pools.pool(url), url) for url in locations]
+    workers = pools.size * len({id(pool) for pool, _ in locations}) or 1
+    readahead = readahead or 2 * workers
+
+    with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+        remaining = iter(locations)
+        listings = collections.deque() # (pool, url, future) of directories listed ahead
+        reads = collections.deque() # (url, future) of files read ahead
+        try:
+            while True:
+                for pool, url in itertools.islice(remaining, 2 - len(listings)):
+                    listings.append((pool, url, executor.submit(pool.listdir, _split_url(url).path or '/', patterns)))
+                if not listings:
+                    break
+
+                pool, url, listing = listings.popleft()
+                try:
+                    paths = listing.result()
+                except Exception:
+                    reads.append((url, listing)) # reported after the files read ahead of it
+                    continue
+
+                for path in paths:
+                    reads.append((_join_url(url, path), executor.submit(pool.read, path)))
+                    if len(reads) > readahead:
+                        yield _remote_file(*reads.popleft())
+
+            while reads:
+                yield _remote_file(*reads.popleft())
+        finally:
+            for _, future in reads:
+                future.cancel()
+            for _, _, future in listings:
+                future.cancel()
+
+def fetch_and_convert(pools, locations, time_var_str, cf_time_units, numerical_metadata=False,
+    patterns=catalog.RADIAL_PATTERNS, readahead=None, ordered=True, **kwargs):
+    """Fetch the radial files of remote directories and convert them through
+    xradial.batch.convert_files, passing their contents rather than paths.
+
+    Args:
+        pools (SFTPPools): session pools
+        locations (str/iterable of str): URLs of remote directories
+        time_var_str (str): name of time variable
+        cf_time_units (str): string describing the units of the time variable
+        numerical_metadata (bool): indicator to convert metadata to numeric types
+        patterns (iterable of str): file name patterns of radial files
+        readahead (int/None): number of files read ahead, see fetch_radials
+        ordered (bool): yield results in listing order if True, else as soon
+            as they finish
+        **kwargs: further keyword arguments of convert_files, e.g. workers
+
+    Yields:
+        xradial.batch.BatchResult: with the URL of the file as its `path`;
+            files which couldn't be fetched carry the error of the fetch"""
+
+    fetched = [] # per file sent to convert_files: index, url
+    failed = collections.deque() # results of files which couldn't be fetched
+
+    def contents():
+        for index, remote in enumerate(fetch_radials(pools, locations, patterns, readahead)):
+            if remote.error is not None:
+                failed.append(batch.BatchResult(index, remote.url, None, remote.error))
+            else:
+                fetched.append((index, remote.url))
+                yield remote.contents
+
+    results = batch.convert_files(
+        contents(),
+        time_var_str,
+        cf_time_units,
+        numerical_metadata,
+        ordered=ordered,
+        **kwargs
+    )
+    for result in results:
+        index, url = fetched[result.index]
+        # failures were recorded while the files before this one were fed
+        while failed and (not ordered or failed[0].index < index):
+            yield failed.popleft()
+        yield result._replace(index=index, path=url)
+
+    yield from failed
+
+def _remote_file(url, future):
+    try:
+        return RemoteFile(url, future.result(), None)
+    except Exception as e:
+        return RemoteFile(url, None, e)
+
+def _split_url(url):
+    parts = urllib.parse.urlsplit(url)
+    if parts.scheme != 'sftp' or not parts.hostname:
+        raise ValueError("expected a URL sftp://[user@]host[:port]/directory, got {!r}".format(url))
+    return parts
+
+def _join_url(url, path):
+    """URL of a remote path on the host of another URL."""
+
+    parts = _split_url(url)
+    return urllib.parse.urlunsplit((parts.scheme, parts.netloc, path, '', ''))
+
+def _close(sftp):
+    try:
+        sftp.close()
+    except Exception:
+        pass
+
+class _SSHSession(object):
+    """SFTP client which closes its SSH connection along with itself."""
+
+    def __init__(self, ssh, sftp):
+        self.ssh = ssh
+        self.sftp = sftp
+
+    def listdir_attr(self, path):
+        return self.sftp.listdir_attr(path)
+
+    def open(self, path, mode='r'):
+        return self.sftp.open(path, mode)
+
+    def close(self):
+        try:
+            self.sftp.close()
+        finally:
+            self.ssh.close()
@@ -0,0 +1,249 @@
+#!/usr/bin/python
+"""
+Module containing an appendable Zarr store of the radials of one site.
+
+The store is laid out along time: every variable with a time dimension is
+chunked as `times_per_chunk` times by the whole grid, so a chunk holds whole
+radial maps and appending one touches only the last chunk of each variable.
+Appending never reads the time coordinate back as a whole: new times later
+than the latest one in the store, the usual case of hourly ingestion, are
+told apart from the CF `actual_range` attribute of the time coordinate,
+which appending keeps up to date, and only earlier (backfilled) times are
+checked against every time in the store. Backfilled times are appended
+after the others rather than inserted in order, which would rewrite every
+chunk after them, so the time coordinate of a store is only sorted until the
+first backfill; open_zarr sorts it on open. Writing needs the optional
+`zarr` package.
+"""
+
+import numpy as np
+import xarray as xr
+import xradial.dtype_policy as dtype_policy # dtypes of radial variables
+
+def zarr_encoding(ds, time_var_str, times_per_chunk=24, compressor=None, dtypes='compact'):
+    """Encoding of the variables of a radial Dataset in a new Zarr store.
+
+    Args:
+        ds (xarray.Dataset): Dataset of radials
+        time_var_str (str): name of time variable
+        times_per_chunk (int): number of times in a chunk
+        compressor (numcodecs codec/None): compressor of every variable,
+            Blosc zstd with bit shuffling if None
+        dtypes (None/str/dict): dtype policy of the stored variables, see
+            xradial.dtype_policy.resolve_dtypes; integer dtypes mark empty
+            cells with their netCDF fill value
+
+    Returns:
+        dict: variable name: encoding"""
+
+    if compressor is None:
+        from numcodecs import Blosc
+        compressor = Blosc(cname='zstd', clevel=3, shuffle=Blosc.BITSHUFFLE)
+
+    dtypes = dtype_policy.resolve_dtypes(dtypes)
+    encoding = {}
+    for name, variable in ds.variables.items():
+        enc = {'compressor': compressor}
+        if time_var_str in variable.dims:
+            enc['chunks'] = tuple(
+                times_per_chunk if dim == time_var_str else size
+                for dim, size in zip(variable.dims, variable.shape)
+            )
+
+        if name == time_var_str:
+            enc.update(dtype_policy.time_encoding(variable))
+
+        dtype = dtypes.get(name)
+        if dtype is not None and name in ds.data_vars:
+            enc['dtype'] = dtype
+            if dtype.kind == 'i' and '_FillValue' not in variable.attrs:
+                enc['_FillValue'] = dtype_policy.fill_value(dtype)
+        encoding[name] = enc
+
+    return encoding
+
+def append_zarr(datasets, store, time_var_str, times_per_chunk=24, compressor=None, dtypes='compact'):
+    """Append radials of one site to a Zarr store along time, creating the
+    store with the first of them. Times already in the store are skipped;
+    the others are appended in order after the stored ones, even if earlier
+    (see open_zarr). If writing fails, the store keeps its previous length.
+
+    The grid of the store is the grid of the first Dataset written; later
+    Datasets are put on it, and one with grid cells outside of it is
+    rejected. Global attributes are those of the first Dataset written.
+
+    Args:
+        datasets (xarray.Dataset/iterable of xarray.Dataset): radials
+        store (str/MutableMapping): path or mapping of the Zarr store
+        time_var_str (str): name of time variable
+        times_per_chunk (int): number of times in a chunk, used when the
+            store is created
+        compressor (numcodecs codec/None): compressor, see zarr_encoding
+        dtypes (None/str/dict): dtype policy, see zarr_encoding
+
+    Returns:
+        int: number of times written"""
+
+    try:
+        import zarr
+    except ImportError:
+        raise ImportError("zarr is required to write radials to a Zarr store")
+
+    if isinstance(datasets, xr.Dataset):
+        datasets = [datasets]
+    datasets = [ds for ds in datasets if ds.sizes[time_var_str]]
+    if not datasets:
+        return 0
+
+    group = _open_group(zarr, store)
+    if group is None or time_var_str not in group:
+        ds = _combine(datasets, time_var_str)
+        encoding = zarr_encoding(ds, time_var_str, times_per_chunk, compressor, dtypes)
+        ds.to_zarr(store, mode='a', encoding=encoding, consolidated=True)
+        group = zarr.open_group(store, mode='r+')
+        times = group[time_var_str]
+        times.attrs['actual_range'] = _actual_range(times[:])
+        zarr.consolidate_metadata(group.store)
+        return ds.sizes[time_var_str]
+
+    times = group[time_var_str]
+    datasets = [_on_grid(ds, group, time_var_str) for ds in datasets]
+    ds = _combine(datasets, time_var_str)
+    encoded = _encode_times(ds[time_var_str].values, times)
+    stored_range = times.attrs.get('actual_range') or _actual_range(times[:])
+    new = ~_stored(encoded, times, stored_range)
+    ds = ds.isel({time_var_str: new})
+    count = ds.sizes[time_var_str]
+    if not count:
+        return 0
+
+    missing = [name for name in ds.variables if name not in group]
+    if missing:
+        raise ValueError("Variables {} are not in the store".format(', '.join(sorted(missing))))
+
+    # grow every array along time, then fill the new slab; the region of a
+    # region write must exist beforehand
+    start = times.shape[0]
+    arrays = [
+        (array, array.attrs['_ARRAY_DIMENSIONS'].index(time_var_str))
+        for _, array in group.arrays()
+        if time_var_str in array.attrs.get('_ARRAY_DIMENSIONS', [])
+    ]
+    times.attrs['actual_range'] = _actual_range(np.concatenate([stored_range, encoded[new]]))
+    _resize(zarr, group, arrays, start + count)
+
+    ds = ds.drop_vars([name for name, v in ds.variables.items() if time_var_str not in v.dims])
+    try:
+        ds.to_zarr(store, region={time_var_str: slice(start, start + count)}, consolidated=True)
+    except BaseException:
+        # don't leave times which were never written in the store
+        times.attrs['actual_range'] = stored_range
+        _resize(zarr, group, arrays, start)
+        raise
+    return count
+
+def open_zarr(store, time_var_str, **kwargs):
+    """Open a Zarr store written by append_zarr, sorted by time if backfills
+    left its times out of order.
+
+    Args:
+        store (str/MutableMapping): path or mapping of the Zarr store
+        time_var_str (str): name of time variable
+        **kwargs: further keyword arguments of xarray.open_zarr
+
+    Returns:
+        xarray.Dataset"""
+
+    ds = xr.open_zarr(store, **kwargs)
+    if not ds.indexes[time_var_str].is_monotonic_increasing:
+        ds = ds.sortby(time_var_str)
+    return ds
+
+def _resize(zarr, group, arrays, length):
+    """Resize arrays along time and record their shapes in the consolidated
+    metadata.
+
+    Args:
+        zarr (module): zarr
+        group (zarr.Group): group of the arrays
+        arrays (list of tuple): each array and the axis of its time dimension
+        length (int): number of times"""
+
+    for array, axis in arrays:
+        shape = list(array.shape)
+        shape[axis] = length
+        array.resize(*shape)
+    zarr.consolidate_metadata(group.store)
+
+def _open_group(zarr, store):
+    """Group at the root of a store, None if there is none yet."""
+
+    try:
+        return zarr.open_group(store, mode='r+')
+    except (zarr.errors.GroupNotFoundError, FileNotFoundError):
+        return None
+
+def _combine(datasets, time_var_str):
+    """Concatenate Datasets along time, sorted by time, keeping the first of
+    repeated times."""
+
+    ds = datasets[0] if len(datasets) == 1 else xr.concat(
+        datasets, time_var_str, data_vars='minimal', coords='minimal', compat='override', combine_attrs='override'
+    )
+    _, first = np.unique(ds[time_var_str].values, return_index=True)
+    if len(first) < ds.sizes[time_var_str] or not ds.indexes[time_var_str].is_monotonic_increasing:
+        ds = ds.isel({time_var_str: first})
+    return ds
+
+def _on_grid(ds, group, time_var_str):
+    """Put a Dataset on the grid of the store.
+
+    Raises:
+        ValueError: if a grid cell of the Dataset is not on the grid"""
+
+    indexers = {}
+    for dim in ds.dims:
+        if dim == time_var_str or dim not in group:
+            continue
+        stored = group[dim][:]
+        values = ds[dim].values
+        if np.array_equal(values, stored):
+            continue
+        if not np.isin(values, stored).all():
+            raise ValueError("{} of the Dataset are outside of the grid of the store".format(dim))
+        indexers[dim] = stored
+
+    return ds.reindex(indexers) if indexers else ds
+
+def _encode_times(values, times):
+    """Encode datetime64 times in the units and dtype of the time coordinate
+    of the store."""
+
+    units = times.attrs.get('units')
+    calendar = times.attrs.get('calendar', 'proleptic_gregorian')
+    encoded, _, _ = xr.coding.times.encode_cf_datetime(values, units, calendar)
+    return encoded.astype(times.dtype)
+
+def _actual_range(encoded):
+    """CF `actual_range` of encoded times, as JSON numbers."""
+
+    return [np.min(encoded).item(), np.max(encoded).item()]
+
+def _stored(encoded, times, stored_range):
+    """Mask of the times already in the store.
+
+    Args:
+        encoded (numpy.ndarray): encoded times to append, sorted
+        times (zarr.Array): encoded time coordinate of the store
+        stored_range (list): earliest and latest time in the store; the
+            store is not sorted after a backfill, so its last time is not
+            necessarily the latest
+
+    Returns:
+        numpy.ndarray of bool"""
+
+    if encoded[0] > stored_range[1]:
+        return np.zeros(len(encoded), dtype=bool)
+
+    # backfill: compare with the whole time coordinate
+    return np.isin(encoded, times[:])
@@ -0,0 +1,364 @@
+#!/usr/bin/python
+"""
+Module containing a generator of synthetic ASCII radial files.
+
+The files are laid out as CODAR and WERA write them: a '%Key: value' header,
+a fixed-width radial table and a footer, plus the diagnostic tables of CODAR
+files. Their size is set by the number of grid cells, so that conversion can
+be measured on inputs of any size without real data. Values are drawn from a
+seeded generator, so the same arguments always give the same bytes.
+"""
+
+import datetime
+import os
+import uuid
+import numpy as np
+import xradial.utils as utils # helper functions
+
+# (code, width, decimals) of each column of the radial tables; decimals of
+# None mark integer columns
+CODAR_COLUMNS = [
+    ('LOND', 15, 7),
+    ('LATD', 12, 7),
+    ('VELU', 9, 3),
+    ('VELV', 9, 3),
+    ('VFLG', 11, None),
+    ('ESPC', 12, 3),
+    ('ETMP', 12, 3),
+    ('MAXV', 12, 3),
+    ('MINV', 12, 3),
+    ('ERSC', 8, None),
+    ('ERTC', 9, None),
+    ('XDST', 13, 4),
+    ('YDST', 12, 4),
+    ('RNGE', 10, 4),
+    ('BEAR', 8, 1),
+    ('VELO', 11, 3),
+    ('HEAD', 10, 1),
+    ('SPRC', 10, None),
+]
+
+WERA_COLUMNS = [
+    ('LOND', 13, 7),
+    ('LATD', 13, 7),
+    ('VELU', 9, 3),
+    ('VELV', 9, 3),
+    ('EVAR', 9, 3),
+    ('EACC', 9, 3),
+    ('XDST', 13, 4),
+    ('YDST', 13, 4),
+    ('RNGE', 10, 3),
+    ('BEAR', 9, 1),
+    ('VELO', 12, 3),
+    ('HEAD', 9, 1),
+]
+
+RADS_COLUMNS = (
+    'TIME AMP1 AMP2 PH13 PH23 CPH1 CPH2 SNF1 SNF2 SNF3 SSN1 SSN2 SSN3 DGRC DOPV '
+    'DDAP RADV RAPR RARC RADR RMCV RACV RABA RTYP STYP TYRS TMON TDAY THRS TMIN TSEC'
+).split()
+
+RCVR_COLUMNS = (
+    'TIME RTMP MTMP XTRP RUNT SP24 SP05 SN05 SP12 XPHT XAHT XAFW XARW X1VR XP28 XP05 '
+    'GRMD GDMD GSLK GSUL PLLL HTMP HUMI RBIA EXTA EXTB CRUN TYRS TMON TDAY THRS TMIN TSEC'
+).split()
+
+CODAR_ORIGIN = (40.9693333, -72.1237000)
+WERA_ORIGIN = (33.356111, -79.152778)
+
+# kilometers per degree of latitude, for the flat-earth placement of WERA cells
+_KM_PER_DEG = 111.2
+
+def codar_lluv(time, ranges=35, bearings=72, coverage=0.6, diagnostic_rows=(7, 37),
+    site='SYNT', range_res_km=5.8249, seed=0):
+    """Create the contents of a CODAR LLUV file on a range/bearing grid.
+
+    Args:
+        time (datetime.datetime): time stamp of the file
+        ranges (int): number of range cells
+        bearings (int): number of bearings, 5 degrees apart (at most 72)
+        coverage (float): fraction of the grid cells holding a row
+        diagnostic_rows (tuple of int): rows of the 'rads rad1' and
+            'rcvr rcv3' diagnostic tables; None leaves them out
+        site (str): site code
+        range_res_km (float): range resolution (kilometers)
+        seed (int): seed of the values
+
+    Returns:
+        bytes"""
+
+    if not 0 < bearings <= 72:
+        raise ValueError("bearings must be between 1 and 72, got {}".format(bearings))
+
+    rng = _rng(seed, time)
+    olat, olon = CODAR_ORIGIN
+
+    cell, bear = np.meshgrid(np.arange(1, ranges + 1), 4. + 5. * np.arange(bearings), indexing='ij')
+    keep = _cover(rng, cell.size, coverage)
+    cell, bear = cell.ravel()[keep], bear.ravel()[keep]
+    rnge = np.round(cell * range_res_km, 4)
+    lon, lat = utils.rb2ll(olon, olat, rnge, bear)
+
+    n = rnge.size
+    velo = rng.normal(0., 20., n)
+    head = (bear + 180.) % 360.
+    maxv = velo + np.abs(rng.normal(5., 3., n))
+    columns = {
+        'LOND': lon,
+        'LATD': lat,
+        'VELU': velo * np.sin(np.radians(head)),
+        'VELV': velo * np.cos(np.radians(head)),
+        'VFLG': np.zeros(n, dtype=np.int64),
+        'ESPC': np.abs(rng.normal(6., 4., n)),
+        'ETMP': np.abs(rng.normal(6., 4., n)),
+        'MAXV': maxv,
+        'MINV': velo - np.abs(rng.normal(5., 3., n)),
+        'ERSC': rng.integers(1, 30, n),
+        'ERTC': rng.integers(1, 6, n),
+        'XDST': rnge * np.sin(np.radians(bear)),
+        'YDST': rnge * np.cos(np.radians(bear)),
+        'RNGE': rnge,
+        'BEAR': bear,
+        'VELO': velo,
+        'HEAD': head,
+        'SPRC': cell,
+    }
+
+    max_range = (ranges + 1) * range_res_km
+    header = [
+        ('CTF', '1.00'),
+        ('FileType', 'LLUV rdls "RadialMap"'),
+        ('LLUVSpec', '1.26  2016 10 07'),
+        ('UUID', str(uuid.UUID(int=int(rng.integers(0, 2**63)) << 64 | seed)).upper()),
+        ('Manufacturer', 'CODAR Ocean Sensors. SeaSonde'),
+        ('Site', '{} ""'.format(site)),
+        ('TimeStamp', time.strftime('%Y %m %d  %H %M %S')),
+        ('TimeZone', '"UTC" +0.000 0 "Atlantic/Reykjavik"'),
+        ('TimeCoverage', '180.000 Minutes'),
+        ('Origin', '{:11.7f} {:11.7f}'.format(olat, olon)),
+        ('GreatCircle', '"WGS84" 6378137.000  298.257223562997'),
+        ('GeodVersion', '"CGEO" 1.70  2014 09 09'),
+        ('LLUVTrustData', 'all %% all lluv xyuv rbvd'),
+        ('RangeStart', '1'),
+        ('RangeEnd', str(ranges)),
+        ('RangeResolutionKMeters', '{:f}'.format(range_res_km)),
+        ('RangeCells', str(ranges)),
+        ('DopplerCells', '1024'),
+        ('AntennaBearing', '214.0 True'),
+        ('ReferenceBearing', '0 True'),
+        ('AngularResolution', '5 Deg'),
+        ('SpatialResolution', '5 Deg'),
+        ('PatternType', 'Measured'),
+        # the maximum range is worked out from the frequency; keep it past
+        # the last range cell
+        ('TransmitCenterFreqMHz', '{:f}'.format(min(4.513, 2000. / max_range))),
+        ('DopplerResolutionHzPerBin', '0.000488281'),
+        ('CurrentVelocityLimit', '100.0'),
+        ('MergedCount', '5'),
+    ]
+    headings = [
+        '%%   Longitude   Latitude    U comp   V comp  VectorFlag    Spatial    Temporal     Velocity    Velocity  Spatial  Temporal X Distance  Y Distance   Range   Bearing   Velocity  Direction   Spectra',
+        '%%     (deg)       (deg)     (cm/s)   (cm/s)  (GridCode)    Quality     Quality     Maximum     Minimum    Count    Count      (km)        (km)       (km)    (True)    (cm/s)     (True)    RngCell',
+    ]
+
+    parts = [_header(header)]
+    parts.append(_table('LLUV RDL9', CODAR_COLUMNS, columns, headings))
+
+    if diagnostic_rows is not None:
+        rads_rows, rcvr_rows = diagnostic_rows
+        parts.append(_diagnostic_table('rads rad1', RADS_COLUMNS, rads_rows, 1800., time, rng, 2))
+        parts.append(_diagnostic_table('rcvr rcv3', RCVR_COLUMNS, rcvr_rows, 300., time, rng, 3))
+
+    parts.append(_footer(time, ['"RadialMerger" 11.5.0', '"SpectraToRadial" 11.5.1']))
+    return ''.join(parts).encode('ascii')
+
+def wera_lluv(time, lons=60, lats=60, coverage=0.6, site='syn', seed=0):
+    """Create the contents of a WERA LLUV file on a lat/lon grid.
+
+    Args:
+        time (datetime.datetime): time stamp of the file
+        lons (int): number of longitudes of the grid, east of the site
+        lats (int): number of latitudes of the grid, centred on the site
+        coverage (float): fraction of the grid cells holding a row
+        site (str): site code
+        seed (int): seed of the values
+
+    Returns:
+        bytes"""
+
+    rng = _rng(seed, time)
+    olat, olon = WERA_ORIGIN
+    dlat, dlon = 0.0269963, 0.0321838
+
+    i, j = np.meshgrid(np.arange(1, lons + 1), np.arange(lats) - lats // 2, indexing='ij')
+    lon = np.round(olon + dlon * i.ravel(), 7)
+    lat = np.round(olat + dlat * j.ravel(), 7)
+
+    # place the cells on a flat earth around the site, which is close enough
+    # for values which are never checked against the grid
+    xdst = (lon - olon) * _KM_PER_DEG * np.cos(np.radians(olat))
+    ydst = (lat - olat) * _KM_PER_DEG
+    rnge = np.hypot(xdst, ydst)
+
+    frequency = 8.348
+    inside = np.flatnonzero(rnge < 2000. / frequency)
+    keep = inside[_cover(rng, inside.size, coverage)]
+    lon, lat, xdst, ydst, rnge = lon[keep], lat[keep], xdst[keep], ydst[keep], rnge[keep]
+    bear = np.degrees(np.arctan2(xdst, ydst)) % 360.
+
+    n = rnge.size
+    velo = rng.normal(0., 30., n)
+    head = (bear + 180.) % 360.
+    evar = np.abs(rng.normal(50., 10., n))
+    columns = {
+        'LOND': lon,
+        'LATD': lat,
+        'VELU': velo * np.sin(np.radians(head)),
+        'VELV': velo * np.cos(np.radians(head)),
+        'EVAR': evar,
+        'EACC': np.sqrt(evar),
+        'XDST': xdst,
+        'YDST': ydst,
+        'RNGE': rnge,
+        'BEAR': bear,
+        'VELO': velo,
+        'HEAD': head,
+    }
+
+    header = [
+        ('CTF', '1.00'),
+        ('FileType', 'LLUV rdls'),
+        ('Manufacturer', 'Helzel Messtechnik GmbH, WERA.'),
+        ('LLUVSpec', '1.00 2007 12 06'),
+        ('Site', '{0} "{0:<12}"'.format(site)),
+        ('TimeStamp', time.strftime('%Y %m %d %H %M %S')),
+        ('TimeZone', '"UTC" +0.00 0'),
+        ('TimeCoverage', '887.46600342 Seconds'),
+        ('Origin', '{:12.6f} {:12.6f}'.format(olat, olon)),
+        ('GreatCircle', '"WGS84" 6378137.000 298.257223562997'),
+        ('GeodVersion', '"NGS-Vincenty" 2.0 2002 10 01'),
+        ('RangeResolutionKMeters', ' 3.000'),
+        ('TransmitCenterFreqMHz', '{:9.4f}'.format(frequency)),
+        ('DopplerResolutionHzPerBin', ' 0.001126804'),
+        ('CurrentVelocityLimit', ' 250.0'),
+        ('MergedCount', '0001'),
+    ]
+    headings = [
+        '%%   Longitude   Latitude    U comp   V comp  Variance  Accuracy  X Distance   Y Distance   Range     Bearing  Velocity  Direction',
+        '%%     (deg)       (deg)     (cm/s)   (cm/s)   (cm/s)    (cm/s)     (km)         (km)       (km)    (deg NCW)   (cm/s)   (deg NCW)',
+    ]
+
+    return ''.join([
+        _header(header),
+        _table('LLUV RDL1', WERA_COLUMNS, columns, headings),
+        '%End:\n',
+    ]).encode('ascii')
+
+def write_series(directory, kind='codar', files=24, start=datetime.datetime(2018, 2, 14),
+    step=datetime.timedelta(hours=1), **kwargs):
+    """Write a time series of synthetic files, named as their kind of
+    site names them.
+
+    Args:
+        directory (str): directory to write the files to, created if missing
+        kind (str): 'codar' or 'wera'
+        files (int): number of files
+        start (datetime.datetime): time stamp of the first file
+        step (datetime.timedelta): time between files
+        **kwargs: further keyword arguments of codar_lluv or wera_lluv
+
+    Returns:
+        list of str: paths of the files, in time order"""
+
+    if kind == 'codar':
+        make, name = codar_lluv, 'RDL_m_{site}_{time:%Y_%m_%d_%H%M}.hfrss10lluv'
+    elif kind == 'wera':
+        make, name = wera_lluv, 'RDL_{site}_{time:%Y_%m_%d_%H%M}.hfrweralluv1.0'
+    else:
+        raise ValueError("Unknown kind {}, expected 'codar' or 'wera'".format(kind))
+
+    site = kwargs.setdefault('site', 'SYNT' if kind == 'codar' else 'syn')
+    os.makedirs(directory, exist_ok=True)
+
+    paths = []
+    for k in range(files):
+        time = start + k * step
+        path = os.path.join(directory, name.format(site=site, time=time))
+        with open(path, 'wb') as f:
+            f.write(make(time, **kwargs))
+        paths.append(path)
+
+    return paths
+
+def _rng(seed, time):
+    """Generator of the values of one file, differing between time stamps."""
+
+    return np.random.default_rng([seed, int((time - datetime.datetime(1970, 1, 1)).total_seconds())])
+
+def _cover(rng, size, coverage):
+    """Indices of the cells holding a row, in order; at least two, so that
+    the grid has a spacing."""
+
+    keep = np.flatnonzero(rng.random(size) < coverage)
+    if keep.size < 2:
+        keep = np.arange(min(size, 2))
+    return keep
+
+def _header(items):
+    return ''.join('%{}: {}\n'.format(key, value) for key, value in items)
+
+def _table(table_type, layout, columns, headings):
+    """Lines of a fixed-width table, from its '%TableType:' to its
+    '%TableEnd:' line."""
+
+    formats = ['{:>%d}' % width if decimals is None else '{:%d.%df}' % (width, decimals)
+        for _, width, decimals in layout]
+    line = ''.join(formats) + '\n'
+    rows = zip(*(columns[code].tolist() for code, _, _ in layout))
+    n = len(columns[layout[0][0]])
+
+    return ''.join([
+        '%TableType: {}\n'.format(table_type),
+        '%TableColumns: {}\n'.format(len(layout)),
+        '%TableColumnTypes: {} \n'.format(' '.join(code for code, _, _ in layout)),
+        '%TableRows: {}\n'.format(n),
+        '%TableStart:\n',
+        ''.join(h + '\n' for h in headings),
+        ''.join(line.format(*row) for row in rows),
+        '%TableEnd:\n',
+        '%%\n',
+    ])
+
+def _diagnostic_table(table_type, codes, rows, interval, time, rng, number):
+    """Lines of a diagnostic table, its rows commented out with '%' and
+    dated by its last six columns, `interval` seconds apart and ending
+    before `time`."""
+
+    values = np.round(rng.normal(20., 10., (rows, len(codes) - 7)), 2)
+    lines = []
+    for k in range(rows):
+        offset = (k - rows) * interval
+        t = time + datetime.timedelta(seconds=offset)
+        fields = ['{:9.0f}'.format(offset)]
+        fields += ['{:8.2f}'.format(v) for v in values[k]]
+        fields += [t.strftime('  %Y %m %d  %H %M %S')]
+        lines.append('%' + ''.join(fields) + '\n')
+
+    return ''.join([
+        '%TableType: {}\n'.format(table_type),
+        '%TableColumns: {}\n'.format(len(codes)),
+        '%TableColumnTypes: {} \n'.format(' '.join(codes)),
+        '%TableRows: {}\n'.format(rows),
+        '%TableStart: {}\n'.format(number),
+        ''.join(lines),
+        '%TableEnd: {}\n'.format(number),
+        '%%\n',
+    ])
+
+def _footer(time, tools):
+    processed = time + datetime.timedelta(hours=1, minutes=42)
+    return ''.join(
+        ['%ProcessedTimeStamp: {}\n'.format(processed.strftime('%Y %m %d  %H %M %S'))]
+        + ['%ProcessingTool: {}\n'.format(tool) for tool in tools]
+        + ['%End:\n']
+    )
@@ -0,0 +1,199 @@
+#!/usr/bin/python
+"""
+Module containing on-demand access to the tables of ASCII radial files.
+
+Besides the radial table, CODAR files hold diagnostic tables after it, e.g.
+'rads rad1' (radial diagnostics) and 'rcvr rcv3' (receiver diagnostics),
+with their rows commented out with '%'. A file is scanned once for the byte
+offsets of each '%TableType:' ... '%TableEnd:' block, and a table is parsed
+only when it is asked for, reading only its own bytes.
+"""
+
+import collections
+import io
+import re
+import numpy as np
+import pandas as pd
+import xarray as xr
+import xradial.compression as compression # transparent decompression
+import xradial.reader as reader # single-pass file reading
+import xradial.utils as utils # helper functions
+
+# a table of a file; `start` and `end` are the byte offsets of its rows in
+# the uncompressed file
+TableBlock = collections.namedtuple('TableBlock', ['type', 'columns', 'rows', 'start', 'end'])
+
+# columns holding the date of each row of a diagnostic table
+DATE_COLUMNS = ['TYRS', 'TMON', 'TDAY', 'THRS', 'TMIN', 'TSEC']
+
+_TABLE_KEY_RE = re.compile(rb'^%Table(Type|ColumnTypes|Rows|Start|End):([^\n]*)', re.MULTILINE)
+_COMMENT_RE = re.compile(rb'^%%[^\n]*(\n|$)', re.MULTILINE)
+_ROW_PREFIX_RE = re.compile(rb'^%', re.MULTILINE)
+
+class TableIndex(object):
+    """Byte offsets of the tables of an ASCII radial file, loading each table
+    the first time it is asked for.
+
+    Args:
+        path (str/bytes-like/file-like): path to ASCII data, possibly
+            compressed, contents of a file, or a binary file-like object,
+            which is read into memory so that tables can be loaded later"""
+
+    def __init__(self, path):
+        self.path = reader.reusable(path)
+        with reader.map_file(self.path) as buf:
+            self.blocks = collections.OrderedDict((b.type, b) for b in scan_tables(buf))
+        self._loaded = {}
+
+    def table_types(self):
+        """Types of the tables of the file, e.g. ['LLUV RDL9', 'rads rad1']."""
+
+        return list(self.blocks)
+
+    def load(self, table_type):
+        """Parse one table of the file.
+
+        Args:
+            table_type (str): type of the table, as in its '%TableType:' line
+
+        Returns:
+            pandas.DataFrame: one column per entry of '%TableColumnTypes:'"""
+
+        if table_type not in self._loaded:
+            self._loaded[table_type] = load_table(self.path, self.blocks[table_type])
+        return self._loaded[table_type]
+
+def scan_tables(buf):
+    """Find the tables of an ASCII radial file, without parsing their rows.
+
+    Args:
+        buf (bytes/mmap.mmap): uncompressed contents of the file
+
+    Returns:
+        list of TableBlock"""
+
+    blocks = []
+    current = {}
+    for m in _TABLE_KEY_RE.finditer(buf):
+        key, value = m.group(1), m.group(2).decode('utf-8', errors='replace').strip()
+        if key == b'Type':
+            current = {'type': value}
+        elif key == b'ColumnTypes':
+            current['columns'] = value.split()
+        elif key == b'Rows':
+            current['rows'] = int(value)
+        elif key == b'Start':
+            current['start'] = min(m.end() + 1, len(buf)) # past the end of the line
+        elif key == b'End' and 'start' in current:
+            blocks.append(TableBlock(
+                current.get('type'),
+                current.get('columns', []),
+                current.get('rows'),
+                current['start'],
+                m.start(),
+            ))
+            current = {}
+
+    return blocks
+
+def load_table(path, block):
+    """Parse the rows of one table of a file, reading only its bytes.
+
+    Args:
+        path (str/bytes-like): path to ASCII data, possibly compressed, or
+            contents of a file
+        block (TableBlock): the table, as found by scan_tables
+
+    Returns:
+        pandas.DataFrame: one column per entry of '%TableColumnTypes:'"""
+
+    if reader.is_buffer(path):
+        buf = bytes(reader.read_bytes(path)[block.start:block.end])
+    else:
+        with compression.open_binary(path) as f:
+            _skip(f, block.start)
+            buf = f.read(block.end - block.start)
+
+    return parse_table(buf, block.columns)
+
+def parse_table(buf, columns):
+    """Parse table rows, dropping '%%' comment lines and the leading '%' of
+    the rows of diagnostic tables. Columns are int64 where all values are
+    integers and float64 otherwise.
+
+    Args:
+        buf (bytes): rows of the table
+        columns (list of str): names of the columns
+
+    Returns:
+        pandas.DataFrame"""
+
+    buf = _ROW_PREFIX_RE.sub(b' ', _COMMENT_RE.sub(b'', buf))
+    if not buf.strip():
+        return pd.DataFrame({c: np.array([], dtype=np.float64) for c in columns})
+
+    return pd.read_csv(io.BytesIO(buf), header=None, sep=r'\s+', names=columns)
+
+def stack_tables(paths, table_type, time_var_str='time'):
+    """Stack one diagnostic table of many files into a time series.
+
+    Rows are put along time by their own date columns (DATE_COLUMNS), in
+    time order, and rows repeated in several files are kept once. A table
+    without date columns is stacked along 'row', with the time of the file
+    of each row.
+
+    Args:
+        paths (iterable of str/bytes-like/file-like): paths to ASCII data,
+            or contents or streams of files
+        table_type (str): type of the table, e.g. 'rads rad1'
+        time_var_str (str): name of time variable
+
+    Returns:
+        xarray.Dataset"""
+
+    frames = []
+    for path in paths:
+        index = TableIndex(path)
+        if table_type not in index.blocks:
+            continue
+        df = index.load(table_type)
+        if not all(c in df for c in DATE_COLUMNS):
+            metadata = utils.get_metadata_from_file(index.path, True)
+            df = df.assign(**{time_var_str: utils.create_time(metadata)})
+        frames.append(df)
+
+    if not frames:
+        raise ValueError("No file has a {} table".format(table_type))
+
+    df = pd.concat(frames, ignore_index=True)
+    if time_var_str in df:
+        return xr.Dataset.from_dataframe(df.rename_axis('row'))
+
+    df = df.drop_duplicates()
+    dates = df[DATE_COLUMNS].astype(int)
+    df[time_var_str] = pd.to_datetime(dict(
+        year=dates['TYRS'],
+        month=dates['TMON'],
+        day=dates['TDAY'],
+        hour=dates['THRS'],
+        minute=dates['TMIN'],
+        second=dates['TSEC'],
+    ))
+    df = df.sort_values(time_var_str, kind='stable').set_index(time_var_str)
+
+    return xr.Dataset.from_dataframe(df)
+
+def _skip(f, n):
+    """Move a stream forward by n bytes, seeking if it can."""
+
+    try:
+        f.seek(n, io.SEEK_CUR)
+        return
+    except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+        pass
+
+    while n > 0:
+        chunk = f.read(min(n, 1 << 20))
+        if not chunk:
+            break
+        n -= len(chunk)
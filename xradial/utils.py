@@ -3,15 +3,98 @@
 Module containing helper functions for calculations.
 """
 
-from geopy.distance import geodesic
 import datetime
-import geopy
+import io
 import itertools
 import json
+import re
 import numpy as np
 import pandas as pd
 from pathlib import Path
 import xarray as xr
+import xradial.compression as compression # transparent decompression
+
+# WGS84 ellipsoid, as used by the GreatCircle header of CODAR and WERA files
+WGS84_A = 6378137.0 # semi-major axis (meters)
+WGS84_F = 1 / 298.257223563 # flattening
+WGS84_B = WGS84_A * (1 - WGS84_F) # semi-minor axis (meters)
+
+def rb2ll(lon0, lat0, r, b, tol=1e-12, max_iter=200):
+    """Vectorized Vincenty direct solution on the WGS84 ellipsoid: given
+    arrays of origins, ranges and bearings, calculate the destination
+    longitudes and latitudes. Inputs are broadcast against each other.
+
+    Agrees with geopy.distance.geodesic to within 1e-9 degrees for the ranges
+    seen in HF radar data.
+
+    Args:
+        lon0 (float/array-like): starting longitude in decimal degrees
+        lat0 (float/array-like): starting latitude in decimal degrees
+        r (float/array-like): range (kilometers)
+        b (float/array-like): bearing (degrees)
+        tol (float): convergence tolerance on the angular distance (radians)
+        max_iter (int): maximum number of iterations
+
+    Returns:
+        tuple of lon, lat (numpy.ndarray)"""
+
+    lon0, lat0, r, b = np.broadcast_arrays(
+        *(np.asarray(x, dtype=np.float64) for x in (lon0, lat0, r, b))
+    )
+    s = r * 1000.
+
+    alpha1 = np.radians(b)
+    sin_alpha1 = np.sin(alpha1)
+    cos_alpha1 = np.cos(alpha1)
+
+    # reduced latitude
+    tan_u1 = (1 - WGS84_F) * np.tan(np.radians(lat0))
+    cos_u1 = 1 / np.sqrt(1 + tan_u1**2)
+    sin_u1 = tan_u1 * cos_u1
+
+    sigma1 = np.arctan2(tan_u1, cos_alpha1)
+    sin_alpha = cos_u1 * sin_alpha1
+    cos2_alpha = 1 - sin_alpha**2
+    u2 = cos2_alpha * (WGS84_A**2 - WGS84_B**2) / WGS84_B**2
+    big_a = 1 + u2 / 16384 * (4096 + u2 * (-768 + u2 * (320 - 175 * u2)))
+    big_b = u2 / 1024 * (256 + u2 * (-128 + u2 * (74 - 47 * u2)))
+
+    # iterate on the angular distance until it converges everywhere
+    sigma = s / (WGS84_B * big_a)
+    for _ in range(max_iter):
+        cos_2sm = np.cos(2 * sigma1 + sigma)
+        sin_sigma = np.sin(sigma)
+        cos_sigma = np.cos(sigma)
+        delta_sigma = big_b * sin_sigma * (cos_2sm + big_b / 4 * (
+            cos_sigma * (-1 + 2 * cos_2sm**2)
+            - big_b / 6 * cos_2sm * (-3 + 4 * sin_sigma**2) * (-3 + 4 * cos_2sm**2)
+        ))
+        sigma_next = s / (WGS84_B * big_a) + delta_sigma
+        converged = np.all(np.abs(sigma_next - sigma) <= tol)
+        sigma = sigma_next
+        if converged:
+            break
+
+    cos_2sm = np.cos(2 * sigma1 + sigma)
+    sin_sigma = np.sin(sigma)
+    cos_sigma = np.cos(sigma)
+
+    x = sin_u1 * sin_sigma - cos_u1 * cos_sigma * cos_alpha1
+    lat = np.arctan2(
+        sin_u1 * cos_sigma + cos_u1 * sin_sigma * cos_alpha1,
+        (1 - WGS84_F) * np.sqrt(sin_alpha**2 + x**2)
+    )
+    lam = np.arctan2(
+        sin_sigma * sin_alpha1,
+        cos_u1 * cos_sigma - sin_u1 * sin_sigma * cos_alpha1
+    )
+    c = WGS84_F / 16 * cos2_alpha * (4 + WGS84_F * (4 - 3 * cos2_alpha))
+    big_l = lam - (1 - c) * WGS84_F * sin_alpha * (
+        sigma + c * sin_sigma * (cos_2sm + c * cos_sigma * (-1 + 2 * cos_2sm**2))
+    )
+
+    lon = (lon0 + np.degrees(big_l) + 180.) % 360. - 180. # wrap to [-180, 180)
+    return lon, np.degrees(lat)
 
 def _rb2ll(lon0, lat0, r, b):
     """Vincenty Distance function.
@@ -25,41 +108,164 @@ def _rb2ll(lon0, lat0, r, b):
     Returns:
         tuple of lon, lat (float)"""
 
-    origin = geopy.Point(lat0, lon0) # define the origin using geopy
-    d = geodesic(kilometers=r).destination(origin, b) # using vincenty distance to get lat/lon from range and bearing
-    return d.longitude, d.latitude
+    lon, lat = rb2ll(lon0, lat0, r, b)
+    return float(lon), float(lat)
 
 def get_metadata_from_file(path, numeric=False):
-    """Open an ASCII file and parse out its metadata from the header.
+    """Open an ASCII file and parse out its metadata from the header. Only the
+    header is read, decompressing the file on the fly if it is compressed.
 
     Args:
-        fp (str): file path
+        fp (str/bytes-like/file-like): file path, contents of a file as
+            bytes, bytearray or memoryview, or a binary file-like object
         numeric (bool): convert fields to numeric data types if possible
 
     Returns
         dict"""
 
-    with open(path, 'r', encoding='utf-8', errors="replace") as f:
-        comments = itertools.takewhile(lambda s: s.startswith('%'), f)
-        comments = list(map(lambda l: l[1:].strip(), comments))
+    with compression.open_binary(path) as f:
+        text = io.TextIOWrapper(f, encoding='utf-8', errors="replace")
+        try:
+            return parse_metadata(text, numeric)
+        finally:
+            text.detach() # leave f to be closed by its owner
+
+def _parse_numeric(value):
+    """Cheap equivalent of `pandas.to_numeric(value, errors='ignore')` for a
+    single string: return a numpy integer or float if the string spells one,
+    else the string itself.
+
+    Args:
+        value (str): stripped metadata value
+
+    Returns:
+        numpy.int64/numpy.uint64/numpy.float64/str"""
+
+    if not value: # pandas treats the empty string as missing
+        return np.float64(np.nan)
+    if _INT_RE.fullmatch(value):
+        i = int(value)
+        if -2**63 <= i < 2**63:
+            return np.int64(i)
+        elif 0 <= i < 2**64:
+            return np.uint64(i)
+        return value
+    if _FLOAT_RE.fullmatch(value):
+        f = float(value)
+        if np.isinf(f) and 'inf' not in value.lower(): # overflow is not numeric to pandas
+            return value
+        return np.float64(f)
+    return value
+
+def _parse_int(value):
+    return np.int64(value) if _SHORT_INT_RE.fullmatch(value) else _parse_numeric(value)
+
+def _parse_float(value):
+    return np.float64(value) if _DECIMAL_RE.fullmatch(value) else _parse_numeric(value)
+
+def _parse_str(value):
+    return value
+
+_INT_RE = re.compile(r'[+-]?[0-9]+')
+_SHORT_INT_RE = re.compile(r'[+-]?[0-9]{1,18}') # always fits in an int64
+_DECIMAL_RE = re.compile(r'[+-]?(?:[0-9]+\.[0-9]*|\.[0-9]+)')
+_FLOAT_RE = re.compile(
+    r'[+-]?(?:(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][+-]?[0-9]+)?|inf(?:inity)?)',
+    re.IGNORECASE
+)
+
+# expected type of the values of known LLUV header keys, shared by CODAR and
+# WERA files; declared types are only a fast path, a value that does not look
+# like its declared type falls back to _parse_numeric so the result is always
+# the same as pandas.to_numeric. TimeStamp and other multi-field values are
+# kept as strings, see create_time
+LLUV_METADATA_SCHEMA = {
+    'CTF': _parse_float,
+    'FileType': _parse_str,
+    'LLUVSpec': _parse_str,
+    'Manufacturer': _parse_str,
+    'TimeStamp': _parse_str,
+    'TimeZone': _parse_str,
+    'TimeCoverage': _parse_str,
+    'Origin': _parse_str,
+    'GreatCircle': _parse_str,
+    'GeodVersion': _parse_str,
+    'LLUVTrustData': _parse_str,
+    'RangeStart': _parse_int,
+    'RangeEnd': _parse_int,
+    'RangeResolutionKMeters': _parse_float,
+    'RangeResolutionMeters': _parse_float,
+    'RangeCells': _parse_int,
+    'DopplerCells': _parse_int,
+    'DopplerInterpolation': _parse_int,
+    'AntennaBearing': _parse_str,
+    'ReferenceBearing': _parse_str,
+    'AngularResolution': _parse_str,
+    'SpatialResolution': _parse_str,
+    'PatternDate': _parse_str,
+    'PatternResolution': _parse_str,
+    'PatternSmoothing': _parse_str,
+    'TransmitCenterFreqMHz': _parse_float,
+    'TransmitBandwidthKHz': _parse_float,
+    'TransmitSweepRateHz': _parse_float,
+    'DopplerResolutionHzPerBin': _parse_float,
+    'FirstOrderMethod': _parse_int,
+    'BraggSmoothingPoints': _parse_int,
+    'CurrentVelocityLimit': _parse_float,
+    'BraggHasSecondOrder': _parse_int,
+    'RadialBraggPeakDropOff': _parse_float,
+    'RadialBraggPeakNull': _parse_float,
+    'RadialBraggNoiseThreshold': _parse_float,
+    'PatternAmplitudeCorrections': _parse_str,
+    'PatternPhaseCorrections': _parse_str,
+    'PatternAmplitudeCalculations': _parse_str,
+    'PatternPhaseCalculations': _parse_str,
+    'RadialMusicParameters': _parse_str,
+    'RadialMinimumMergePoints': _parse_int,
+    'FirstOrderCalc': _parse_int,
+    'MergeMethod': _parse_str,
+    'PatternMethod': _parse_str,
+    'MergedCount': _parse_int,
+    'SpectraRangeCells': _parse_int,
+    'SpectraDopplerCells': _parse_int,
+    'TableType': _parse_str,
+    'TableColumns': _parse_int,
+    'TableColumnTypes': _parse_str,
+    'TableRows': _parse_int,
+}
+
+def parse_metadata(lines, numeric=False):
+    """Parse the metadata out of the lines of an ASCII file header. Lines are
+    consumed up to the first one that does not start with '%'; when converting
+    to numeric types, parsing stops at the 'TableStart:' line instead.
+
+    Args:
+        lines (iterable of str): lines of the file
+        numeric (bool): convert fields to numeric data types if possible
+
+    Returns
+        dict"""
+
+    metadata = {}
+    for line in lines:
+        if not line.startswith('%'):
+            break
+        c = line[1:].strip()
+        if c.startswith('%'): # column headings, etc.
+            continue
+
         if numeric: # attempt to convert to numeric types
-            metadata = {}
-            if 'TableStart:' in comments: # find where the table starts if 'TableStart:' exists
-                TBSind = comments.index('TableStart:')
-                for c in comments:
-                    if not c.startswith('%'):
-                        Cind = comments.index(c)
-                        if not Cind > TBSind: # don't parse if comment is after TableStart:
-                            metadata_entry = list(map(str.strip, c.split(':')))
-                            metadata[metadata_entry[0]] = pd.to_numeric(metadata_entry[1], errors='ignore')
-            else: # if 'TableStart:; doesn't exist
-                for c in comments:
-                    if not c.startswith('%'):
-                        metadata_entry = list(map(str.strip, c.split(':')))
-                        metadata[metadata_entry[0]] = pd.to_numeric(metadata_entry[1], errors='ignore')
+            metadata_entry = c.split(':')
+            key = metadata_entry[0].strip()
+            value = metadata_entry[1].strip()
+            metadata[key] = LLUV_METADATA_SCHEMA.get(key, _parse_numeric)(value)
+            if c == 'TableStart:': # don't parse comments after TableStart:
+                break
         else: # non-numeric
-            metadata = dict([tuple(map(str.strip, c.split(':'))) for c in comments if not c.startswith('%')])
-        return metadata
+            key, value = map(str.strip, c.split(':'))
+            metadata[key] = value
+
+    return metadata
 
 def calc_max_range(metadata):
     """Latest implementation of calc_max_range, used with numeric metadata.
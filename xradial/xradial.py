@@ -3,85 +3,148 @@
 import numpy as np
 import os
 import xradial.dataframe # dataframe operations
+import xradial.dataset # dataset operations
+import xradial.dtype_policy # compact dtypes
+import xradial.instrument # stage timing hooks
+import xradial.reader # single-pass file reading
 import xradial.utils
 import xarray as xr
 
-def create_xarray_dataset(fp, time_var_str, cf_time_units, numerical_metadata=False):
+# TODO move this out? specify in JSON maybe for extensibility?
+ColLongNameMap = {
+    'TIME': 'time',
+    'LOND': 'Longitude (deg)',
+    'LATD': 'Latitude (deg)',
+    'VELU': 'U comp (cm/s)',
+    'VELV': 'V comp (cm/s)',
+    'VFLG': 'VectorFlag (GridCode)',
+    'ESPC': 'Spatial Quality',
+    'ETMP': 'Temporal Quality',
+    'MAXV': 'Velocity Maximum',
+    'MINV': 'Velocity Minimum',
+    'ERSC': 'Spatial Count',
+    'ERTC': 'Temporal Count',
+    'XDST': 'X Distance (km)',
+    'YDST': 'Y Distance (km)',
+    'RNGE': 'Range (km)',
+    'BEAR': 'Bearing (True)',
+    'VELO': 'Velocity (cm/s)',
+    'HEAD': 'Direction (True)',
+    'SPRC': 'Spectra RngCell',
+    'OLAT': 'Origin Latitude',
+    'OLON': 'Origin Longitude',
+    'OLON': 'Origin Longitude',
+    'ANTB': 'Antenna Bearing',
+}
+
+def create_xarray_dataset(fp, time_var_str, cf_time_units, numerical_metadata=False,
+    engine='numpy', dtypes=None, variables=None, mmap=False, layout='grid'):
     """High-level wrapper for the xRADIAL API. Given a path to data, a name of the
     time variable, and a string of the CF-compliant time units, convert that ASCII
     data to an xarray Dataset object.
 
     Args:
-        fp (file-path object): file path to ASCII data
+        fp (file-path object/bytes-like/file-like): file path to ASCII data,
+            the contents of a file as bytes, bytearray or memoryview, or a
+            binary file-like object; compressed contents are decompressed
         time_var_str (str): name of time variable
         cf_time_units (str): string describing the units of the time variable
         numerical_metadata (bool): indicator to convert metadata to numeric types
+        engine (str): how the data is put on its grid; 'numpy' scatters the
+            rows straight into dense arrays, 'pandas' reindexes the DataFrame
+            and converts it with xarray.Dataset.from_dataframe
+        dtypes (None/str/dict): dtype policy of the variables; None keeps
+            float64, 'compact' uses xradial.dtype_policy.COMPACT_DTYPES, and
+            a dict maps column codes to dtypes. Integer variables get a
+            `_FillValue` attribute marking empty cells
+        variables (iterable of str/None): variables to load, all if None; the
+            coordinate columns the grid needs (BEAR, RNGE, LATD, LOND) are
+            always loaded
+        mmap (bool): memory-map the file and parse the table straight from
+            the mapping, instead of reading it into memory; compressed files
+            and file-like objects are read as usual
+        layout (str): 'grid' puts the data on its dense grid, 'ragged' keeps
+            one element per observation along an `obs` dimension with its
+            integer position on the grid, see
+            xradial.dataset.create_ragged_dataset; xradial.dataset.densify
+            puts a ragged Dataset on its grid. `engine` only applies to 'grid'
+
+    Each stage of the conversion is reported to the listeners of
+    xradial.instrument, if any.
 
     Returns:
         xarray.Dataset: Dataset of the data in the ASCII file"""
 
-    # TODO move this out? specify in JSON maybe for extensibility?
-    ColLongNameMap = {
-        'TIME': 'time',
-        'LOND': 'Longitude (deg)',
-        'LATD': 'Latitude (deg)',
-        'VELU': 'U comp (cm/s)',
-        'VELV': 'V comp (cm/s)',
-        'VFLG': 'VectorFlag (GridCode)',
-        'ESPC': 'Spatial Quality',
-        'ETMP': 'Temporal Quality',
-        'MAXV': 'Velocity Maximum',
-        'MINV': 'Velocity Minimum',
-        'ERSC': 'Spatial Count',
-        'ERTC': 'Temporal Count',
-        'XDST': 'X Distance (km)',
-        'YDST': 'Y Distance (km)',
-        'RNGE': 'Range (km)',
-        'BEAR': 'Bearing (True)',
-        'VELO': 'Velocity (cm/s)',
-        'HEAD': 'Direction (True)',
-        'SPRC': 'Spectra RngCell',
-        'OLAT': 'Origin Latitude',
-        'OLON': 'Origin Longitude',
-        'OLON': 'Origin Longitude',
-        'ANTB': 'Antenna Bearing',
-    }
-
-    # get metadata from file
-    metadata = xradial.utils.get_metadata_from_file(fp, numerical_metadata)
-
-    # create datetime object used
-    dt = xradial.utils.create_time(metadata)
-
-    # calculate origin latitude and longitude; these are needed as 1-D later
-    olat, olon = xradial.utils.get_olat_olon(metadata)
-
-    # calculate antenna bearing; needed as 1-D later
-    antenna_bearing = xradial.utils.get_antenna_bearing(metadata)
-
-    # use pandas to read the ASCII file and create dataframe
-    df = xradial.dataframe.create_dataframe(fp, time_var_str, dt, metadata)
-
-    # reindex dataframe by prevailing coordinate system
-    df = xradial.dataframe.reindex_dataframe(df, metadata, time_var_str, olat, olon)
-
-    # convert dataframe to xarray object
-    ds = xr.Dataset.from_dataframe(df)
-
-    # add olat, olon, antenna_bearing to Dataset, time as only dimension
-    ds['OLAT'] = ([time_var_str], [olat])
-    ds['OLON'] = ([time_var_str], [olon])
-    ds['ANTB'] = ([time_var_str], [antenna_bearing])
-
-    # add metadata to Dataset
-    ds.attrs = metadata
-
-    # update time encoding
-    ds[time_var_str].encoding.update({'dtype': 'float64', 'units': cf_time_units})
-    
-    # add variable long_name attributes from col_long_name_map
+    dtypes = xradial.dtype_policy.resolve_dtypes(dtypes)
+
+    with xradial.instrument.converting(fp):
+        # read the file once, splitting out the metadata and the table rows;
+        # a memory-mapped table is only valid inside the block
+        with xradial.reader.open_radial(fp, numerical_metadata, mmap) as (metadata, table):
+            # create datetime object used
+            dt = xradial.utils.create_time(metadata)
+
+            with xradial.instrument.stage('table') as stage:
+                # use pandas to parse the table rows and create dataframe
+                df = xradial.dataframe.create_dataframe(table, time_var_str, dt, metadata, dtypes, variables)
+                stage.rows = len(df)
+
+        # calculate origin latitude and longitude; these are needed as 1-D later
+        olat, olon = xradial.utils.get_olat_olon(metadata)
+
+        # calculate antenna bearing; needed as 1-D later
+        antenna_bearing = xradial.utils.get_antenna_bearing(metadata)
+
+        if layout == 'ragged':
+            # keep the observations, with their position on the prevailing grid
+            ds = xradial.dataset.create_ragged_dataset(df, metadata, time_var_str, olat, olon, dtypes)
+        elif layout != 'grid':
+            raise ValueError("Unknown layout {}, expected 'grid' or 'ragged'".format(layout))
+        elif engine == 'numpy':
+            # scatter the data onto the prevailing coordinate system
+            ds = xradial.dataset.create_dataset(df, metadata, time_var_str, olat, olon, dtypes)
+        elif engine == 'pandas':
+            with xradial.instrument.stage('reindex') as stage:
+                # reindex dataframe by prevailing coordinate system
+                df = xradial.dataframe.reindex_dataframe(df, metadata, time_var_str, olat, olon, variables)
+                stage.cells = len(df)
+
+            with xradial.instrument.stage('dataset') as stage:
+                # convert dataframe to xarray object
+                ds = xr.Dataset.from_dataframe(df)
+                stage.cells = df.size
+        else:
+            raise ValueError("Unknown engine {}, expected 'numpy' or 'pandas'".format(engine))
+
+        with xradial.instrument.stage('attributes'):
+            # cast what the engine didn't, and mark integer fill values
+            xradial.dtype_policy.apply_dtypes(ds, dtypes)
+
+            # add olat, olon, antenna_bearing to Dataset, time as only dimension
+            ds.update({ # a single update, each assignment re-aligns the Dataset
+                'OLAT': ([time_var_str], [olat]),
+                'OLON': ([time_var_str], [olon]),
+                'ANTB': ([time_var_str], [antenna_bearing]),
+            })
+
+            # add metadata to Dataset
+            ds.attrs = metadata
+
+            # update time encoding
+            ds[time_var_str].encoding.update({'dtype': 'float64', 'units': cf_time_units})
+
+            # add variable long_name attributes from col_long_name_map
+            add_long_names(ds)
+
+        return ds
+
+def add_long_names(ds):
+    """Add long_name attributes from ColLongNameMap to the variables of a
+    Dataset, in place.
+
+    Args:
+        ds (xarray.Dataset): Dataset of radial data"""
+
     for k,v in ColLongNameMap.items():
         if k in ds:
             ds[k].attrs.update({'long_name': v})
-
-    return  ds